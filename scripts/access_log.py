@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Rank the images that carry the traffic, from exported access logs.
+
+Reads Vercel and Supabase log exports (JSON lines, gzipped or not, or stdin)
+in one streaming pass with constant memory, whatever the size of the logs:
+
+- requests, bytes and cache hits per object go into three count-min sketches
+  (conservative update) that share the same hash cells; estimates can only
+  overcount, by at most ~e/CMS_WIDTH of the total with high probability
+- the TOP_CANDIDATES heaviest objects by the ranking metric are tracked as
+  heavy-hitter candidates, so no per-object table grows with the logs
+- distinct objects and distinct clients are HyperLogLog estimates (~1% error)
+
+Objects are normalized before counting: the releases/<id>/ prefix and the
+content version of watch_raw / run_jobs are dropped (scripts/filenames.py),
+so a product slot keeps its history across releases and relinks.
+
+The ranking (hot_images.json) is what the pipeline reads to work on the
+hottest assets first: process_batch schedules those sources before the rest.
+
+Usage:
+    python scripts/access_log.py logs/*.json.gz [--by bytes|requests] [--top 30] [--output hot_images.json]
+    zcat vercel-*.gz | python scripts/access_log.py -
+"""
+
+import io
+import sys
+import gzip
+import json
+import math
+import time
+import hashlib
+import argparse
+from array import array
+from urllib.parse import urlsplit, unquote
+
+from filenames import output_name, parse_output
+
+HOT_PATH = 'hot_images.json'
+CMS_WIDTH = 4096
+CMS_DEPTH = 4
+HLL_PRECISION = 14
+TOP_CANDIDATES = 200
+IMAGE_EXTENSIONS = ('.webp', '.avif', '.jpg', '.jpeg', '.png', '.gif', '.svg')
+HIT_STATUSES = {'HIT', 'STALE', 'REVALIDATED', 'UPDATING'}
+STORAGE_MARKERS = ('/object/public/', '/object/sign/', '/object/authenticated/', '/render/image/public/')
+MASK64 = (1 << 64) - 1
+
+
+def hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'little')
+
+
+class CountMinSketch:
+    """Contadores aproximados por clave en CMS_DEPTH x CMS_WIDTH celdas; nunca subestima."""
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH):
+        self.width = width
+        self.rows = [array('q', bytes(8 * width)) for _ in range(depth)]
+        self.total = 0
+
+    def cells(self, h):
+        # Double hashing: depth posiciones a partir de un solo hash de 64 bits
+        h1, h2 = h & 0xffffffff, (h >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(len(self.rows))]
+
+    def add(self, cells, amount=1):
+        """Conservative update: solo sube las celdas que quedan por debajo del nuevo mínimo."""
+        self.total += amount
+        target = self.estimate(cells) + amount
+        for row, cell in zip(self.rows, cells):
+            if row[cell] < target:
+                row[cell] = target
+        return target
+
+    def estimate(self, cells):
+        return min(row[cell] for row, cell in zip(self.rows, cells))
+
+    def error_bound(self):
+        return math.e / self.width * self.total
+
+
+class HyperLogLog:
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, h):
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))  # linear counting para cardinalidades chicas
+        return round(estimate)
+
+
+# --- formatos de log ---
+
+def first(value):
+    """Supabase exporta cada campo de metadata como lista de un elemento."""
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def extract(record):
+    """(path, status, bytes, cache_status, cliente) de un registro de Vercel o de Supabase."""
+    meta = first(record.get('metadata'))
+    if isinstance(meta, dict) and 'request' in meta:  # Supabase: edge_logs / storage
+        request, response = first(meta.get('request')) or {}, first(meta.get('response')) or {}
+        req_headers, resp_headers = first(request.get('headers')) or {}, first(response.get('headers')) or {}
+        return (request.get('path') or request.get('url'), response.get('status_code'),
+                resp_headers.get('content_length'), resp_headers.get('cf_cache_status'),
+                req_headers.get('cf_connecting_ip') or req_headers.get('x_real_ip'))
+    proxy = record.get('proxy') or {}  # Vercel: log drain / export
+    return (proxy.get('path') or record.get('path') or record.get('requestPath'),
+            proxy.get('statusCode') or record.get('statusCode'),
+            proxy.get('responseByteSize') or record.get('responseByteSize') or record.get('bytes'),
+            proxy.get('vercelCache') or record.get('cache'),
+            proxy.get('clientIp') or record.get('clientIp'))
+
+
+def object_key(path):
+    """Clave normalizada del objeto, o None si el request no es de una imagen."""
+    path = unquote(urlsplit(path).path)
+    for marker in STORAGE_MARKERS:
+        if marker in path:
+            path = path.split(marker, 1)[1]
+            path = path.split('/', 1)[1] if '/' in path else path  # bucket
+            break
+    if not path.lower().endswith(IMAGE_EXTENSIONS):
+        return None
+    if path.startswith('releases/'):
+        path = path.split('/', 2)[-1]
+    head, _, name = path.rpartition('/')
+    parsed = parse_output(name)
+    if parsed and parsed.version:
+        name = output_name(parsed.slug, parsed.index, parsed.thumb, parsed.mobile, parsed.width)
+    return f"{head}/{name}" if head else name
+
+
+def open_log(path):
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', errors='replace')
+    with open(path, 'rb') as f:
+        gzipped = f.read(2) == b'\x1f\x8b'
+    if gzipped:
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, encoding='utf-8', errors='replace')
+
+
+# --- análisis ---
+
+class AccessStats:
+    def __init__(self, by='bytes', top=TOP_CANDIDATES):
+        self.by = by
+        self.top = top
+        self.requests = CountMinSketch()
+        self.bytes = CountMinSketch()
+        self.hits = CountMinSketch()
+        self.objects = HyperLogLog()
+        self.clients = HyperLogLog()
+        self.candidates = {}  # objeto -> celdas (heavy hitters según self.by)
+        self.floor = 0        # métrica mínima para entrar a candidates cuando está lleno
+        self.records = self.skipped = self.ignored = 0
+
+    def add(self, key, size, hit, client):
+        h = hash64(key)
+        cells = self.requests.cells(h)
+        requests = self.requests.add(cells)
+        size = self.bytes.add(cells, size) if size else self.bytes.estimate(cells)
+        if hit:
+            self.hits.add(cells)
+        self.objects.add(h)
+        if client:
+            self.clients.add(hash64(client))
+
+        metric = size if self.by == 'bytes' else requests
+        if key in self.candidates or metric > self.floor:
+            self.candidates[key] = cells
+            if len(self.candidates) > 2 * self.top:
+                self.prune()
+
+    def prune(self):
+        sketch = self.bytes if self.by == 'bytes' else self.requests
+        ranked = sorted(self.candidates.items(), key=lambda kv: sketch.estimate(kv[1]), reverse=True)
+        self.candidates = dict(ranked[:self.top])
+        self.floor = sketch.estimate(ranked[self.top - 1][1])
+
+    def ingest(self, lines):
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                path, status, size, cache, client = extract(json.loads(line))
+                status = int(status or 200)
+                size = int(size or 0)
+            except (ValueError, TypeError, AttributeError):
+                self.skipped += 1
+                continue
+            key = object_key(path) if path and status < 400 else None
+            if key is None:
+                self.ignored += 1
+                continue
+            self.records += 1
+            self.add(key, size, str(cache or '').upper() in HIT_STATUSES, client)
+
+    def ranking(self):
+        sketch = self.bytes if self.by == 'bytes' else self.requests
+        ranked = sorted(self.candidates.items(), key=lambda kv: sketch.estimate(kv[1]), reverse=True)[:self.top]
+        rows = []
+        for key, cells in ranked:
+            requests = self.requests.estimate(cells)
+            parsed = parse_output(key.rpartition('/')[2])
+            rows.append({
+                'object': key,
+                'slug': parsed.slug if parsed else None,
+                'index': parsed.index if parsed else None,
+                'thumb': parsed.thumb if parsed else False,
+                'requests': requests,
+                'bytes': self.bytes.estimate(cells),
+                'cache_hit_ratio': round(min(1.0, self.hits.estimate(cells) / requests), 3) if requests else None,
+            })
+        return rows
+
+
+def human(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024 or unit == 'GB':
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ranking de imágenes por tráfico desde logs de acceso (Vercel/Supabase)")
+    parser.add_argument('logs', nargs='+', help="Archivos JSON lines (.gz o no); '-' = stdin")
+    parser.add_argument('--by', choices=('bytes', 'requests'), default='bytes', help="Métrica del ranking")
+    parser.add_argument('--top', type=int, default=30, help="Objetos a mostrar")
+    parser.add_argument('--output', default=HOT_PATH, help="Ranking completo en JSON para el pipeline")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    stats = AccessStats(args.by, max(args.top, TOP_CANDIDATES))
+    for path in args.logs:
+        try:
+            with open_log(path) as f:
+                stats.ingest(f)
+        except OSError as e:
+            print(f"❌ {path}: {e}")
+            return 1
+
+    rows = stats.ranking()
+    print(f"📊 {stats.records} requests de imágenes en {time.monotonic() - started:.1f}s "
+          f"({stats.ignored} de otras rutas, {stats.skipped} líneas ilegibles)")
+    print(f"   ~{stats.objects.count()} objetos distintos, ~{stats.clients.count()} clientes distintos, "
+          f"{human(stats.bytes.total)} servidos")
+    print(f"   Error máx. por objeto: +{stats.requests.error_bound():.0f} requests, +{human(stats.bytes.error_bound())}")
+    print(f"\n   {'#':>3} {'Objeto':<44} {'Requests':>9} {'Bytes':>10} {'Cache hit':>9}")
+    for rank, row in enumerate(rows[:args.top], 1):
+        ratio = f"{row['cache_hit_ratio']:.0%}" if row['cache_hit_ratio'] is not None else '-'
+        print(f"   {rank:>3} {row['object'][:44]:<44} {row['requests']:>9} {human(row['bytes']):>10} {ratio:>9}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'by': args.by, 'logs': args.logs,
+                   'records': stats.records, 'distinct_objects': stats.objects.count(),
+                   'distinct_clients': stats.clients.count(), 'objects': rows}, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 {args.output}: {len(rows)} objetos (process_batch procesa primero los más calientes)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,23 +1,7 @@
 import os
-import requests
 
-# Configuración Manual de ENV
-def load_env():
-    env_vars = {}
-    dotenv_path = '.env'
-    if os.path.exists(dotenv_path):
-        with open(dotenv_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'): continue
-                if '=' in line:
-                    key, val = line.split('=', 1)
-                    env_vars[key.strip()] = val.strip().strip('"').strip("'")
-    return env_vars
-
-env = load_env()
-SUPABASE_URL = env.get("VITE_SUPABASE_URL")
-SUPABASE_KEY = env.get("SUPABASE_SERVICE_ROLE_KEY") or env.get("VITE_SUPABASE_ANON_KEY")
+from products_snapshot import open_snapshot
+from supabase_config import credentials
 
 RAW_DIR = r'C:/Users/Facu elias/Desktop/Program/perlaNegra/raw_batch'
 
@@ -27,11 +11,9 @@ def main():
     # 1. Buscar en DB
     print("--- 📚 BASE DE DATOS (Slugs) ---")
     try:
-        url = f"{SUPABASE_URL}/rest/v1/products?select=slug,name"
-        headers = {"apikey": SUPABASE_KEY, "Authorization": f"Bearer {SUPABASE_KEY}"}
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        products = r.json()
+        snapshot = open_snapshot(*credentials())
+        products = snapshot.all(['slug', 'name'])
+        snapshot.close()
         
         found_db = False
         for p in products:
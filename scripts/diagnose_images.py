@@ -1,49 +1,22 @@
 
-import os
-import requests
+import argparse
+
+from products_snapshot import open_snapshot
+from supabase_config import credentials, get_session
 
 # Configuración
-DOTENV_PATH = '.env'
 BUCKET_NAME = 'images'
+DEFAULT_SLUGS = ["mini-poker", "mine-my-pleasure", "petit-mort"]
 
-def load_env():
-    env_vars = {}
-    if os.path.exists(DOTENV_PATH):
-        with open(DOTENV_PATH, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'): continue
-                if '=' in line:
-                    key, val = line.split('=', 1)
-                    env_vars[key.strip()] = val.strip().strip('"').strip("'")
-    return env_vars
-
-env = load_env()
-SUPABASE_URL = env.get("VITE_SUPABASE_URL")
-SUPABASE_KEY = env.get("SUPABASE_SERVICE_ROLE_KEY") or env.get("VITE_SUPABASE_ANON_KEY")
-
-HEADERS = {
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "apikey": SUPABASE_KEY,
-    "Content-Type": "application/json",
-    "Prefer": "return=representation"
-}
-
-def check_product_images(slug):
-    url = f"{SUPABASE_URL}/rest/v1/products"
-    # Select 'image_url' (DB column) not 'image' (frontend alias)
-    params = { "select": "name,slug,image_url,image2_url,image3_url", "slug": f"eq.{slug}" }
-    
+def check_product_images(slug, snapshot):
+    # Lectura local: 'image_url' (DB column) not 'image' (frontend alias)
     try:
-        r = requests.get(url, headers=HEADERS, params=params)
-        r.raise_for_status()
-        products = r.json()
+        p = snapshot.get(slug)
         
-        if not products:
+        if not p:
             print(f"❌ Product NOT FOUND in DB: {slug}")
             return
 
-        p = products[0]
         print(f"\n📦 Product: {p['name']} ({p['slug']})")
         print(f"   - Main Image: {p.get('image_url')}")
         
@@ -51,7 +24,7 @@ def check_product_images(slug):
         img_url = p.get('image_url')
         if img_url:
             try:
-                head = requests.head(img_url)
+                head = get_session().head(img_url)
                 if head.status_code == 200:
                     print(f"     ✅ URL Reachable (200 OK)")
                 else:
@@ -65,10 +38,18 @@ def check_product_images(slug):
         print(f"Error checking {slug}: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Diagnóstico de imágenes por producto")
+    parser.add_argument('slugs', nargs='*', default=DEFAULT_SLUGS)
+    parser.add_argument('--max-age', type=float, default=0,
+                        help="Usar el snapshot local sin consultar Supabase si tiene menos de N segundos")
+    args = parser.parse_args()
+
     print("running diagnostics...")
-    check_product_images("mini-poker")
-    check_product_images("mine-my-pleasure")
-    check_product_images("petit-mort")
+    # Un solo refresh incremental para todos los slugs en vez de un GET por producto
+    snapshot = open_snapshot(*credentials(), max_age=args.max_age)
+    for slug in args.slugs:
+        check_product_images(slug, snapshot)
+    snapshot.close()
 
 if __name__ == "__main__":
     main()
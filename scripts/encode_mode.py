@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Pick lossy, palette or lossless WebP per image instead of lossy everywhere.
+
+Every encoder saved lossy WebP at a fixed quality, also for flat graphics
+(logos, badges, placeholders) where lossless or a palette is smaller and
+sharp. Each image is classified on a NEAREST thumbnail with NumPy:
+
+- distinct colours: a graphic has a few hundred, a photo tens of thousands
+- edge density: of the pixels that are not flat, how many are hard edges
+  (text, outlines) instead of soft gradients
+
+A photo is encoded lossy straight away, with no trial encodes. A graphic
+(or an ambiguous image) is encoded in every mode and the smallest one that
+meets the quality bar wins: lossless always meets it, a palette (<= 256
+colours, lossless WebP) must be at least as close to the original as the
+lossy encode at the configured quality, and lossy is the bar itself.
+
+The chosen mode is appended to .encode_modes.jsonl under a hash of the
+pixels and the quality, so the next run encodes that image once, in the
+mode already chosen. Append-only, so the workers of the process pool can
+record at the same time.
+
+Usage:
+    python scripts/encode_mode.py public/instagram/*.webp public/hero/reseller.webp [--apply]
+"""
+
+import io
+import os
+import sys
+import json
+import hashlib
+import argparse
+
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MODES_PATH = '.encode_modes.jsonl'
+MODES = ('lossy', 'palette', 'lossless')
+
+ANALYSIS_SIZE = 256          # lado de la miniatura NEAREST (no inventa colores intermedios)
+# Umbrales medidos sobre optimized_batch, raw_images, public/ y src/assets: las fotos de producto
+# sobre blanco bajan hasta ~1600 colores (un hero oscuro a ~1000), las capturas y logos no pasan de ~850
+# salvo alguna sección con fotos adentro. Errar hacia 'graphic' solo cuesta encodes de prueba.
+PHOTO_MIN_COLORS = 8192      # más colores que esto en la miniatura: foto
+GRAPHIC_MAX_COLORS = 900     # menos: gráfico, sin mirar bordes
+FLAT_DIFF = 2                # diferencia entre vecinos (0-255) que cuenta como zona plana
+HARD_EDGE_DIFF = 64          # diferencia que cuenta como borde duro
+GRAPHIC_MIN_HARD_EDGES = 0.35  # fracción de pixeles no planos que son borde duro en un gráfico
+PALETTE_COLORS = 256
+LOSSLESS_METHOD = 4
+
+
+def classify(img):
+    """'photo' o 'graphic' (candidato a palette / lossless), sobre una miniatura."""
+    if np is None:
+        return 'photo'
+    small = img.convert('RGB')
+    small.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.Resampling.NEAREST)
+    arr = np.asarray(small, dtype=np.int16)
+    if arr.shape[0] < 2 or arr.shape[1] < 2:
+        return 'photo'
+
+    channels = arr.astype(np.int32)  # en int16, G << 8 desborda desde G = 128
+    packed = (channels[..., 0] << 16) | (channels[..., 1] << 8) | channels[..., 2]
+    colors = np.unique(packed).size
+    if colors <= GRAPHIC_MAX_COLORS:
+        return 'graphic'
+    if colors > PHOTO_MIN_COLORS:
+        return 'photo'
+
+    # Zona gris: gradientes suaves (foto) o bordes duros sobre planos (texto, ilustración)
+    dx = np.abs(np.diff(arr, axis=1)).max(axis=2)
+    dy = np.abs(np.diff(arr, axis=0)).max(axis=2)
+    diffs = np.concatenate([dx.ravel(), dy.ravel()])
+    busy = diffs > FLAT_DIFF
+    if not busy.any():
+        return 'graphic'
+    hard = np.count_nonzero(diffs > HARD_EDGE_DIFF) / np.count_nonzero(busy)
+    return 'graphic' if hard >= GRAPHIC_MIN_HARD_EDGES else 'photo'
+
+
+def encode_as(img, mode, quality, method=4):
+    buffer = io.BytesIO()
+    if mode == 'lossy':
+        img.save(buffer, 'WEBP', quality=quality, method=method)
+    elif mode == 'palette':
+        # libwebp lossless guarda la paleta indexada cuando hay <= 256 colores; MEDIANCUT no acepta RGBA
+        alpha = 'A' in img.getbands() or 'transparency' in img.info
+        source = img.convert('RGBA' if alpha else 'RGB') if img.mode not in ('RGB', 'RGBA') else img
+        quantizer = Image.Quantize.FASTOCTREE if source.mode == 'RGBA' else Image.Quantize.MEDIANCUT
+        palette = source.quantize(PALETTE_COLORS, method=quantizer, dither=Image.Dither.NONE)
+        palette.convert(source.mode).save(buffer, 'WEBP', lossless=True, method=LOSSLESS_METHOD)
+    elif mode == 'lossless':
+        img.save(buffer, 'WEBP', lossless=True, method=LOSSLESS_METHOD)
+    else:
+        raise ValueError(f"modo desconocido: {mode}")
+    return buffer.getvalue()
+
+
+def psnr(img, data):
+    """PSNR (dB) del WebP data contra img; inf si es idéntico."""
+    mode = 'RGBA' if 'A' in img.getbands() else 'RGB'
+    with Image.open(io.BytesIO(data)) as decoded:
+        a = np.asarray(img.convert(mode), dtype=np.float64)
+        b = np.asarray(decoded.convert(mode), dtype=np.float64)
+    mse = np.mean((a - b) ** 2)
+    return float('inf') if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+
+def pixels_key(img, quality):
+    digest = hashlib.blake2b(img.tobytes(), digest_size=12)
+    digest.update(f"{img.mode}:{img.size}:{quality}".encode())
+    return digest.hexdigest()
+
+
+class ModeStore:
+    """Modo elegido por imagen (hash de pixeles + calidad). Append-only: seguro entre procesos."""
+
+    def __init__(self, path=MODES_PATH):
+        self.path = path
+        self.modes = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.modes[entry['key']] = entry['mode']
+                    except (ValueError, KeyError):
+                        continue  # línea cortada por un proceso que murió a mitad
+
+    def get(self, key):
+        mode = self.modes.get(key)
+        return mode if mode in MODES else None
+
+    def record(self, key, mode, size):
+        self.modes[key] = mode
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'key': key, 'mode': mode, 'bytes': size}) + '\n')
+
+
+_store = None
+
+
+def default_store():
+    # Uno por proceso: los workers del pool lo cargan la primera vez que encodean
+    global _store
+    if _store is None:
+        _store = ModeStore()
+    return _store
+
+
+def choose(img, quality, method=4):
+    """(modo, bytes) más chico que cumple el listón de calidad, sin mirar el store."""
+    lossy = encode_as(img, 'lossy', quality, method)
+    if classify(img) == 'photo':
+        return 'lossy', lossy
+
+    candidates = [('lossy', lossy), ('lossless', encode_as(img, 'lossless', quality))]
+    palette = encode_as(img, 'palette', quality)
+    if psnr(img, palette) >= psnr(img, lossy):
+        candidates.append(('palette', palette))
+    return min(candidates, key=lambda c: len(c[1]))
+
+
+def encode(img, quality, method=4, store=None):
+    """WebP de img en el modo más barato que cumple el listón. Devuelve (bytes, modo)."""
+    store = store or default_store()
+    key = pixels_key(img, quality)
+    mode = store.get(key)
+    if mode:
+        return encode_as(img, mode, quality, method), mode
+    mode, data = choose(img, quality, method)
+    store.record(key, mode, len(data))
+    return data, mode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modo WebP (lossy / palette / lossless) por imagen")
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--quality', type=int, default=85, help="Calidad lossy de referencia")
+    parser.add_argument('--apply', action='store_true',
+                        help="Reescribir in situ los que salen más chicos en palette / lossless")
+    args = parser.parse_args()
+
+    saved = 0
+    for path in args.files:
+        try:
+            with Image.open(path) as img:
+                img.load()
+                current = os.path.getsize(path)
+                # El archivo actual ya es el listón: solo se cambia a modos que no pierden nada sobre él
+                kind = classify(img)
+                options = [('lossless', encode_as(img, 'lossless', args.quality))]
+                if kind == 'graphic':
+                    palette = encode_as(img, 'palette', args.quality)
+                    if psnr(img, palette) == float('inf'):
+                        options.append(('palette', palette))
+        except (OSError, ValueError) as e:
+            print(f"❌ {path}: {e}")
+            continue
+        mode, data = min(options, key=lambda o: len(o[1]))
+        if len(data) >= current:
+            print(f"   {path}: {kind}, se queda como está ({current / 1024:.1f} KB; {mode} {len(data) / 1024:.1f} KB)")
+            continue
+        print(f"   {path}: {kind}, {mode} {current / 1024:.1f} -> {len(data) / 1024:.1f} KB")
+        if args.apply:
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(path + '.tmp', path)
+            saved += current - len(data)
+    if args.apply:
+        print(f"✨ {saved / 1024:.1f} KB menos")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
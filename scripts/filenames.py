@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+One parser for every image file name the scripts read or write.
+
+Two grammars, both parsed right to left with str.rpartition / rstrip /
+endswith, so the cost is linear in the length of the name with no
+backtracking (the old `^(.+?)-?(\\d+)\\.(jpg|jpeg|png|webp)$` needed a
+len > 255 guard against ReDoS; this does not):
+
+    source  (raw_batch, raw_images)   {slug}[-]{N}.{jpg|jpeg|png|webp}
+            "mini-poker1.jpg", "black-dragon-2.PNG"; N is required
+    output  (optimized_batch, bucket)  {slug}[-{N}][-mobile][-{W}w][.{version}][-min].webp
+            "black-dragon-2-min.webp", "feather-mobile-720w.webp",
+            "minipoker.3fa2c91d0e-min.webp"; N is a single digit 2-9 (slot 1 has no suffix),
+            version is the 10-hex content hash of watch_raw / run_jobs
+
+    from filenames import parse_source, parse_output, output_name
+    parse_output('black-dragon-2-min.webp')
+    # ImageName(slug='black-dragon', index=2, mobile=False, width=None, version=None, thumb=True, ext='webp')
+    output_name('black-dragon', 2, thumb=True)   # 'black-dragon-2-min.webp'
+
+Differences with the old regex: leading zeros are dropped from the index
+("slug01.jpg" is slot 1 -> slug.webp, it used to write slug-01.webp), every
+trailing '-' is stripped from the slug, not at most two, and a name that
+would leave an empty slug ("-1.jpg") is rejected instead of writing ".webp".
+
+CLI:
+    python scripts/filenames.py fuzz [--count 200000] [--seed 1]   # corpus + random names vs the old regex
+    python scripts/filenames.py bench [--count 1000000]            # names/second, and linearity
+"""
+
+import sys
+import argparse
+from typing import NamedTuple, Optional
+
+SOURCE_EXTENSIONS = ('jpg', 'jpeg', 'png', 'webp')
+OUTPUT_EXTENSION = 'webp'
+DIGITS = '0123456789'
+HEX = frozenset('0123456789abcdef')
+VERSION_LENGTH = 10
+CORPUS_PATH = 'scripts/filenames_corpus.txt'
+
+
+class ImageName(NamedTuple):
+    slug: str
+    index: int = 1
+    mobile: bool = False
+    width: Optional[int] = None
+    version: Optional[str] = None
+    thumb: bool = False
+    ext: str = OUTPUT_EXTENSION
+
+
+def parse_source(filename):
+    """{slug}[-]{N}.{ext} -> ImageName, o None si no sigue el formato."""
+    stem, dot, ext = filename.rpartition('.')
+    ext = ext.lower()
+    if not dot or ext not in SOURCE_EXTENSIONS:
+        return None
+    head = stem.rstrip(DIGITS)
+    if len(head) == len(stem):
+        return None  # sin índice
+    if not head:
+        head = stem[:1]  # todo dígitos: el primero es el slug (como el regex: .+? toma al menos uno)
+    digits = stem[len(head):]
+    if not digits:
+        return None
+    slug = head.rstrip('-')
+    if not slug:
+        return None
+    return ImageName(slug, int(digits), False, None, None, False, ext)
+
+
+def parse_output(filename):
+    """{slug}[-N][-mobile][-{W}w][.{version}][-min].webp -> ImageName, o None si no es .webp."""
+    if not filename.endswith('.webp'):
+        return None
+    stem = filename[:-5]
+
+    thumb = stem.endswith('-min')
+    if thumb:
+        stem = stem[:-4]
+
+    version = None
+    base, dot, tail = stem.rpartition('.')
+    if dot and len(tail) == VERSION_LENGTH and HEX.issuperset(tail):
+        stem, version = base, tail
+
+    width = None
+    if stem.endswith('w'):
+        head = stem[:-1].rstrip(DIGITS)
+        if len(head) < len(stem) - 1 and head.endswith('-') and len(head) > 1:
+            width = int(stem[len(head):-1])
+            stem = head[:-1]
+
+    mobile = stem.endswith('-mobile') and len(stem) > 7
+    if mobile:
+        stem = stem[:-7]
+
+    index = 1
+    if len(stem) > 2 and stem[-2] == '-' and stem[-1] in '23456789':
+        index = ord(stem[-1]) - 48
+        stem = stem[:-2]
+
+    if not stem:
+        return None
+    return ImageName(stem, index, mobile, width, version, thumb)
+
+
+def output_name(slug, index=1, thumb=False, mobile=False, width=None, version=None):
+    """Inverso de parse_output: el slot 1 no lleva índice (slug.webp, slug-2.webp, slug-2-min.webp)."""
+    parts = [slug]
+    if index != 1:
+        parts.append(f"-{index}")
+    if mobile:
+        parts.append('-mobile')
+    if width:
+        parts.append(f"-{width}w")
+    if version:
+        parts.append(f".{version}")
+    if thumb:
+        parts.append('-min')
+    return ''.join(parts) + '.webp'
+
+
+def thumb_of(name):
+    """Nombre (o URL) del thumbnail de una imagen principal .webp: lo mismo que hace imageUtils en el frontend."""
+    return name[:-len('.webp')] + '-min.webp'
+
+
+# --- fuzz / bench ---
+
+def legacy_source(filename):
+    """El regex que usaban process_batch y process_hotfix, para comparar."""
+    import re
+
+    match = re.match(r'^(.+?)-?(\d+)\.(jpg|jpeg|png|webp)$', filename, re.IGNORECASE)
+    if not match:
+        return None
+    slug = match.group(1)
+    if slug.endswith('-'):
+        slug = slug[:-1]
+    return slug, match.group(2), match.group(3).lower()
+
+
+def random_names(count, seed):
+    import random
+
+    rng = random.Random(seed)
+    alphabet = 'ab-z019.-_ ÑéW²'
+    pieces = ['-', '--', '1', '2', '10', '01', '-min', '-mobile', '-720w', '.webp', '.jpg', '.JPEG', '.png',
+              '.3fa2c91d0e', 'min', 'mobile', 'w', '.', '']
+    for _ in range(count):
+        if rng.random() < 0.5:
+            name = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        else:
+            name = ''.join(rng.choice(pieces) for _ in range(rng.randint(1, 6)))
+        yield name + rng.choice(['.jpg', '.webp', '.png', '.jpeg', '.JPG', '', '.gif'])
+
+
+def check_source(name):
+    """Diferencias con el regex viejo que NO están documentadas arriba (lista vacía = OK)."""
+    ours, old = parse_source(name), legacy_source(name)
+    if old is not None:
+        slug, digits, ext = old
+        # Documentadas: slug vacío, todos los '-' finales, ceros a la izquierda; además '$' del regex
+        # acepta un '\n' final y rpartition no
+        old = None if name.endswith('\n') or not slug.rstrip('-') else (slug.rstrip('-'), int(digits), ext)
+    new = (ours.slug, ours.index, ours.ext) if ours else None
+    return [] if new == old else [f"{name!r}: nuevo {new}, viejo {old}"]
+
+
+def check_roundtrip(name):
+    parsed = parse_output(name)
+    if parsed is None:
+        return []
+    rebuilt = output_name(parsed.slug, parsed.index, parsed.thumb, parsed.mobile, parsed.width, parsed.version)
+    if parse_output(rebuilt) != parsed:
+        return [f"{name!r}: {parsed} -> {rebuilt!r} -> {parse_output(rebuilt)}"]
+    return []
+
+
+def fuzz(count, seed):
+    import os
+
+    corpus = []
+    if os.path.exists(CORPUS_PATH):
+        with open(CORPUS_PATH, encoding='utf-8') as f:
+            corpus = [line.rstrip('\n') for line in f if line.strip() and not line.startswith('#')]
+    for directory in ('optimized_batch', 'public/hero'):
+        if os.path.isdir(directory):
+            corpus += os.listdir(directory)
+
+    failures = []
+    names = 0
+    for name in list(corpus) + list(random_names(count, seed)):
+        names += 1
+        failures += check_source(name) + check_roundtrip(name)
+    # Salidas reales de process_batch: el thumbnail es thumb_of(principal), igual que en el frontend
+    for name in corpus:
+        parsed = parse_output(name)
+        if parsed and parsed.thumb and not (parsed.mobile or parsed.width or parsed.version):
+            if thumb_of(output_name(parsed.slug, parsed.index)) != name:
+                failures.append(f"{name!r}: thumb_of(output_name) no lo reconstruye")
+
+    print(f"🧪 {names} nombres ({len(corpus)} del corpus), {len(failures)} diferencia(s)")
+    for failure in failures[:20]:
+        print(f"   ❌ {failure}")
+    return 1 if failures else 0
+
+
+def bench(count):
+    import re
+    import time
+
+    legacy = re.compile(r'^(.+?)-?(\d+)\.(jpg|jpeg|png|webp)$', re.IGNORECASE)
+    sources = [f"producto-{i % 997}-nombre{i % 7 + 1}.jpg" for i in range(count)]
+    outputs = [output_name(f"producto-{i % 997}", i % 3 + 1, thumb=bool(i % 2)) for i in range(count)]
+
+    def rate(fn, names):
+        started = time.perf_counter()
+        for name in names:
+            fn(name)
+        return len(names) / (time.perf_counter() - started)
+
+    print(f"⏱️  {count} nombres")
+    print(f"   parse_source  {rate(parse_source, sources) / 1e6:6.2f} M/s")
+    print(f"   parse_output  {rate(parse_output, outputs) / 1e6:6.2f} M/s")
+    print(f"   regex viejo   {rate(legacy.match, sources) / 1e6:6.2f} M/s (solo match, sin armar el resultado)")
+
+    # Linealidad: nombres patológicos para el regex (muchos '-' y dígitos sin extensión válida)
+    print("   Nombre patológico ('a' + '-1' * n + '.gif'):")
+    for n in (1_000, 4_000, 16_000):
+        name = 'a' + '-1' * n + '.gif'
+        started = time.perf_counter()
+        parse_source(name)
+        ours = time.perf_counter() - started
+        started = time.perf_counter()
+        legacy.match(name)
+        old = time.perf_counter() - started
+        print(f"     {len(name):>6} chars: nuevo {ours * 1e6:8.1f} µs, regex {old * 1e3:9.2f} ms")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser de nombres de imagen: fuzz y benchmark")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('fuzz')
+    p.add_argument('--count', type=int, default=200_000)
+    p.add_argument('--seed', type=int, default=1)
+    p = sub.add_parser('bench')
+    p.add_argument('--count', type=int, default=1_000_000)
+    args = parser.parse_args()
+    if args.command == 'fuzz':
+        return fuzz(args.count, args.seed)
+    return bench(args.count)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
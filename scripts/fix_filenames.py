@@ -1,57 +1,240 @@
 import os
-import shutil
+import sys
+import uuid
+import argparse
+from collections import deque
 
 SOURCE_DIR = r'C:/Users/Facu elias/Desktop/Program/perlaNegra/raw_batch'
 
+# Tabla declarativa de correcciones: (patrón en minúsculas, reemplazo).
+# Agregar una fila acá en vez de otro `if ... in lower_name`.
+RENAME_RULES = [
+    # Sex-roulette-pary-game -> sex-roulette-party-game
+    ('sex-roulette-pary-game', 'sex-roulette-party-game'),
+    # diva-s-secret-effetto-stringente -> diva-s-secret-effetto-tightening
+    ('diva-s-secret-effetto-stringente', 'diva-s-secret-effetto-tightening'),
+    # petit-mortret-effetto-tightening: sospechoso, pero el usuario no lo mencionó. Se deja solo en minúsculas.
+]
+
+
+class RuleMatcher:
+    """Aho-Corasick sobre RENAME_RULES: todas las reglas en una sola pasada por nombre."""
+
+    def __init__(self, rules):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [None]  # (largo del patrón, reemplazo) más largo que termina en este estado
+
+        for pattern, replacement in rules:
+            if not pattern:
+                raise ValueError("Regla con patrón vacío")
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(None)
+                state = nxt
+            self.out[state] = (len(pattern), replacement)
+
+        # BFS para links de fallo; cada estado hereda la salida de su sufijo si no tiene propia
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                if state:
+                    f = self.fail[state]
+                    while f and ch not in self.goto[f]:
+                        f = self.fail[f]
+                    self.fail[nxt] = self.goto[f].get(ch, 0)
+                if self.out[nxt] is None:
+                    self.out[nxt] = self.out[self.fail[nxt]]
+
+    def apply(self, text):
+        """Reemplaza coincidencias no solapadas, de izquierda a derecha, en una sola pasada."""
+        result = []
+        last = 0
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            hit = self.out[state]
+            if hit:
+                length, replacement = hit
+                start = i + 1 - length
+                if start >= last:
+                    result.append(text[last:start])
+                    result.append(replacement)
+                    last = i + 1
+                    state = 0
+        result.append(text[last:])
+        return ''.join(result)
+
+
+MATCHER = RuleMatcher(RENAME_RULES)
+
+
 def normalize_name(filename):
     # Separa nombre y extensión
     name, ext = os.path.splitext(filename)
-    
-    # 1. Correcciones específicas
-    # Nota: .lower() se aplica al final, así que detectamos patrones sin importar case
-    lower_name = name.lower()
-    
-    # Sex-roulette-pary-game -> sex-roulette-party-game
-    if 'sex-roulette-pary-game' in lower_name:
-        lower_name = lower_name.replace('sex-roulette-pary-game', 'sex-roulette-party-game')
-        
-    # diva-s-secret-effetto-stringente -> diva-s-secret-effetto-tightening
-    if 'diva-s-secret-effetto-stringente' in lower_name:
-        lower_name = lower_name.replace('diva-s-secret-effetto-stringente', 'diva-s-secret-effetto-tightening')
 
-    # petit-mortret-effetto-tightening -> diva-s-secret-effetto-tightening (Asumiendo error de copiado, si no lo ignoro)
-    # El usuario no lo mencionó explícitamente, pero es sospechoso. Lo dejaré solo en minúsculas por ahora si no coincide.
-    
-    return lower_name + ext.lower()
+    # Las reglas están en minúsculas, así que detectamos patrones sin importar case
+    return MATCHER.apply(name.lower()) + ext.lower()
+
+
+def plan_renames(files, overwrite=False):
+    """
+    Construye el grafo completo de renombres antes de tocar el disco.
+    Devuelve (moves, conflicts): moves = [(old, new)], conflicts = [(old, new, motivo)].
+    """
+    # Comparación case-insensitive: en Windows "A.jpg" y "a.jpg" son el mismo archivo
+    existing = {f.lower(): f for f in files}
+
+    targets = {}
+    for filename in sorted(files):
+        new_filename = normalize_name(filename)
+        if new_filename != filename:
+            targets.setdefault(new_filename.lower(), []).append((filename, new_filename))
+
+    conflicts = []
+    blocked = set()
+    candidates = {}
+    for entries in targets.values():
+        if len(entries) > 1:
+            for old, new in entries:
+                others = ', '.join(o for o, _ in entries if o != old)
+                conflicts.append((old, new, f"mismo destino que {others}"))
+                blocked.add(old)
+        else:
+            old, new = entries[0]
+            candidates[old] = new
+
+    # Un destino ocupado solo se libera si su dueño también se mueve; iterar hasta estabilizar
+    changed = True
+    while changed:
+        changed = False
+        for old, new in list(candidates.items()):
+            holder = existing.get(new.lower())
+            if not holder or holder == old or holder in candidates:
+                continue
+            if overwrite and holder not in blocked:
+                continue
+            del candidates[old]
+            conflicts.append((old, new, f"{holder} ya existe"))
+            blocked.add(old)
+            changed = True
+
+    moves = sorted(candidates.items())
+    return moves, conflicts
+
+
+def find_cycles(moves):
+    """Detecta ciclos (a -> b, b -> a). Se resuelven igual gracias al paso por nombres temporales."""
+    graph = {old.lower(): new.lower() for old, new in moves}
+    cycles = []
+    seen = set()
+    for start in graph:
+        if start in seen:
+            continue
+        path = []
+        node = start
+        while node in graph and node not in seen:
+            seen.add(node)
+            path.append(node)
+            node = graph[node]
+        # Un ciclo de largo 1 es solo un cambio de mayúsculas del mismo archivo
+        if node in path and len(path) - path.index(node) > 1:
+            cycles.append(path[path.index(node):])
+    return cycles
+
+
+def execute_plan(directory, moves, overwrite=False):
+    """
+    Renombra en dos fases (origen -> temporal -> destino) para que ciclos y cambios
+    de mayúsculas no se pisen. Si algo falla, deshace lo ya hecho.
+    """
+    token = uuid.uuid4().hex[:8]
+    staged = []   # (temp, old)
+    done = []     # (new, temp)
+    replaced = []  # (new, backup) destinos reemplazados con --overwrite
+
+    try:
+        for i, (old, new) in enumerate(moves):
+            temp = f".rename-{token}-{i}.tmp"
+            os.rename(os.path.join(directory, old), os.path.join(directory, temp))
+            staged.append((temp, old))
+
+        targets = dict(moves)
+        for temp, old in staged:
+            new = targets[old]
+            new_path = os.path.join(directory, new)
+            if os.path.exists(new_path) and overwrite:
+                backup = f".rename-{token}-{new}.bak"
+                os.rename(new_path, os.path.join(directory, backup))
+                replaced.append((new, backup))
+            os.rename(os.path.join(directory, temp), new_path)
+            done.append((new, temp))
+    except OSError as e:
+        print(f"❌ Error renombrando, revirtiendo cambios: {e}")
+        for new, temp in reversed(done):
+            os.rename(os.path.join(directory, new), os.path.join(directory, temp))
+        for new, backup in reversed(replaced):
+            os.rename(os.path.join(directory, backup), os.path.join(directory, new))
+        for temp, old in reversed(staged):
+            os.rename(os.path.join(directory, temp), os.path.join(directory, old))
+        return False
+
+    for _, backup in replaced:
+        os.remove(os.path.join(directory, backup))
+    return True
+
 
 def main():
-    print(f"🔧 Renombrando archivos en: {SOURCE_DIR}")
-    
-    if not os.path.exists(SOURCE_DIR):
+    parser = argparse.ArgumentParser(description="Normaliza nombres de archivos en una sola pasada.")
+    parser.add_argument('directory', nargs='?', default=SOURCE_DIR)
+    parser.add_argument('--dry-run', action='store_true', help="Mostrar el diff sin renombrar nada")
+    parser.add_argument('--overwrite', action='store_true', help="Reemplazar destinos que ya existen")
+    args = parser.parse_args()
+
+    directory = args.directory
+    print(f"🔧 Renombrando archivos en: {directory}")
+
+    if not os.path.exists(directory):
         print("❌ Carpeta no encontrada.")
-        return
-
-    files = os.listdir(SOURCE_DIR)
-    count = 0
-    
-    for filename in files:
-        old_path = os.path.join(SOURCE_DIR, filename)
-        if not os.path.isfile(old_path): continue
-        
-        new_filename = normalize_name(filename)
-        new_path = os.path.join(SOURCE_DIR, new_filename)
-        
-        if old_path != new_path:
-            # Check collision (si ya existe sex-roulette-party-game y renombramos el pary-game a ese mismo)
-            if os.path.exists(new_path):
-                print(f"⚠️ Conflicto: {new_filename} ya existe. Sobrescribiendo/Fusionando...")
-                os.remove(new_path) # Eliminar el destino para reemlazarlo con este (o viceversa, depende de cual sea el 'bueno'. Asumimos que queremos renombrar este).
-                
-            os.rename(old_path, new_path)
-            print(f"✅ Renamed: {filename} -> {new_filename}")
-            count += 1
-            
-    print(f"✨ Completado. {count} archivos renombrados.")
+        return 1
+
+    files = [f for f in os.listdir(directory) if os.path.isfile(os.path.join(directory, f))]
+    moves, conflicts = plan_renames(files, overwrite=args.overwrite)
+
+    for old, new, reason in conflicts:
+        print(f"⚠️ Conflicto: {old} -> {new} ({reason}). Se omite.")
+
+    for cycle in find_cycles(moves):
+        print(f"🔁 Ciclo detectado: {' -> '.join(cycle)} (se resuelve con nombres temporales)")
+
+    for old, new in moves:
+        print(f"- {old}")
+        print(f"+ {new}")
+
+    if args.dry_run:
+        print(f"\n📝 Dry run: {len(moves)} renombres planificados, {len(conflicts)} conflictos.")
+        return 0
+
+    if not moves:
+        print("✨ Nada para renombrar.")
+        return 0
+
+    if not execute_plan(directory, moves, overwrite=args.overwrite):
+        return 1
+
+    print(f"✨ Completado. {len(moves)} archivos renombrados.")
+    return 0
+
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Blue/green releases of the product image catalog.
+
+upload_batch used to empty the live bucket and re-upload and relink product by
+product, so the storefront showed broken images for the whole run. A release
+never touches what is live until it is complete:
+
+1. publish   check the byte budgets (page_budget.py), upload optimized_batch/
+             under releases/<id>/ and store the manifest
+             ({slug: {"1": url, "2": url, "3": url}}) in image_releases
+2. verify    HEAD every main image and thumbnail of the manifest through the
+             public URL (status, content type, size vs the local file)
+3. activate  one RPC, activate_image_release(): every image_url / image2_url /
+             image3_url of the manifest changes in a single transaction; a
+             slot the batch doesn't have is left as it is
+             (src/migrations/20261019_image_releases.sql)
+
+The URLs it replaced are saved on the release, so `rollback` restores them in
+one transaction too (only the slots still pointing at the release: a later
+watch_raw / run_jobs publish is kept). `gc` retires releases older than the
+KEEP_RELEASES newest (never the active one nor KEEP_RELEASES steps of its
+rollback chain) and deletes the objects under releases/ that nothing
+references any more: products still linked to an older, partial release keep
+their images. Rolling back to a release gc retired is refused by the RPC.
+
+Usage:
+    python scripts/image_release.py release [directory] [--skip-budget]   # publish + verify + activate
+    python scripts/image_release.py publish [directory] | verify <id> | activate <id>
+    python scripts/image_release.py rollback | status | gc [--keep 2] [--dry-run]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+from filenames import thumb_of
+from supabase_config import credentials, rest_headers
+
+RELEASE_PREFIX = 'releases'
+KEEP_RELEASES = 2
+LIST_PAGE = 1000
+DELETE_CHUNK = 100
+
+
+def release_prefix(release_id):
+    return f"{RELEASE_PREFIX}/{release_id}/"
+
+
+def rest(method, path, **kwargs):
+    """Llamada a PostgREST con la sesión compartida; el HTTPError lleva el mensaje de Postgres."""
+    from rate_control import request_with_retry
+    from upload_batch import LIMITER, session
+
+    supabase_url, _ = credentials()
+    headers = rest_headers(json_body='json' in kwargs, representation=method in ('POST', 'PATCH'))
+    r = request_with_retry(method, f"{supabase_url}/rest/v1/{path}", limiter=LIMITER, session=session(),
+                           headers=headers, **kwargs)
+    if r.status_code >= 400:
+        try:
+            r.reason = f"{r.reason}: {r.json().get('message')}"
+        except ValueError:
+            pass
+    r.raise_for_status()
+    return r.json() if r.content else None
+
+
+def get_release(release_id):
+    rows = rest('GET', 'image_releases', params={'id': f"eq.{release_id}"})
+    if not rows:
+        raise LookupError(f"release {release_id} no existe")
+    return rows[0]
+
+
+# --- pasos ---
+
+def publish(directory, release_id=None, skip_budget=False):
+    """Sube directory a releases/<id>/ y registra el manifest. Devuelve el id (None si falló algo)."""
+    from page_budget import check
+    from rate_control import run_concurrent
+    from upload_batch import LIMITER, group_by_slot, public_url, upload_file
+
+    if not skip_budget and not check(directory):
+        print("🛑 Release no publicado: imágenes fuera de budget (--skip-budget para subirlo igual)")
+        return None
+    release_id = release_id or time.strftime('%Y%m%d-%H%M%S')
+    prefix = release_prefix(release_id)
+    files = sorted(f for f in os.listdir(directory) if f.endswith('.webp'))
+    print(f"📦 Release {release_id}: {len(files)} archivos -> {prefix}")
+
+    results = run_concurrent(files, lambda f: upload_file(f, directory, prefix), LIMITER)
+    failed = [f for f, ok in zip(files, results) if not ok]
+    if failed:
+        print(f"❌ {len(failed)} archivo(s) sin subir, el release no se registra: {', '.join(failed[:5])}")
+        return None
+
+    manifest = {slug: {str(idx): public_url(prefix + filename) for idx, filename in sorted(slots.items())}
+                for slug, slots in group_by_slot(files).items()}
+    rest('POST', 'image_releases', json={'id': release_id, 'status': 'uploaded', 'manifest': manifest})
+    print(f"📝 Manifest: {len(manifest)} productos")
+    return release_id
+
+
+def verify(release_id, directory=None):
+    """HEAD de cada imagen y thumbnail del manifest. Marca el release como verified si está todo."""
+    from rate_control import request_with_retry, run_concurrent
+    from upload_batch import LIMITER, session
+    from products_snapshot import open_snapshot
+
+    release = get_release(release_id)
+    prefix = release_prefix(release_id)
+    urls = []
+    for slots in release['manifest'].values():
+        for url in slots.values():
+            urls += [url, thumb_of(url)]
+
+    def check(url):
+        try:
+            r = request_with_retry('HEAD', url, limiter=LIMITER, session=session())
+        except Exception as e:
+            return f"{url}: {e}"
+        if r.status_code != 200:
+            return f"{url}: HTTP {r.status_code}"
+        if not r.headers.get('Content-Type', '').startswith('image/webp'):
+            return f"{url}: Content-Type {r.headers.get('Content-Type')}"
+        if directory:
+            local = os.path.join(directory, url.rsplit(prefix, 1)[-1])
+            size = r.headers.get('Content-Length')
+            if os.path.exists(local) and size is not None and int(size) != os.path.getsize(local):
+                return f"{url}: {size} bytes en el bucket, {os.path.getsize(local)} en local"
+        return None
+
+    problems = [p for p in run_concurrent(urls, check, LIMITER) if p]
+    supabase_url, supabase_key = credentials()
+    snapshot = open_snapshot(supabase_url, supabase_key)
+    unknown = sorted(set(release['manifest']) - set(snapshot.slugs()))
+    snapshot.close()
+
+    print(f"🔍 Release {release_id}: {len(urls) - len(problems)}/{len(urls)} objetos OK")
+    for problem in problems[:20]:
+        print(f"   ❌ {problem}")
+    if unknown:
+        # No bloquea: activate solo toca los slugs que existen
+        print(f"   ⚠️ {len(unknown)} slug(s) sin producto en la DB: {', '.join(unknown[:10])}")
+    if problems:
+        return False
+    if release['status'] == 'uploaded':  # re-verificar un release activo/retirado no le cambia el estado
+        rest('PATCH', 'image_releases', params={'id': f"eq.{release_id}"},
+             json={'status': 'verified', 'verified_at': time.strftime('%Y-%m-%dT%H:%M:%S%z')})
+    return True
+
+
+def activate(release_id):
+    count = rest('POST', 'rpc/activate_image_release', json={'p_release': release_id})
+    print(f"🟢 Release {release_id} activo: {count} productos apuntan a {release_prefix(release_id)}")
+    return count
+
+
+def rollback():
+    restored = rest('POST', 'rpc/rollback_image_release', json={})
+    print(f"⏪ Rollback hecho; activo: {restored or 'URLs previas a los releases'}")
+    return restored
+
+
+def release(directory, release_id=None, skip_budget=False):
+    """publish + verify + activate. El catálogo en vivo no cambia hasta el último paso."""
+    started = time.monotonic()
+    release_id = publish(directory, release_id, skip_budget)
+    if not release_id:
+        return None
+    if not verify(release_id, directory):
+        print(f"🛑 Release {release_id} no verificado: el catálogo en vivo no cambió")
+        return None
+    activate(release_id)
+    print(f"✨ Release {release_id} publicado en {time.monotonic() - started:.1f}s (rollback: image_release.py rollback)")
+    return release_id
+
+
+# --- mantenimiento ---
+
+def list_releases():
+    return rest('GET', 'image_releases', params={
+        'select': 'id,status,created_at,verified_at,activated_at,replaced_release', 'order': 'created_at.desc'})
+
+
+def list_objects(prefix, metadata=False):
+    """Nombres bajo prefix; con metadata=True, {nombre: metadata} (None en las subcarpetas)."""
+    from upload_batch import BUCKET_NAME, session
+
+    supabase_url, _ = credentials()
+    found, offset = {}, 0
+    while True:
+        r = session().post(f"{supabase_url}/storage/v1/object/list/{BUCKET_NAME}", headers=rest_headers(),
+                           json={"prefix": prefix.rstrip('/'), "limit": LIST_PAGE, "offset": offset})
+        r.raise_for_status()
+        page = r.json()
+        found.update((prefix + obj['name'], obj.get('metadata')) for obj in page if obj.get('name'))
+        if len(page) < LIST_PAGE:
+            return found if metadata else list(found)
+        offset += LIST_PAGE
+
+
+def referenced_objects(releases):
+    """
+    Objetos del bucket que algo todavía usa: las URLs actuales de products (cada batch es parcial,
+    así que un producto puede seguir en un release viejo), el manifest y el previous de releases.
+    Cada uno con su thumbnail.
+    """
+    from products_snapshot import open_snapshot
+    from upload_batch import public_url
+
+    base = public_url('')
+    urls = []
+    snapshot = open_snapshot(*credentials())
+    for product in snapshot.all(['image_url', 'image2_url', 'image3_url']):
+        urls += product.values()
+    snapshot.close()
+    for r in releases:
+        for field in ('manifest', 'previous'):
+            for slots in (r.get(field) or {}).values():
+                urls += (slots or {}).values()
+
+    names = {url[len(base):].split('?', 1)[0] for url in urls if url and url.startswith(base)}
+    return names | {thumb_of(name) for name in names}
+
+
+def gc(keep=KEEP_RELEASES, dry_run=False):
+    """
+    Borra los objetos de releases/ que ya nadie referencia. Los releases que dejan de ser
+    candidatos (ni de los keep más nuevos, ni el activo, ni keep pasos de su cadena de
+    rollback: activo -> replaced_release -> ...) se marcan 'deleted', así activate y rollback
+    los rechazan; sus objetos que products todavía usa se quedan en el bucket.
+    """
+    from upload_batch import BUCKET_NAME, session
+
+    releases = list_releases()
+    live = [r for r in releases if r['status'] != 'deleted']
+    by_id = {r['id']: r for r in live}
+    active = next((r for r in live if r['status'] == 'active'), None)
+    protected = {r['id'] for r in live[:keep]}
+    chain = active
+    for _ in range(keep + 1):
+        if chain is None:
+            break
+        protected.add(chain['id'])
+        chain = by_id.get(chain.get('replaced_release'))
+    doomed = [r for r in live if r['id'] not in protected]
+
+    # list_releases no trae manifest/previous: hacen falta los de los releases que siguen vivos
+    kept = rest('GET', 'image_releases', params={
+        'select': 'id,manifest,previous', 'id': "in.(" + ','.join(f'"{i}"' for i in sorted(protected)) + ")"}) if protected else []
+    in_use = referenced_objects(kept)
+
+    supabase_url, _ = credentials()
+    deleted = 0
+    # Los ya 'deleted' también: pueden tener objetos que products dejó de usar desde el último gc
+    for r in releases:
+        if r['id'] in protected:
+            continue
+        names = list_objects(release_prefix(r['id']))
+        unused = [name for name in names if name not in in_use]
+        if r['status'] == 'deleted' and not unused:
+            continue
+        print(f"🗑️ {r['id']} ({r['status']}): {len(unused)} objetos, {len(names) - len(unused)} en uso"
+              + (" [dry-run]" if dry_run else ""))
+        if dry_run:
+            continue
+        for i in range(0, len(unused), DELETE_CHUNK):
+            d = session().delete(f"{supabase_url}/storage/v1/object/{BUCKET_NAME}", headers=rest_headers(),
+                                 json={"prefixes": unused[i:i + DELETE_CHUNK]})
+            d.raise_for_status()
+        deleted += len(unused)
+        if r['status'] != 'deleted':
+            rest('PATCH', 'image_releases', params={'id': f"eq.{r['id']}"}, json={'status': 'deleted'})
+    if not doomed and not deleted:
+        print(f"🧹 Nada para borrar ({len(live)} release(s), se conservan {keep} + activo + {keep} de rollback)")
+    return deleted
+
+
+def status():
+    releases = list_releases()
+    if not releases:
+        print("Sin releases todavía (el catálogo apunta a los objetos sueltos del bucket).")
+        return
+    print(f"   {'Release':<18} {'Estado':<9} {'Creado':<20} {'Activado':<20} Reemplazó")
+    for r in releases:
+        print(f"   {r['id']:<18} {r['status']:<9} {(r.get('created_at') or '')[:19]:<20} "
+              f"{(r.get('activated_at') or '-')[:19]:<20} {r.get('replaced_release') or '-'}")
+
+
+def main():
+    from upload_batch import OPTIMIZED_DIR
+
+    parser = argparse.ArgumentParser(description="Releases blue/green del catálogo de imágenes")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name in ('release', 'publish'):
+        p = sub.add_parser(name)
+        p.add_argument('directory', nargs='?', default=OPTIMIZED_DIR)
+        p.add_argument('--id', default=None, help="Id del release (default: fecha y hora)")
+        p.add_argument('--skip-budget', action='store_true', help="Subir aunque page_budget.py marque excesos")
+    for name in ('verify', 'activate'):
+        p = sub.add_parser(name)
+        p.add_argument('release_id')
+        if name == 'verify':
+            p.add_argument('--directory', default=None, help="Comparar tamaños con los archivos locales")
+    sub.add_parser('rollback')
+    sub.add_parser('status')
+    p = sub.add_parser('gc')
+    p.add_argument('--keep', type=int, default=KEEP_RELEASES, help="Releases más nuevos a conservar")
+    p.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    credentials(warn_anon=True)
+    try:
+        if args.command == 'release':
+            return 0 if release(args.directory, args.id, args.skip_budget) else 1
+        if args.command == 'publish':
+            return 0 if publish(args.directory, args.id, args.skip_budget) else 1
+        if args.command == 'verify':
+            return 0 if verify(args.release_id, args.directory) else 1
+        if args.command == 'activate':
+            activate(args.release_id)
+        elif args.command == 'rollback':
+            rollback()
+        elif args.command == 'gc':
+            gc(args.keep, args.dry_run)
+        else:
+            status()
+    except Exception as e:
+        print(f"❌ {args.command}: {e}")
+        return 1
+    return 0
+
+
+def relink_main():
+    """`perla.py relink <id>`: alias de activate, re-linkea products a un release ya verificado."""
+    sys.argv = [sys.argv[0], 'activate', *sys.argv[1:]]
+    return main()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
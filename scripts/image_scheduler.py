@@ -0,0 +1,209 @@
+"""
+Memory-aware scheduling for image batches.
+
+plan_decode() reads only the header of each source (Image.open is lazy) and
+picks how to decode it and what it will cost in RAM:
+
+- full    small enough: plain decode
+- draft   JPEG: DCT-domain downscale (1/2, 1/4, 1/8) while decoding, never
+          below the size the pipeline needs, so a 50MP photo decodes as ~3MP
+- vips    non-JPEG too big for the budget: pyvips shrink-on-load streams the
+          file in strips. pyvips is optional and not installed with the
+          scripts (pip install pyvips, plus libvips)
+- reduce  the fallback without pyvips. It is NOT a tiled decode: Pillow
+          decodes the whole image once and it is immediately reduce()d, so
+          the full-size copy never coexists with the normalize/trim/resize
+          copies; the plan's cost counts that full decode
+
+"The size the pipeline needs" is measured after trim: with a `coverage`
+callback (process_batch.trim_coverage) the target is divided by the
+fraction of the frame the product covers, read from a PREVIEW_SIZE preview
+(1/8 JPEG draft, pyvips thumbnail, or a reduce() of the decode already in
+memory). A tightly cropped product is then decoded large enough that the
+trimmed crop still reaches the target instead of being upscaled.
+
+MemoryScheduler then runs the jobs in a process pool, admitting each one only
+while the sum of estimated costs in flight fits the budget: largest jobs first,
+small ones fill the gaps. A job bigger than the whole budget runs alone.
+"""
+
+import io
+import os
+import math
+
+from PIL import Image, ImageOps
+
+try:
+    import pyvips
+except (ImportError, OSError):
+    pyvips = None
+
+# Pillow guarda RGB/RGBA/CMYK con 4 bytes por pixel
+BYTES_PER_PIXEL = {'1': 1, 'L': 1, 'P': 1, 'LA': 4, 'PA': 4, 'I;16': 2, 'I': 4, 'F': 4}
+PEAK_FACTOR = 3.0                       # decode + normalize + copia para resize/thumbnail vivos a la vez
+WORKER_OVERHEAD = 40 * 1024 * 1024      # intérprete + Pillow + codecs por proceso
+OVERSIZED_FRACTION = 0.5                # más de esto del budget en decode completo -> vips/reduce
+DEFAULT_BUDGET_MB = 2048
+PREVIEW_SIZE = 256                      # lado de la vista previa para medir el producto (trim)
+MIN_COVERAGE = 1 / 8                    # producto más chico que esto del cuadro: no agrandar más el decode
+
+
+def available_memory():
+    """MemAvailable en Linux; None si no se puede saber."""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def default_budget():
+    available = available_memory()
+    return int(available * 0.6) if available else DEFAULT_BUDGET_MB * 1024 * 1024
+
+
+def draft_scale(size, target):
+    """Escala que JpegImagePlugin.draft() va a elegir para pedir al menos target x target."""
+    width, height = size
+    scale = min(width // target, height // target)
+    for candidate in (8, 4, 2, 1):
+        if scale >= candidate:
+            return candidate
+    return 1
+
+
+def scaled_target(target, fraction, size):
+    """target para que un recorte de `fraction` del cuadro llegue a target, sin pasar del original."""
+    fraction = max(MIN_COVERAGE, min(1.0, fraction))
+    return min(min(size), math.ceil(target / fraction))
+
+
+def preview(path, strategy):
+    """Vista previa RGB de ~PREVIEW_SIZE sin decodificar el original completo (draft / vips)."""
+    if strategy == 'vips':
+        thumb = pyvips.Image.thumbnail(path, PREVIEW_SIZE, height=PREVIEW_SIZE, size='down')
+        return Image.open(io.BytesIO(thumb.write_to_buffer('.tif', compression='none'))).convert('RGB')
+    with Image.open(path) as img:
+        img.draft(img.mode, (PREVIEW_SIZE, PREVIEW_SIZE))
+        return ImageOps.exif_transpose(img).convert('RGB')
+
+
+def content_target(path, strategy, target, coverage, size):
+    """target ajustado por lo que ocupa el producto (coverage(vista previa) -> fracción del cuadro)."""
+    return scaled_target(target, coverage(preview(path, strategy)), size)
+
+
+def plan_decode(path, budget, target, coverage=None):
+    """
+    Lee el header y devuelve el plan de decode con su costo estimado en bytes. Con coverage, una
+    fuente que se decodifica achicada (draft / vips) también paga una vista previa chica para
+    saber cuánto ocupa el producto y agrandar el target en la misma proporción (plan['target']).
+    """
+    with Image.open(path) as img:
+        fmt, mode, (width, height) = img.format, img.mode, img.size
+
+    full_pixels = width * height
+    plan = {'path': path, 'format': fmt, 'size': (width, height), 'megapixels': full_pixels / 1e6}
+
+    if fmt == 'JPEG':
+        if coverage and draft_scale((width, height), target) > 1:
+            target = content_target(path, 'draft', target, coverage, (width, height))
+        scale = draft_scale((width, height), target)
+        pixels = math.ceil(width / scale) * math.ceil(height / scale)
+        plan['strategy'] = 'draft' if scale > 1 else 'full'
+        plan['cost'] = pixels * 4 * PEAK_FACTOR
+    else:
+        plan['strategy'] = 'full'
+        plan['cost'] = full_pixels * 4 * PEAK_FACTOR
+        if plan['cost'] > budget * OVERSIZED_FRACTION:
+            if pyvips is not None and coverage:
+                target = content_target(path, 'vips', target, coverage, (width, height))
+            factor = max(1, min(width, height) // target)
+            reduced = (width // factor) * (height // factor)
+            if pyvips is not None:
+                plan['strategy'] = 'vips'
+                plan['cost'] = reduced * 4 * PEAK_FACTOR
+            else:
+                plan['strategy'] = 'reduce'
+                full_decode = full_pixels * BYTES_PER_PIXEL.get(mode, 4)
+                plan['cost'] = max(full_decode + reduced * 4, reduced * 4 * PEAK_FACTOR)
+    plan['cost'] = int(plan['cost'] + WORKER_OVERHEAD)
+    plan['target'] = target
+    return plan
+
+
+def open_planned(path, strategy='full', target=None, coverage=None):
+    """
+    Abre path según el plan. Devuelve una imagen de Pillow (EXIF/ICC intactos para normalize_image).
+    coverage: el mismo callback que plan_decode, para que el target salga igual que en el plan.
+    """
+    if coverage and strategy in ('draft', 'vips'):
+        with Image.open(path) as probe:
+            size = probe.size
+        target = content_target(path, strategy, target, coverage, size)
+
+    if strategy == 'vips':
+        # thumbnail() = shrink-on-load en streaming; rota por EXIF y pasa a sRGB
+        thumb = pyvips.Image.thumbnail(path, target, height=target, size='down', export_profile='srgb')
+        return Image.open(io.BytesIO(thumb.write_to_buffer('.tif', compression='none')))
+
+    img = Image.open(path)
+    if strategy == 'draft':
+        img.draft(img.mode, (target, target))
+    elif strategy == 'reduce':
+        img.load()
+        if coverage:
+            # El decode completo ya está en memoria: la vista previa sale de ahí
+            small = img.reduce(max(1, min(img.size) // PREVIEW_SIZE))
+            target = scaled_target(target, coverage(ImageOps.exif_transpose(small).convert('RGB')), img.size)
+        factor = max(1, min(img.size) // target)
+        if factor > 1:
+            reduced = img.reduce(factor)
+            img.close()
+            img = reduced
+    return img
+
+
+class MemoryScheduler:
+    def __init__(self, budget=None, max_workers=None):
+        self.budget = budget or default_budget()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.stats = {'peak_reserved': 0, 'peak_in_flight': 0, 'solo_oversized': 0}
+
+    def run(self, jobs, fn, *args):
+        """
+        Ejecuta fn(job['path'], *args, strategy=job['strategy']) por job en un process pool.
+        Genera (job, resultado, excepción) a medida que terminan.
+        """
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+        # priority (opcional, menor primero: ranking de access_log.py) y después los más caros primero
+        pending = sorted(jobs, key=lambda j: (j.get('priority', 0), -j['cost']))
+        in_flight = {}
+        reserved = 0
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or in_flight:
+                # First-fit sobre la lista ordenada por costo: los grandes arrancan primero, los chicos rellenan
+                i = 0
+                while i < len(pending) and len(in_flight) < self.max_workers:
+                    job = pending[i]
+                    if reserved + job['cost'] <= self.budget or not in_flight:
+                        if job['cost'] > self.budget:
+                            self.stats['solo_oversized'] += 1
+                        in_flight[pool.submit(fn, job['path'], *args, strategy=job['strategy'])] = job
+                        reserved += job['cost']
+                        pending.pop(i)
+                    else:
+                        i += 1
+                self.stats['peak_reserved'] = max(self.stats['peak_reserved'], reserved)
+                self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], len(in_flight))
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    reserved -= job['cost']
+                    error = future.exception()
+                    yield job, (None if error else future.result()), error
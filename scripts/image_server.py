@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Local on-demand image renditions, for development, QA and srcset benchmarks.
+
+Previewing a new width or quality meant re-running the whole batch. This
+serves any rendition of a source on request, built with the same code as
+process_batch (prepare: decode + normalize + trim, resize_to_width,
+save_webp / encode_mode):
+
+    GET /{slug}?w=640&q=80&fmt=webp     fmt: webp | avif | jpeg | auto (Accept)
+    GET /{slug}?i=2                     second image of the product
+    GET /_stats                         hits, misses, coalesced, hit rate, cache size
+
+Sources are looked up by slug and index in --source (raw jpg/png first,
+then optimized .webp mains). Without w the width is the production main
+(TARGET_WIDTH_MAIN); widths are never upscaled.
+
+Renditions are rendered in a process pool and kept in a size-bounded LRU
+disk cache (--cache-mb). The key includes the source's mtime and size, so
+editing a source invalidates its renditions. Concurrent requests for the
+same rendition are coalesced into one render. Responses carry X-Cache
+(HIT / MISS / COALESCED) and an ETag, like a CDN image transformer would.
+
+Usage:
+    python scripts/image_server.py [--source optimized_batch] [--port 8090] [--cache-mb 256] [--workers N]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from filenames import parse_output, parse_source
+
+DEFAULT_PORT = 8090
+CACHE_DIR = '.image_server_cache'
+CACHE_MB = 256
+FORMATS = {'webp': 'image/webp', 'avif': 'image/avif', 'jpeg': 'image/jpeg'}
+MIN_WIDTH, MAX_WIDTH = 16, 4096
+RESCAN_INTERVAL = 2.0  # segundos mínimos entre re-escaneos de --source por un slug desconocido
+
+
+def render_rendition(source, strategy, width, quality, fmt, out_path):
+    """Rendition de source como en process_batch, escrita en out_path. Corre en el pool de procesos."""
+    from encode_mode import encode
+    from process_batch import TARGET_WIDTH_MAIN, prepare, resize_to_width
+
+    img = prepare(source, strategy)
+    img = resize_to_width(img, min(width or TARGET_WIDTH_MAIN, img.width))
+    if fmt == 'webp':
+        data, _ = encode(img, quality)
+    else:
+        buffer = io.BytesIO()
+        if fmt == 'avif':
+            img.save(buffer, 'AVIF', quality=quality)
+        else:
+            img.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+        data = buffer.getvalue()
+    with open(out_path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(out_path + '.tmp', out_path)
+    return len(data)
+
+
+class SourceIndex:
+    """(slug, índice) -> archivo fuente en directory; se re-escanea cuando piden un slug que no está."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.sources = {}
+        self.scanned_at = 0
+        self.scan()
+
+    def scan(self):
+        sources = {}
+        for name in sorted(os.listdir(self.directory)) if os.path.isdir(self.directory) else []:
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                parsed = parse_source(name)
+                if parsed:
+                    sources[(parsed.slug, parsed.index)] = name  # la fuente cruda gana
+            elif name.endswith('.webp'):
+                parsed = parse_output(name)
+                if parsed and not (parsed.thumb or parsed.mobile or parsed.width):
+                    sources.setdefault((parsed.slug, parsed.index), name)
+        self.sources = sources
+        self.scanned_at = time.monotonic()
+
+    def find(self, slug, index=1):
+        with self.lock:
+            name = self.sources.get((slug, index))
+            if name is None and time.monotonic() - self.scanned_at > RESCAN_INTERVAL:
+                self.scan()
+                name = self.sources.get((slug, index))
+            if name is None or not os.path.exists(os.path.join(self.directory, name)):
+                return None
+            return os.path.join(self.directory, name)
+
+
+class DiskLRU:
+    """Archivos en directory hasta max_bytes; desaloja los usados hace más tiempo."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # clave -> bytes, del menos al más reciente
+        self.size = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        # Lo que quedó de la corrida anterior, por último uso (mtime, que se toca en cada hit)
+        existing = []
+        for name in os.listdir(directory):
+            if name.endswith('.tmp'):
+                os.remove(os.path.join(directory, name))
+                continue
+            stat = os.stat(os.path.join(directory, name))
+            existing.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(existing):
+            self.entries[name] = size
+            self.size += size
+        with self.lock:
+            self._evict()
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            with self.lock:
+                self.size -= self.entries.pop(key, 0)
+            return None
+        return self.path(key)
+
+    def add(self, key, size):
+        with self.lock:
+            self.size += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            self._evict(keep_newest=True)
+
+    def _evict(self, keep_newest=False):
+        # keep_newest: la rendition recién agregada se sirve aunque sola pase el tope
+        while self.size > self.max_bytes and len(self.entries) > (1 if keep_newest else 0):
+            key, size = self.entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass  # en Windows, abierta por otro request: queda huérfana hasta el próximo arranque
+
+
+class ImageServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, source, cache_dir=CACHE_DIR, cache_mb=CACHE_MB, workers=None, verbose=True):
+        from concurrent.futures import ProcessPoolExecutor
+        from image_scheduler import default_budget
+
+        super().__init__(address, ImageHandler)
+        self.sources = SourceIndex(source)
+        self.cache = DiskLRU(cache_dir, cache_mb * 1024 * 1024)
+        workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.budget = default_budget() // workers
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.in_flight = {}  # clave -> Future del render que están esperando todos
+        self.stats = {'requests': 0, 'hits': 0, 'misses': 0, 'coalesced': 0, 'errors': 0, 'render_ms': 0.0}
+
+    def count(self, **deltas):
+        with self.lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+        served = stats['hits'] + stats['misses'] + stats['coalesced']
+        stats['hit_rate'] = round((stats['hits'] + stats['coalesced']) / served, 3) if served else None
+        stats['avg_render_ms'] = round(stats['render_ms'] / stats['misses'], 1) if stats['misses'] else None
+        stats['cache_bytes'], stats['cache_files'] = self.cache.size, len(self.cache.entries)
+        stats['cache_limit_bytes'], stats['evictions'] = self.cache.max_bytes, self.cache.evictions
+        return stats
+
+    def rendition(self, source, width, quality, fmt):
+        """(ruta en cache, 'HIT' | 'MISS' | 'COALESCED'). Un solo render por clave aunque lleguen muchos pedidos."""
+        from process_batch import TRIM_ENABLED, plan_source
+
+        stat = os.stat(source)
+        digest = hashlib.sha256(f"{os.path.abspath(source)}:{stat.st_mtime_ns}:{stat.st_size}:"
+                                f"{width}:{quality}:{fmt}:{TRIM_ENABLED}".encode()).hexdigest()[:24]
+        key = f"{digest}.{'jpg' if fmt == 'jpeg' else fmt}"
+
+        path = self.cache.get(key)
+        if path:
+            self.count(hits=1)
+            return path, 'HIT'
+
+        # plan_source lee el header (y a lo sumo una vista previa chica): afuera del lock del servidor
+        strategy = plan_source(source, self.budget)['strategy']
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                # Otro leader pudo terminar mientras se planeaba: ya está en la cache
+                path = self.cache.get(key)
+                if path:
+                    self.stats['hits'] += 1
+                    return path, 'HIT'
+                future = self.pool.submit(render_rendition, source, strategy, width, quality, fmt,
+                                          self.cache.path(key))
+                future.started = time.monotonic()
+                self.in_flight[key] = future
+        if not leader:
+            future.result()
+            self.count(coalesced=1)
+            return self.cache.path(key), 'COALESCED'
+        try:
+            # A la cache antes de salir de in_flight: un pedido que llega en el medio ve una de las dos
+            self.cache.add(key, future.result())
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+        self.count(misses=1, render_ms=(time.monotonic() - future.started) * 1000)
+        return self.cache.path(key), 'MISS'
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    server_version = 'PerlaImageServer/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send(self, status, body=b'', content_type='application/json', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        slug = unquote(url.path).strip('/')
+        if slug == '_stats':
+            return self.send(200, self.server.snapshot())
+
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            width = int(query['w']) if query.get('w') else None
+            quality = int(query.get('q') or 0) or None
+            index = int(query.get('i') or 1)
+        except ValueError:
+            return self.send(400, {'error': 'w, q e i son enteros'})
+        if width is not None and not MIN_WIDTH <= width <= MAX_WIDTH:
+            return self.send(400, {'error': f"w fuera de rango ({MIN_WIDTH}-{MAX_WIDTH})"})
+        if quality is not None and not 1 <= quality <= 100:
+            return self.send(400, {'error': 'q fuera de rango (1-100)'})
+
+        fmt = query.get('fmt', 'webp').lower().replace('jpg', 'jpeg')
+        vary = fmt == 'auto'
+        if vary:
+            accept = self.headers.get('Accept', '')
+            fmt = 'avif' if 'image/avif' in accept else 'webp' if 'image/webp' in accept else 'jpeg'
+        if fmt not in FORMATS:
+            return self.send(400, {'error': f"fmt: {', '.join(FORMATS)} o auto"})
+
+        source = self.server.sources.find(slug, index)
+        if source is None:
+            return self.send(404, {'error': f"sin fuente para {slug} (i={index}) en {self.server.sources.directory}"})
+
+        from process_batch import QUALITY
+
+        self.server.count(requests=1)
+        started = time.monotonic()
+        try:
+            try:
+                path, status = self.server.rendition(source, width, quality or QUALITY, fmt)
+                with open(path, 'rb') as f:
+                    body = f.read()
+            except FileNotFoundError:
+                # Desalojada entre el lookup y la lectura (cache chico, mucha concurrencia): otro render
+                path, status = self.server.rendition(source, width, quality or QUALITY, fmt)
+                with open(path, 'rb') as f:
+                    body = f.read()
+        except Exception as e:
+            self.server.count(errors=1)
+            return self.send(500, {'error': f"{type(e).__name__}: {e}"})
+
+        etag = f'"{os.path.basename(path).split(".")[0]}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'X-Cache': status,
+                   'Server-Timing': f"render;dur={(time.monotonic() - started) * 1000:.1f}"}
+        if vary:
+            headers['Vary'] = 'Accept'
+        if self.headers.get('If-None-Match') == etag:
+            return self.send(304, b'', FORMATS[fmt], headers)
+        return self.send(200, body, FORMATS[fmt], headers)
+
+
+def main():
+    from upload_batch import OPTIMIZED_DIR
+
+    parser = argparse.ArgumentParser(description="Renditions a pedido (/{slug}?w=&q=&fmt=) con cache LRU en disco")
+    parser.add_argument('--source', default=OPTIMIZED_DIR,
+                        help="Carpeta de fuentes: raw jpg/png o mains .webp (default: optimized_batch)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--cache-mb', type=int, default=CACHE_MB, help="Tope del cache en disco")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos de render (default: CPUs)")
+    parser.add_argument('--quiet', action='store_true', help="Sin log por request")
+    args = parser.parse_args()
+
+    server = ImageServer((args.host, args.port), args.source, args.cache_dir, args.cache_mb, args.workers,
+                         verbose=not args.quiet)
+    print(f"🖼️  Image server en http://{args.host}:{args.port}/{{slug}}?w=&q=&fmt= "
+          f"({len(server.sources.sources)} fuentes en {args.source}, cache {args.cache_mb} MB en {args.cache_dir})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.pool.shutdown(cancel_futures=True)
+        stats = server.snapshot()
+        rate = f"{stats['hit_rate']:.0%}" if stats['hit_rate'] is not None else '-'
+        print(f"\n📊 {stats['requests']} requests: {stats['hits']} hits, {stats['coalesced']} coalesced, "
+              f"{stats['misses']} renders (hit rate {rate}), {stats['evictions']} desalojos, "
+              f"cache {stats['cache_bytes'] / 2**20:.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Lighthouse run history and regression detector.
+
+Replaces "run 3 audits and take the median LCP by hand" from PERFORMANCE.md:
+every Lighthouse JSON is ingested into .lighthouse_history.sqlite tagged with
+the git commit, and the report works per commit on all its runs.
+
+- ingest   store runs (files or directories of *.json; duplicates are ignored)
+- report   median + bootstrap 95% CI of FCP/LCP/TBT/CLS per commit. A metric is
+           a significant regression when the whole CI sits above the
+           PERFORMANCE.md target, or (with --baseline) when the CI of the
+           median difference against the baseline commit excludes zero.
+           Exits 1 on any significant regression, so it can gate CI.
+- lcp      LCP byte attribution: which file is the LCP image, how many bytes
+           it and the images finishing before LCP cost, and which pipeline
+           step produced each one (hero build, batch processing, ...).
+
+Usage:
+    for i in 1 2 3; do lighthouse <url> --output json --output-path lh/run-$i.json ...; done
+    python scripts/lighthouse_history.py ingest lh/
+    python scripts/lighthouse_history.py report --baseline <sha>
+    python scripts/lighthouse_history.py lcp
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import argparse
+import subprocess
+from pathlib import Path
+from statistics import median
+from urllib.parse import urlsplit, unquote
+
+HISTORY_PATH = '.lighthouse_history.sqlite'
+
+# Umbrales de PERFORMANCE.md (valores en las unidades de Lighthouse: ms para tiempos)
+METRICS = {
+    'fcp': ('first-contentful-paint', 2500, 'ms'),
+    'lcp': ('largest-contentful-paint', 4000, 'ms'),
+    'tbt': ('total-blocking-time', 200, 'ms'),
+    'cls': ('cumulative-layout-shift', 0.1, ''),
+}
+
+BOOTSTRAP_SAMPLES = 2000
+CONFIDENCE = 0.95
+
+# Qué script genera cada carpeta de salida (para atribuir bytes del LCP)
+HERO_DIR = Path('public/hero')
+HERO_MANIFEST = Path('hero_masters/manifest.json')
+PRODUCT_OUTPUT_DIRS = {
+    'optimized_batch': 'scripts/process_batch.py',
+    'optimized_jobs': 'scripts/run_jobs.py',
+}
+STORAGE_PREFIX = '/storage/v1/object/public/images/'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    file_hash TEXT UNIQUE,
+    commit_sha TEXT,
+    label TEXT,
+    fetch_time TEXT,
+    url TEXT,
+    form_factor TEXT,
+    lh_version TEXT,
+    score REAL,
+    fcp REAL, lcp REAL, tbt REAL, cls REAL,
+    ingested_at REAL
+);
+CREATE TABLE IF NOT EXISTS lcp_resources (
+    run_id INTEGER REFERENCES runs(id),
+    role TEXT,
+    url TEXT,
+    transfer_size INTEGER,
+    local_path TEXT,
+    local_size INTEGER,
+    producer TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_commit ON runs (commit_sha);
+"""
+
+
+def open_history(path=HISTORY_PATH):
+    db = sqlite3.connect(path)
+    db.row_factory = sqlite3.Row
+    db.executescript(SCHEMA)
+    return db
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+# --- parsing de Lighthouse ---
+
+def table_items(details):
+    """Items de una tabla de detalles, tanto el formato viejo (table) como LH 10+ (list de tables)."""
+    if not details:
+        return []
+    if details.get('type') == 'list':
+        items = []
+        for sub in details.get('items', []):
+            items.extend(table_items(sub))
+        return items
+    return details.get('items', [])
+
+
+def network_requests(report):
+    requests_ = []
+    for item in table_items(report['audits'].get('network-requests', {}).get('details')):
+        end = item.get('networkEndTime', item.get('endTime'))
+        requests_.append({
+            'url': item.get('url', ''),
+            'transfer_size': item.get('transferSize') or 0,
+            'resource_type': item.get('resourceType', ''),
+            'mime_type': item.get('mimeType', ''),
+            'end': end,
+        })
+    return requests_
+
+
+def is_image(request):
+    return request['resource_type'] == 'Image' or request['mime_type'].startswith('image/')
+
+
+def lcp_candidates(report):
+    """URLs (path) que el elemento LCP puede haber pedido, leídas del snippet del nodo."""
+    paths = []
+    for item in table_items(report['audits'].get('largest-contentful-paint-element', {}).get('details')):
+        snippet = (item.get('node') or {}).get('snippet', '')
+        for attr in re.findall(r'(?:src|srcset|imagesrcset)="([^"]+)"', snippet):
+            for part in attr.split(','):
+                url = part.strip().split(' ')[0]
+                if url:
+                    paths.append(urlsplit(url).path)
+        # background-image: url(...) en estilos inline
+        paths += [urlsplit(u).path for u in re.findall(r'url\(["\']?([^"\')]+)', snippet)]
+    return paths
+
+
+def observed_lcp(report):
+    items = table_items(report['audits'].get('metrics', {}).get('details'))
+    return items[0].get('observedLargestContentfulPaint') if items else None
+
+
+def find_lcp_request(report, images):
+    paths = lcp_candidates(report)
+    for request in images:
+        if urlsplit(request['url']).path in paths:
+            return request, 'snippet'
+    # <picture>: el snippet es el <img> fallback pero se descargó un <source> (p.ej. -mobile)
+    stems = {Path(p).stem for p in paths}
+    for request in images:
+        if any(Path(urlsplit(request['url']).path).stem.startswith(stem) for stem in stems if stem):
+            return request, 'picture source'
+    lcp_at = observed_lcp(report)
+    before = [r for r in images if lcp_at is None or (r['end'] is not None and r['end'] <= lcp_at)]
+    if before:
+        return max(before, key=lambda r: r['transfer_size']), 'largest image before LCP'
+    return None, None
+
+
+def locate_asset(url):
+    """(ruta local, productor) para una URL de imagen del sitio o de Storage."""
+    path = unquote(urlsplit(url).path)
+    if path.startswith('/hero/'):
+        local = HERO_DIR / Path(path).name
+        producer = 'scripts/optimize_hero_images.py'
+        if HERO_MANIFEST.exists():
+            manifest = json.loads(HERO_MANIFEST.read_text())
+            for name, entries in manifest.items():
+                entry = entries.get(local.name)
+                if entry:
+                    producer += f" ({name} master, {entry['settings']})"
+                    break
+        return (local if local.exists() else None), producer
+    if STORAGE_PREFIX in path:
+        name = Path(path.split(STORAGE_PREFIX, 1)[1]).name
+        for directory, producer in PRODUCT_OUTPUT_DIRS.items():
+            local = Path(directory) / name
+            if local.exists():
+                return local, producer
+        return None, 'Supabase Storage (sin copia local)'
+    local = Path('public') / path.lstrip('/')
+    if local.is_file():
+        return local, 'public/ (manual)'
+    return None, 'externo'
+
+
+def parse_report(report):
+    audits = report['audits']
+    values = {key: audits.get(audit_id, {}).get('numericValue') for key, (audit_id, _, _) in METRICS.items()}
+    performance = report.get('categories', {}).get('performance', {})
+    return {
+        'fetch_time': report.get('fetchTime'),
+        'url': report.get('finalDisplayedUrl') or report.get('finalUrl') or report.get('requestedUrl'),
+        'form_factor': report.get('configSettings', {}).get('formFactor'),
+        'lh_version': report.get('lighthouseVersion'),
+        'score': performance.get('score'),
+        **values,
+    }
+
+
+def attribute_lcp(report):
+    """Filas (role, url, bytes, ruta local, tamaño local, productor) para la imagen LCP y las que compiten con ella."""
+    images = [r for r in network_requests(report) if is_image(r)]
+    lcp_request, method = find_lcp_request(report, images)
+    rows = []
+    if lcp_request:
+        local, producer = locate_asset(lcp_request['url'])
+        rows.append((f'lcp ({method})', lcp_request['url'], lcp_request['transfer_size'],
+                     str(local) if local else None, local.stat().st_size if local else None, producer))
+        # Imágenes que terminaron antes que la LCP le disputan el ancho de banda
+        cutoff = lcp_request['end']
+        for request in images:
+            if request is lcp_request or cutoff is None or request['end'] is None or request['end'] > cutoff:
+                continue
+            local, producer = locate_asset(request['url'])
+            rows.append(('competing', request['url'], request['transfer_size'],
+                         str(local) if local else None, local.stat().st_size if local else None, producer))
+    return rows
+
+
+# --- estadística ---
+
+def bootstrap_ci(values, stat=median, samples=BOOTSTRAP_SAMPLES, confidence=CONFIDENCE, seed=0):
+    rng = random.Random(seed)
+    n = len(values)
+    estimates = sorted(stat([values[rng.randrange(n)] for _ in range(n)]) for _ in range(samples))
+    tail = (1 - confidence) / 2
+    return estimates[int(tail * (samples - 1))], estimates[int((1 - tail) * (samples - 1))]
+
+
+def bootstrap_diff_ci(current, baseline, samples=BOOTSTRAP_SAMPLES, confidence=CONFIDENCE, seed=0):
+    """CI del (median(current) - median(baseline)) remuestreando cada grupo por separado."""
+    rng = random.Random(seed)
+    diffs = sorted(
+        median([current[rng.randrange(len(current))] for _ in current])
+        - median([baseline[rng.randrange(len(baseline))] for _ in baseline])
+        for _ in range(samples)
+    )
+    tail = (1 - confidence) / 2
+    return diffs[int(tail * (samples - 1))], diffs[int((1 - tail) * (samples - 1))]
+
+
+def fmt(key, value):
+    if value is None:
+        return '-'
+    return f"{value:.3f}" if METRICS[key][2] == '' else f"{value:,.0f}ms"
+
+
+# --- comandos ---
+
+def cmd_ingest(args):
+    db = open_history()
+    commit = args.commit or current_commit()
+    paths = []
+    for target in args.paths:
+        target = Path(target)
+        paths += sorted(target.glob('*.json')) if target.is_dir() else [target]
+
+    added = 0
+    for path in paths:
+        raw = path.read_bytes()
+        try:
+            report = json.loads(raw)
+        except ValueError:
+            print(f"   ⚠️ {path}: no es JSON")
+            continue
+        if 'audits' not in report:
+            print(f"   ⚠️ {path}: no parece un reporte de Lighthouse")
+            continue
+        run = parse_report(report)
+        cur = db.execute(
+            "INSERT OR IGNORE INTO runs (file_hash, commit_sha, label, fetch_time, url, form_factor, lh_version, "
+            "score, fcp, lcp, tbt, cls, ingested_at) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+            (hashlib.sha256(raw).hexdigest(), commit, args.label, run['fetch_time'], run['url'], run['form_factor'],
+             run['lh_version'], run['score'], run['fcp'], run['lcp'], run['tbt'], run['cls'], time.time()))
+        if not cur.rowcount:
+            print(f"   ⏭️  {path}: ya ingerido")
+            continue
+        db.executemany("INSERT INTO lcp_resources VALUES (?,?,?,?,?,?,?)",
+                       [(cur.lastrowid, *row) for row in attribute_lcp(report)])
+        added += 1
+        print(f"   ✅ {path}: LCP {fmt('lcp', run['lcp'])}, CLS {fmt('cls', run['cls'])}")
+    db.commit()
+    print(f"📥 {added} run(s) nuevos para {commit}")
+    return 0
+
+
+def commit_runs(db, commit, form_factor=None):
+    query = "SELECT * FROM runs WHERE commit_sha = ?"
+    params = [commit]
+    if form_factor:
+        query += " AND form_factor = ?"
+        params.append(form_factor)
+    return db.execute(query, params).fetchall()
+
+
+def recent_commits(db, limit):
+    rows = db.execute("SELECT commit_sha, MAX(ingested_at) AS last FROM runs GROUP BY commit_sha "
+                      "ORDER BY last DESC LIMIT ?", (limit,)).fetchall()
+    return [r['commit_sha'] for r in reversed(rows)]
+
+
+def cmd_report(args):
+    db = open_history()
+    commits = args.commit or recent_commits(db, args.last)
+    if not commits:
+        print("❌ Historial vacío: correr 'ingest' primero")
+        return 1
+
+    baseline = {}
+    if args.baseline:
+        runs = commit_runs(db, args.baseline, args.form_factor)
+        baseline = {key: [r[key] for r in runs if r[key] is not None] for key in METRICS}
+
+    regressions = []
+    for commit in commits:
+        runs = commit_runs(db, commit, args.form_factor)
+        print(f"\n📊 {commit}: {len(runs)} run(s)")
+        print(f"   {'Métrica':<6} {'Mediana':>10} {'CI 95%':>24} {'Target':>10}  Estado")
+        for key, (_, target, _) in METRICS.items():
+            values = [r[key] for r in runs if r[key] is not None]
+            if not values:
+                continue
+            mid = median(values)
+            lo, hi = bootstrap_ci(values)
+            if lo > target:
+                status = "❌ REGRESIÓN (CI sobre el target)"
+                regressions.append((commit, key))
+            elif mid > target:
+                status = "⚠️ sobre el target (no significativo, sumar runs)"
+            else:
+                status = "✅"
+            if baseline.get(key) and commit != args.baseline:
+                d_lo, d_hi = bootstrap_diff_ci(values, baseline[key])
+                delta = mid - median(baseline[key])
+                if d_lo > 0:
+                    status += f"  ❌ +{fmt(key, delta)} vs {args.baseline} (significativo)"
+                    regressions.append((commit, key))
+                else:
+                    status += f"  Δ {fmt(key, delta)} vs {args.baseline}"
+            print(f"   {key.upper():<6} {fmt(key, mid):>10} {'[' + fmt(key, lo) + ', ' + fmt(key, hi) + ']':>24} "
+                  f"{fmt(key, target):>10}  {status}")
+        if len(runs) < 3:
+            print("   ℹ️  Con menos de 3 runs el CI es poco informativo")
+
+    regressions = list(dict.fromkeys(regressions))  # target + baseline sobre la misma métrica cuentan una vez
+    if regressions:
+        print(f"\n❌ {len(regressions)} regresión(es) significativa(s): "
+              + ', '.join(f"{c}:{k.upper()}" for c, k in regressions))
+        return 1
+    print("\n✅ Sin regresiones significativas")
+    return 0
+
+
+def cmd_lcp(args):
+    db = open_history()
+    commit = args.commit or (recent_commits(db, 1) or [None])[0]
+    runs = commit_runs(db, commit, args.form_factor) if commit else []
+    if not runs:
+        print("❌ No hay runs para ese commit")
+        return 1
+
+    # Agregado por URL sobre todos los runs del commit
+    by_url = {}
+    for run in runs:
+        for res in db.execute("SELECT * FROM lcp_resources WHERE run_id = ?", (run['id'],)):
+            entry = by_url.setdefault(res['url'], {'roles': set(), 'bytes': [], 'row': res})
+            entry['roles'].add(res['role'].split(' ')[0])
+            entry['bytes'].append(res['transfer_size'])
+
+    print(f"🖼️  Atribución de bytes del LCP — {commit} ({len(runs)} run(s))\n")
+    total = 0
+    for url, entry in sorted(by_url.items(), key=lambda kv: ('lcp' not in kv[1]['roles'], -median(kv[1]['bytes']))):
+        res = entry['row']
+        transferred = median(entry['bytes'])
+        total += transferred
+        role = 'LCP' if 'lcp' in entry['roles'] else 'compite'
+        print(f"   [{role:<7}] {transferred / 1024:8.1f} KB  {urlsplit(url).path}")
+        print(f"             {res['producer']}")
+        if res['local_path']:
+            print(f"             local: {res['local_path']} ({res['local_size'] / 1024:.1f} KB)")
+    print(f"\n   Total antes del LCP: {total / 1024:.1f} KB")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Historial de Lighthouse, regresiones y atribución del LCP")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('ingest', help="Agregar reportes JSON al historial")
+    p.add_argument('paths', nargs='+', help="Archivos .json o carpetas con reportes")
+    p.add_argument('--commit', help="Commit al que pertenecen (default: HEAD)")
+    p.add_argument('--label', help="Etiqueta libre (p.ej. 'preview', 'prod')")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser('report', help="Medianas, CI y regresiones por commit")
+    p.add_argument('--commit', nargs='*', help="Commits a reportar (default: los últimos --last)")
+    p.add_argument('--last', type=int, default=5)
+    p.add_argument('--baseline', help="Commit contra el que comparar")
+    p.add_argument('--form-factor', default=None, choices=['mobile', 'desktop'])
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser('lcp', help="Atribución de bytes de la imagen LCP")
+    p.add_argument('--commit')
+    p.add_argument('--form-factor', default=None, choices=['mobile', 'desktop'])
+    p.set_defaults(func=cmd_lcp)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Load-test driver for the Storage/PostgREST calls made by scripts/.
+
+Replays the same requests as upload_batch.py (object upload with x-upsert,
+PATCH relink on products, object list, products GET) at a given concurrency
+and reports throughput, latency percentiles and status codes.
+
+Without --url it starts mock_supabase.py in-process, so runs are offline and
+reproducible (use --seed for the injected faults):
+
+    python scripts/load_test_supabase.py --scenario upload --requests 200 --concurrency 8 \\
+        --size-kb 120 --latency-ms 60 --bandwidth-kbps 2048 --error-rate 0.02 --seed 1
+"""
+
+import os
+import time
+import argparse
+import statistics
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+import mock_supabase
+from rate_control import AdaptiveLimiter, request_with_retry
+
+BUCKET_NAME = 'images'
+SCENARIOS = ('upload', 'relink', 'list', 'read', 'mixed')
+
+
+def build_headers(key):
+    return {"Authorization": f"Bearer {key}", "apikey": key}
+
+
+def call_upload(send, base_url, headers, i, payload):
+    url = f"{base_url}/storage/v1/object/{BUCKET_NAME}/loadtest/item-{i}.webp"
+    h = dict(headers, **{"Content-Type": "image/webp", "x-upsert": "true",
+                         "Cache-Control": "public, max-age=31536000, immutable"})
+    return send('POST', url, headers=h, data=payload)
+
+
+def call_relink(send, base_url, headers, i, slugs):
+    slug = slugs[i % len(slugs)] if slugs else f"loadtest-{i}"
+    h = dict(headers, **{"Content-Type": "application/json", "Prefer": "return=representation"})
+    public_url = f"{base_url}/storage/v1/object/public/{BUCKET_NAME}/{slug}.webp"
+    return send('PATCH', f"{base_url}/rest/v1/products", headers=h,
+                         params={"slug": f"eq.{slug}"}, json={"image_url": public_url})
+
+
+def call_list(send, base_url, headers, i):
+    return send('POST', f"{base_url}/storage/v1/object/list/{BUCKET_NAME}", headers=headers,
+                        json={"prefix": "", "limit": 1000})
+
+
+def call_read(send, base_url, headers, i):
+    return send('GET', f"{base_url}/rest/v1/products", headers=headers,
+                       params={"select": "slug,image_url,image2_url,image3_url"})
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def run(base_url, key, scenario, total, concurrency, size_kb, adaptive=False):
+    headers = build_headers(key)
+    payload = os.urandom(int(size_kb * 1024))
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    limiter = None
+    if adaptive:
+        # concurrency pasa a ser el techo; el limiter decide cuántos requests salen a la vez
+        limiter = AdaptiveLimiter(initial=min(4, concurrency), maximum=concurrency)
+
+        def send(method, url, **kwargs):
+            return request_with_retry(method, url, limiter=limiter, session=session, **kwargs)
+    else:
+        send = session.request
+
+    slugs = []
+    if scenario in ('relink', 'mixed'):
+        r = session.get(f"{base_url}/rest/v1/products", headers=headers, params={"select": "slug"})
+        if r.ok:
+            slugs = [p['slug'] for p in r.json() if p.get('slug')]
+
+    def one(i):
+        kind = scenario
+        if scenario == 'mixed':
+            kind = ('upload', 'relink', 'read', 'upload')[i % 4]
+        started = time.perf_counter()
+        try:
+            if kind == 'upload':
+                r = call_upload(send, base_url, headers, i, payload)
+                sent = len(payload)
+            elif kind == 'relink':
+                r = call_relink(send, base_url, headers, i, slugs)
+                sent = 0
+            elif kind == 'list':
+                r = call_list(send, base_url, headers, i)
+                sent = 0
+            else:
+                r = call_read(send, base_url, headers, i)
+                sent = 0
+            status = r.status_code
+            received = len(r.content)
+        except requests.RequestException as e:
+            status, sent, received = type(e).__name__, 0, 0
+        return kind, status, time.perf_counter() - started, sent, received
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    return results, elapsed, limiter
+
+
+def report(results, elapsed, concurrency):
+    latencies = [r[2] * 1000 for r in results]
+    statuses = Counter(str(r[1]) for r in results)
+    ok = sum(1 for r in results if isinstance(r[1], int) and 200 <= r[1] < 300)
+    sent = sum(r[3] for r in results)
+    received = sum(r[4] for r in results)
+
+    print("\n" + "=" * 50)
+    print("📊 LOAD TEST SUMMARY")
+    print("=" * 50)
+    print(f"Requests: {len(results)} (concurrency {concurrency}) in {elapsed:.2f}s")
+    print(f"Throughput: {len(results) / elapsed:.1f} req/s, {ok / elapsed:.1f} ok/s")
+    print(f"Upload: {sent / 1024 / 1024 / elapsed:.2f} MB/s  |  Download: {received / 1024 / 1024 / elapsed:.2f} MB/s")
+    print(f"Latency ms: p50 {percentile(latencies, 50):.1f}  p95 {percentile(latencies, 95):.1f}  "
+          f"p99 {percentile(latencies, 99):.1f}  max {max(latencies, default=0):.1f}"
+          f"  mean {statistics.fmean(latencies) if latencies else 0:.1f}")
+    print("Status codes: " + ", ".join(f"{k}×{v}" for k, v in sorted(statuses.items())))
+    by_kind = Counter(r[0] for r in results)
+    if len(by_kind) > 1:
+        print("By call: " + ", ".join(f"{k}×{v}" for k, v in sorted(by_kind.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test para las llamadas Storage/REST de scripts/")
+    parser.add_argument('--url', help="Base URL (por defecto arranca el mock en proceso)")
+    parser.add_argument('--key', default='mock-service-role-key')
+    parser.add_argument('--allow-remote', action='store_true',
+                        help="Permitir un --url que no sea localhost (¡cuidado con producción!)")
+    parser.add_argument('--scenario', choices=SCENARIOS, default='upload')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--size-kb', type=float, default=100, help="Tamaño del payload de upload")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="Usar AdaptiveLimiter + reintentos (rate_control.py); --concurrency es el techo")
+    parser.add_argument('--products-csv', default=mock_supabase.SEED_CSV)
+    mock_supabase.add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if base_url:
+        host = urlsplit(base_url).hostname
+        if host not in ('localhost', '127.0.0.1', '::1') and not args.allow_remote:
+            print(f"❌ {base_url} no es local. Usa --allow-remote si de verdad quieres cargar ese servidor.")
+            return
+    else:
+        seed_csv = args.products_csv if args.products_csv and os.path.exists(args.products_csv) else None
+        server, base_url = mock_supabase.start_in_thread(
+            port=0, config=mock_supabase.config_from_args(args), seed_csv=seed_csv)
+        print(f"🧪 Mock en proceso: {base_url} ({len(server.state.products)} productos)")
+
+    print(f"🚀 Escenario '{args.scenario}': {args.requests} requests, concurrencia {args.concurrency}")
+    try:
+        results, elapsed, limiter = run(base_url, args.key, args.scenario, args.requests,
+                                        args.concurrency, args.size_kb, adaptive=args.adaptive)
+        report(results, elapsed, args.concurrency)
+        if limiter:
+            print(f"Limiter: final {limiter.limit:.1f}, pico {limiter.stats['peak_limit']}, "
+                  f"{limiter.stats['decreases']} reducciones, {limiter.stats['throttled']} × 429, "
+                  f"{limiter.stats['errors']} × error")
+        if server:
+            stats = server.state.stats
+            print(f"Mock: {stats['bytes_in'] / 1024:.0f} KB in, {stats['bytes_out'] / 1024:.0f} KB out, "
+                  f"{stats['errors_5xx']} × 5xx, {stats['errors_429']} × 429 injected")
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    main()
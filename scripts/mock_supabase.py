@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Supabase Storage + PostgREST subset used by scripts/.
+
+Endpoints:
+- POST/PUT  /storage/v1/object/{bucket}/{path}          (upload, honours x-upsert)
+- GET/HEAD  /storage/v1/object/public/{bucket}/{path}     (ETag = md5 of the content)
+- POST      /storage/v1/object/list/{bucket}            ({"prefix", "limit", "offset"})
+- DELETE    /storage/v1/object/{bucket}                 ({"prefixes": [...]})
+- TUS 1.0.0 /storage/v1/upload/resumable[/{id}]         (creation, HEAD offset, PATCH; --tus-concat
+                                                         also advertises the concatenation extension)
+- GET       /rest/v1/products?select=..&col=eq.val      (limit/offset/order, Range header,
+                                                         ETag / If-None-Match)
+- PATCH     /rest/v1/products?col=eq.val
+- POST      /rest/v1/products                            (upsert on slug)
+- GET/PATCH/POST /rest/v1/image_releases                 (same filters; upsert on id)
+- POST      /rest/v1/rpc/activate_image_release          ({"p_release"}) and rpc/rollback_image_release,
+                                                         same semantics as the SQL functions
+- GET       /__mock/stats                                (counters for the load-test driver)
+
+Faults are injected per request: latency (+ jitter), a bandwidth cap in both
+directions, random 5xx, random 429 with Retry-After and an in-flight cap that
+answers 429 when exceeded. Everything is in memory.
+
+Usage:
+    python scripts/mock_supabase.py --port 54321 --latency-ms 80 --error-rate 0.02
+    # then point VITE_SUPABASE_URL at http://127.0.0.1:54321
+"""
+
+import csv
+import json
+import uuid
+import base64
+import hashlib
+import random
+import argparse
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+DEFAULT_PORT = 54321
+SEED_CSV = 'nuevos_productos.csv'
+CHUNK_SIZE = 16 * 1024
+
+
+class MockConfig:
+    def __init__(self, latency_ms=0, jitter_ms=0, bandwidth_kbps=0, error_rate=0.0,
+                 rate_limit_rate=0.0, retry_after=1, max_inflight=0, seed=None, tus_concat=False):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.bandwidth_kbps = bandwidth_kbps  # 0 = sin límite
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.max_inflight = max_inflight  # 0 = sin límite
+        self.tus_concat = tus_concat
+        self.random = random.Random(seed)
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class MockState:
+    """Buckets y tablas (products, image_releases) en memoria, con contadores para el load test."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.objects = {}   # (bucket, path) -> (bytes, content_type, cache_control)
+        self.products = []  # list[dict]
+        self.tables = {'products': self.products, 'image_releases': []}
+        self.uploads = {}   # id TUS -> {"length", "data", "metadata", "upsert", "partial"}
+        self.inflight = 0
+        self.stats = {
+            "requests": 0, "bytes_in": 0, "bytes_out": 0,
+            "errors_5xx": 0, "errors_429": 0, "by_route": {},
+        }
+
+    def seed_products(self, csv_path):
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            for i, row in enumerate(csv.DictReader(f), start=1):
+                row = {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+                row.setdefault('id', i)
+                row.setdefault('image2_url', None)
+                row.setdefault('image3_url', None)
+                row['updated_at'] = now_iso()
+                self.products.append(row)
+
+    def count(self, route, **deltas):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["by_route"][route] = self.stats["by_route"].get(route, 0) + 1
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+    def add(self, **deltas):
+        with self.lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+
+# --- PostgREST helpers ---
+
+def parse_filter(value):
+    op, _, arg = value.partition('.')
+    if op == 'in':
+        return op, [a.strip().strip('"') for a in arg.strip('()').split(',') if a.strip()]
+    return op, arg
+
+
+def matches(row, filters):
+    for column, (op, arg) in filters:
+        value = row.get(column)
+        text = '' if value is None else str(value)
+        if op == 'eq' and text != arg: return False
+        if op == 'neq' and text == arg: return False
+        if op == 'in' and text not in arg: return False
+        if op == 'gt' and not text > arg: return False
+        if op == 'gte' and not text >= arg: return False
+        if op == 'lt' and not text < arg: return False
+        if op == 'is' and arg == 'null' and value is not None: return False
+    return True
+
+
+def project(row, select):
+    if not select or select == '*':
+        return dict(row)
+    return {c: row.get(c) for c in (s.strip() for s in select.split(',')) if c}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers y body van en writes separados; sin esto Nagle + delayed ACK suman ~40ms por request
+    disable_nagle_algorithm = True
+    server_version = 'MockSupabase/1.0'
+
+    # silenciar el log por request de http.server
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # --- Fault injection / IO ---
+
+    def throttle(self, nbytes):
+        kbps = self.server.config.bandwidth_kbps
+        if kbps:
+            time.sleep(nbytes / (kbps * 1024))
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        chunks = []
+        remaining = length
+        while remaining > 0:
+            chunk = self.rfile.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            self.throttle(len(chunk))
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        body = b''.join(chunks)
+        self.server.state.add(bytes_in=len(body))
+        return body
+
+    def send(self, status, body=b'', content_type='application/json', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            for i in range(0, len(body), CHUNK_SIZE):
+                chunk = body[i:i + CHUNK_SIZE]
+                self.throttle(len(chunk))
+                self.wfile.write(chunk)
+            self.server.state.add(bytes_out=len(body))
+
+    def inject_fault(self):
+        """Devuelve True si ya respondió con un error simulado."""
+        config = self.server.config
+        delay = config.latency_ms + (config.random.uniform(0, config.jitter_ms) if config.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+
+        roll = config.random.random()
+        if roll < config.rate_limit_rate:
+            self.read_body()
+            self.server.state.add(errors_429=1)
+            self.send(429, {"message": "Too Many Requests"}, headers={"Retry-After": str(config.retry_after)})
+            return True
+        if roll < config.rate_limit_rate + config.error_rate:
+            self.read_body()
+            self.server.state.add(errors_5xx=1)
+            self.send(503, {"message": "Service Unavailable (injected)"})
+            return True
+        return False
+
+    def dispatch(self):
+        state = self.server.state
+        parts = urlsplit(self.path)
+        path = unquote(parts.path)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+
+        if path == '/__mock/stats':
+            with state.lock:
+                snapshot = json.loads(json.dumps(state.stats))
+            return self.send(200, snapshot)
+
+        state.count(f"{self.command} {path.split('/')[1] if '/' in path else path}")
+
+        with state.lock:
+            over = self.server.config.max_inflight and state.inflight >= self.server.config.max_inflight
+            if not over:
+                state.inflight += 1
+        if over:
+            self.read_body()
+            state.add(errors_429=1)
+            return self.send(429, {"message": "Too many concurrent requests"},
+                             headers={"Retry-After": str(self.server.config.retry_after)})
+
+        try:
+            if self.inject_fault():
+                return
+            if path.startswith('/storage/v1/upload/resumable'):
+                return self.handle_tus(path[len('/storage/v1/upload/resumable'):])
+            if path.startswith('/storage/v1/object'):
+                return self.handle_storage(path[len('/storage/v1/object'):])
+            if path.startswith('/rest/v1/rpc/'):
+                return self.handle_rpc(path[len('/rest/v1/rpc/'):])
+            if path.startswith('/rest/v1/'):
+                return self.handle_rest(path[len('/rest/v1/'):], query)
+            self.read_body()
+            self.send(404, {"message": "Not found"})
+        finally:
+            with state.lock:
+                state.inflight -= 1
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = lambda self: self.dispatch()
+
+    # --- TUS ---
+
+    def tus_headers(self, **extra):
+        headers = {"Tus-Resumable": "1.0.0"}
+        headers.update({k.replace('_', '-'): v for k, v in extra.items()})
+        return headers
+
+    def finish_upload(self, upload):
+        meta = upload["metadata"]
+        key = (meta.get("bucketName", ""), meta.get("objectName", ""))
+        state = self.server.state
+        with state.lock:
+            if key in state.objects and not upload["upsert"]:
+                return False
+            state.objects[key] = (bytes(upload["data"]), meta.get("contentType", "application/octet-stream"),
+                                  f"max-age={meta['cacheControl']}" if meta.get("cacheControl") else None)
+        return True
+
+    def handle_tus(self, rest):
+        state = self.server.state
+        upload_id = rest.strip('/')
+
+        if self.command == 'OPTIONS':
+            extensions = "creation,termination" + (",concatenation" if self.server.config.tus_concat else "")
+            return self.send(204, headers=self.tus_headers(Tus_Version="1.0.0", Tus_Extension=extensions,
+                                                           Tus_Max_Size=str(50 * 1024 * 1024 * 1024)))
+
+        if self.command == 'POST' and not upload_id:
+            self.read_body()
+            metadata = {}
+            for pair in filter(None, (self.headers.get('Upload-Metadata') or '').split(',')):
+                name, _, value = pair.strip().partition(' ')
+                metadata[name] = base64.b64decode(value).decode() if value else ''
+            concat = self.headers.get('Upload-Concat', '')
+            upsert = self.headers.get('x-upsert', '').lower() == 'true'
+
+            if concat.startswith('final;'):
+                if not self.server.config.tus_concat:
+                    return self.send(400, headers=self.tus_headers())
+                data = bytearray()
+                with state.lock:
+                    for url in concat[len('final;'):].split():
+                        part = state.uploads.get(url.rstrip('/').rsplit('/', 1)[-1])
+                        if not part or len(part["data"]) != part["length"]:
+                            return self.send(400, {"message": "Partial upload incomplete"}, headers=self.tus_headers())
+                        data += part["data"]
+                upload = {"length": len(data), "data": data, "metadata": metadata, "upsert": upsert, "partial": False}
+                if not self.finish_upload(upload):
+                    return self.send(409, headers=self.tus_headers())
+                return self.send(201, headers=self.tus_headers(Location=f"/storage/v1/upload/resumable/{uuid.uuid4().hex}"))
+
+            length = self.headers.get('Upload-Length')
+            if length is None:
+                return self.send(400, {"message": "Upload-Length required"}, headers=self.tus_headers())
+            new_id = uuid.uuid4().hex
+            with state.lock:
+                state.uploads[new_id] = {"length": int(length), "data": bytearray(), "metadata": metadata,
+                                         "upsert": upsert, "partial": concat == 'partial'}
+            return self.send(201, headers=self.tus_headers(Location=f"/storage/v1/upload/resumable/{new_id}"))
+
+        with state.lock:
+            upload = state.uploads.get(upload_id)
+        if not upload:
+            self.read_body()
+            return self.send(404, headers=self.tus_headers())
+
+        if self.command == 'HEAD':
+            return self.send(200, headers=self.tus_headers(Upload_Offset=str(len(upload["data"])),
+                                                           Upload_Length=str(upload["length"]),
+                                                           Cache_Control="no-store"))
+
+        if self.command == 'DELETE':
+            with state.lock:
+                state.uploads.pop(upload_id, None)
+            return self.send(204, headers=self.tus_headers())
+
+        if self.command == 'PATCH':
+            offset = int(self.headers.get('Upload-Offset', -1))
+            body = self.read_body()
+            with state.lock:
+                if offset != len(upload["data"]):
+                    conflict = True
+                else:
+                    conflict = False
+                    upload["data"] += body[:upload["length"] - offset]
+                    new_offset = len(upload["data"])
+            if conflict:
+                return self.send(409, headers=self.tus_headers(Upload_Offset=str(len(upload["data"]))))
+            if new_offset == upload["length"] and not upload["partial"]:
+                if not self.finish_upload(upload):
+                    return self.send(409, headers=self.tus_headers())
+            return self.send(204, headers=self.tus_headers(Upload_Offset=str(new_offset)))
+
+        self.read_body()
+        return self.send(405, headers=self.tus_headers())
+
+    # --- Storage ---
+
+    def handle_storage(self, rest):
+        state = self.server.state
+        segments = [s for s in rest.split('/') if s]
+
+        if self.command == 'POST' and segments[:1] == ['list']:
+            bucket = segments[1] if len(segments) > 1 else ''
+            opts = json.loads(self.read_body() or b'{}')
+            prefix = opts.get('prefix') or ''
+            limit = int(opts.get('limit') or 100)
+            offset = int(opts.get('offset') or 0)
+            # Como Storage: el prefix es una carpeta y los nombres vuelven relativos a ella
+            folder = prefix.rstrip('/') + '/' if prefix else ''
+            with state.lock:
+                names = sorted(p for (b, p) in state.objects if b == bucket and p.startswith(folder))
+                listing = [{"name": n[len(folder):], "metadata": {"size": len(state.objects[(bucket, n)][0]),
+                                                                  "mimetype": state.objects[(bucket, n)][1]}}
+                           for n in names[offset:offset + limit]]
+            return self.send(200, listing)
+
+        if self.command in ('GET', 'HEAD') and segments[:1] == ['public'] and len(segments) > 2:
+            key = (segments[1], '/'.join(segments[2:]))
+            with state.lock:
+                obj = state.objects.get(key)
+            if not obj:
+                return self.send(404, {"message": "Object not found"})
+            data, content_type, cache_control = obj
+            headers = {"ETag": '"%s"' % hashlib.md5(data).hexdigest()}
+            if cache_control:
+                headers["Cache-Control"] = cache_control
+            return self.send(200, data, content_type=content_type, headers=headers)
+
+        if self.command == 'DELETE' and len(segments) == 1:
+            bucket = segments[0]
+            prefixes = json.loads(self.read_body() or b'{}').get('prefixes') or []
+            removed = []
+            with state.lock:
+                for name in prefixes:
+                    if state.objects.pop((bucket, name), None) is not None:
+                        removed.append({"name": name})
+            return self.send(200, removed)
+
+        if self.command in ('POST', 'PUT') and len(segments) > 1:
+            key = (segments[0], '/'.join(segments[1:]))
+            body = self.read_body()
+            upsert = self.headers.get('x-upsert', '').lower() == 'true' or self.command == 'PUT'
+            with state.lock:
+                if key in state.objects and not upsert:
+                    exists = True
+                else:
+                    exists = False
+                    state.objects[key] = (body, self.headers.get('Content-Type', 'application/octet-stream'),
+                                          self.headers.get('Cache-Control'))
+            if exists:
+                return self.send(409, {"statusCode": "409", "error": "Duplicate",
+                                       "message": "The resource already exists"})
+            return self.send(200, {"Key": f"{key[0]}/{key[1]}"})
+
+        self.read_body()
+        return self.send(400, {"message": f"Unsupported storage call: {self.command} {rest}"})
+
+    # --- PostgREST ---
+
+    def handle_rest(self, table, query):
+        state = self.server.state
+        if table not in state.tables:
+            self.read_body()
+            return self.send(404, {"message": f"relation \"{table}\" does not exist"})
+        table_rows = state.tables[table]
+        touch = table == 'products'  # solo products tiene updated_at
+
+        reserved = {'select', 'order', 'limit', 'offset', 'on_conflict'}
+        filters = [(k, parse_filter(v)) for k, v in query if k not in reserved]
+        params = dict(query)
+        prefer = self.headers.get('Prefer', '')
+
+        if self.command in ('GET', 'HEAD'):
+            with state.lock:
+                rows = [r for r in table_rows if matches(r, filters)]
+            order = params.get('order')
+            if order:
+                # order=a.asc,b.desc: ordenar por la última clave primero (sort estable)
+                for term in reversed(order.split(',')):
+                    column, _, direction = term.partition('.')
+                    rows.sort(key=lambda r: str(r.get(column) or ''), reverse=direction.startswith('desc'))
+            total = len(rows)
+            start = int(params.get('offset') or 0)
+            end = start + int(params['limit']) - 1 if 'limit' in params else total - 1
+            range_header = self.headers.get('Range')
+            if range_header and '-' in range_header:
+                lo, _, hi = range_header.partition('-')
+                start = int(lo or 0)
+                end = int(hi) if hi else total - 1
+            page = [project(r, params.get('select')) for r in rows[start:end + 1]]
+            last = start + len(page) - 1
+            content_range = f"{start}-{last}" if page else "*"
+            content_range += f"/{total}" if 'count=exact' in prefer else "/*"
+            status = 206 if range_header and end + 1 < total else 200
+            etag = '"%s"' % hashlib.sha1(json.dumps(page, sort_keys=True).encode()).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                return self.send(304, headers={"ETag": etag})
+            return self.send(status, page, headers={"Content-Range": content_range, "ETag": etag})
+
+        body = json.loads(self.read_body() or b'null')
+
+        if self.command == 'PATCH':
+            updated = []
+            with state.lock:
+                for row in table_rows:
+                    if matches(row, filters):
+                        row.update(body or {})
+                        if touch:
+                            row['updated_at'] = now_iso()
+                        updated.append(dict(row))
+            if 'return=representation' in prefer:
+                return self.send(200, updated)
+            return self.send(204)
+
+        if self.command == 'POST':
+            rows = body if isinstance(body, list) else [body]
+            key = params.get('on_conflict', 'slug' if touch else 'id')
+            merge = 'resolution=merge-duplicates' in prefer
+            result = []
+            with state.lock:
+                index = {r.get(key): r for r in table_rows}
+                for incoming in rows:
+                    existing = index.get(incoming.get(key))
+                    if existing is not None and not merge:
+                        return self.send(409, {"code": "23505", "message": "duplicate key value"})
+                    if existing is not None:
+                        existing.update(incoming)
+                        if touch:
+                            existing['updated_at'] = now_iso()
+                        result.append(dict(existing))
+                    else:
+                        row = dict(incoming)
+                        row.setdefault('id', len(table_rows) + 1)
+                        if touch:
+                            row['updated_at'] = now_iso()
+                        else:
+                            row.setdefault('created_at', now_iso())
+                        table_rows.append(row)
+                        index[row.get(key)] = row
+                        result.append(dict(row))
+            if 'return=representation' in prefer:
+                return self.send(201, result)
+            return self.send(201)
+
+        return self.send(405, {"message": "Method not allowed"})
+
+    def handle_rpc(self, function):
+        """activate/rollback_image_release, con la misma lógica que 20261019_image_releases.sql."""
+        state = self.server.state
+        body = json.loads(self.read_body() or b'{}')
+        if self.command != 'POST' or function not in ('activate_image_release', 'rollback_image_release'):
+            return self.send(404, {"message": f"function {function} does not exist"})
+
+        slots = (('1', 'image_url'), ('2', 'image2_url'), ('3', 'image3_url'))
+        # La respuesta se arma bajo el lock y se envía afuera (send() cuenta bytes con el mismo lock)
+        with state.lock:
+            status, result = self.apply_rpc(function, body, slots)
+        return self.send(status, json.dumps(result).encode())
+
+    def apply_rpc(self, function, body, slots):
+        state = self.server.state
+        releases = {r['id']: r for r in state.tables['image_releases']}
+        current = next((r for r in releases.values() if r.get('status') == 'active'), None)
+        by_slug = {p.get('slug'): p for p in state.products}
+
+        def apply(mapping, partial=False, only_if=None):
+            # partial (activate): coalesce(manifest, actual), un slot ausente no se toca
+            # only_if (rollback): solo los slots que todavía tienen la URL de ese manifest
+            count = 0
+            for slug, urls in mapping.items():
+                product = by_slug.get(slug)
+                if product is not None:
+                    guard = (only_if or {}).get(slug) or {}
+                    product.update({column: (urls or {}).get(slot) for slot, column in slots
+                                    if (not partial or (urls or {}).get(slot) is not None)
+                                    and (only_if is None or
+                                         (product.get(column) is not None and product.get(column) == guard.get(slot)))})
+                    product['updated_at'] = now_iso()
+                    count += 1
+            return count
+
+        if function == 'activate_image_release':
+            release = releases.get(body.get('p_release'))
+            if release is None or release.get('status') not in ('verified', 'retired'):
+                return 400, {"code": "P0001", "message": f"release {body.get('p_release')} no activable"}
+            previous = {slug: {slot: by_slug[slug].get(column) for slot, column in slots}
+                        for slug in release['manifest'] if slug in by_slug}
+            count = apply(release['manifest'], partial=True)
+            if current:
+                current['status'] = 'retired'
+            release.update(status='active', activated_at=now_iso(), previous=previous,
+                           replaced_release=current['id'] if current else None)
+            return 200, count
+
+        if current is None or current.get('previous') is None:
+            return 400, {"code": "P0001", "message": "no hay release activo para revertir"}
+        restored = releases.get(current.get('replaced_release'))
+        if current.get('replaced_release') and (restored is None or restored.get('status') == 'deleted'):
+            return 400, {"code": "P0001", "message": f"release {current['replaced_release']} ya fue borrado por el gc"}
+        apply(current['previous'], only_if=current['manifest'])
+        current['status'] = 'retired'
+        if restored:
+            restored['status'] = 'active'
+        return 200, current.get('replaced_release')
+
+
+def make_server(host='127.0.0.1', port=DEFAULT_PORT, config=None, seed_csv=None, verbose=False):
+    """Crea el servidor sin arrancarlo (port=0 elige uno libre). Útil para tests y el load test."""
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    server.config = config or MockConfig()
+    server.state = MockState()
+    server.verbose = verbose
+    if seed_csv:
+        server.state.seed_products(seed_csv)
+    return server
+
+
+def start_in_thread(**kwargs):
+    """Arranca el mock en un hilo y devuelve (server, base_url)."""
+    server = make_server(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def add_fault_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=0, help="Latencia fija por request")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Latencia extra aleatoria (0..N)")
+    parser.add_argument('--bandwidth-kbps', type=float, default=0, help="Tope de ancho de banda por conexión (KB/s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Probabilidad de 503")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Probabilidad de 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Valor de Retry-After en los 429")
+    parser.add_argument('--max-inflight', type=int, default=0, help="Requests simultáneos antes de responder 429")
+    parser.add_argument('--seed', type=int, default=None, help="Semilla para que las fallas sean reproducibles")
+    parser.add_argument('--tus-concat', action='store_true', help="Anunciar la extensión TUS concatenation")
+
+
+def config_from_args(args):
+    return MockConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, bandwidth_kbps=args.bandwidth_kbps,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+        max_inflight=args.max_inflight, seed=args.seed, tus_concat=args.tus_concat,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock local de Supabase Storage/PostgREST")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--products-csv', default=SEED_CSV, help="CSV para poblar la tabla products ('' = vacía)")
+    parser.add_argument('--verbose', action='store_true')
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    seed_csv = args.products_csv or None
+    server = make_server(args.host, args.port, config_from_args(args), seed_csv=seed_csv, verbose=args.verbose)
+    print(f"🧪 Mock Supabase escuchando en http://{args.host}:{server.server_address[1]}")
+    print(f"   Productos cargados: {len(server.state.products)}")
+    print("   VITE_SUPABASE_URL=http://{}:{}".format(args.host, server.server_address[1]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Mock detenido.")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
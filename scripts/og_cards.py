@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Pre-rendered Open Graph cards (1200x630) for every product.
+
+Share previews used the raw image_url (a 500x500 crop at best), and rendering
+cards at the edge would add latency to every crawler hit. This renders them
+once, in batch, with Pillow: product photo on the left, brand, name and price
+on the right, in the site colors and fonts (public/fonts).
+
+Only what changed is re-rendered. The cache key of a card is a hash of its
+inputs: name, brand, price, image_url, the ETag of the image (a HEAD per
+product, so a photo overwritten under the same URL is noticed too), the
+fonts and LAYOUT_VERSION. Stale cards are rendered in a process pool,
+uploaded through upload_batch.upload_file under a content-versioned name
+(og/{slug}.{key}.jpg, served immutable) and linked in products.og_image_url
+(src/migrations/20261019_og_image_url.sql). JPEG, not WebP: WhatsApp and
+some crawlers still ignore WebP og:image.
+
+Usage:
+    python scripts/og_cards.py [--slug s ...] [--force] [--dry-run] [--no-upload] [--workers N]
+"""
+
+import io
+import os
+import sys
+import json
+import hashlib
+import argparse
+
+CARDS_DIR = 'og_cards'
+CACHE_PATH = '.og_cards_cache.json'
+CARD_PREFIX = 'og/'
+CARD_SIZE = (1200, 630)
+QUALITY = 85
+LAYOUT_VERSION = 1  # subir al cambiar el diseño: invalida todas las cards
+
+TITLE_FONT = 'public/fonts/playfair-display-latin-regular.woff2'
+BODY_FONT = 'public/fonts/inter-latin-regular.woff2'
+# tailwind.config.js
+BACKGROUND = (0, 0, 0)
+TEXT = (255, 255, 255)
+MUTED = (177, 181, 180)
+ACCENT = (63, 255, 193)
+
+PANEL_X = CARD_SIZE[1] + 60   # el texto arranca después de la foto cuadrada
+PANEL_WIDTH = CARD_SIZE[0] - PANEL_X - 60
+TITLE_SIZES = (60, 52, 44, 38)
+TITLE_MAX_LINES = 3
+
+
+# --- render (corre en los workers del pool) ---
+
+def load_font(path, size):
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype(path, size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+def wrap(draw, text, font, width):
+    """Líneas de text que entran en width; una palabra más larga que width va sola en su línea."""
+    lines, current = [], ''
+    for word in text.split():
+        candidate = f"{current} {word}".strip()
+        if current and draw.textlength(candidate, font=font) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def format_price(price):
+    """12.9 -> '€12.90', como en el sitio."""
+    return f"€{float(price):.2f}"
+
+
+def render_card(product, image_bytes, out_path):
+    """Compone la card de un producto y la guarda como JPEG en out_path."""
+    from PIL import Image, ImageDraw, ImageOps
+
+    card = Image.new('RGB', CARD_SIZE, BACKGROUND)
+    side = CARD_SIZE[1]
+
+    # Foto: las del catálogo son producto sobre blanco, así que el cuadro va en blanco
+    with Image.open(io.BytesIO(image_bytes)) as photo:
+        photo = ImageOps.exif_transpose(photo).convert('RGBA')
+        photo.thumbnail((side - 40, side - 40), Image.Resampling.LANCZOS)
+        square = Image.new('RGB', (side, side), (255, 255, 255))
+        square.paste(photo, ((side - photo.width) // 2, (side - photo.height) // 2), photo)
+    card.paste(square, (0, 0))
+
+    draw = ImageDraw.Draw(card)
+    draw.rectangle((side, 0, side + 6, CARD_SIZE[1]), fill=ACCENT)
+
+    y = 90
+    brand = (product.get('brand') or 'Perla Negra').upper()
+    draw.text((PANEL_X, y), brand, font=load_font(BODY_FONT, 26), fill=MUTED)
+    y += 60
+
+    # El tamaño más grande con el que el nombre entra en TITLE_MAX_LINES líneas
+    for size in TITLE_SIZES:
+        title_font = load_font(TITLE_FONT, size)
+        lines = wrap(draw, product['name'], title_font, PANEL_WIDTH)
+        if len(lines) <= TITLE_MAX_LINES:
+            break
+    if len(lines) > TITLE_MAX_LINES:
+        lines = lines[:TITLE_MAX_LINES]
+        lines[-1] = lines[-1].rstrip('.,;:') + '…'
+    for line in lines:
+        draw.text((PANEL_X, y), line, font=title_font, fill=TEXT)
+        y += int(size * 1.25)
+
+    if product.get('price') is not None:
+        draw.text((PANEL_X, max(y + 30, 400)), format_price(product['price']), font=load_font(BODY_FONT, 48),
+                  fill=ACCENT)
+    draw.text((PANEL_X, CARD_SIZE[1] - 80), 'Perla Negra', font=load_font(TITLE_FONT, 28), fill=MUTED)
+
+    card.save(out_path, 'JPEG', quality=QUALITY, optimize=True, progressive=True)
+    return out_path
+
+
+# --- batch ---
+
+def fonts_digest():
+    digest = hashlib.sha256()
+    for path in (TITLE_FONT, BODY_FONT):
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def card_key(product, image_etag, fonts):
+    inputs = [LAYOUT_VERSION, fonts, product['name'], product.get('brand'), product.get('price'),
+              product['image_url'], image_etag]
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()[:10]
+
+
+def load_cache():
+    if not os.path.exists(CACHE_PATH):
+        return {}
+    with open(CACHE_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_cache(cache):
+    tmp = CACHE_PATH + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp, CACHE_PATH)
+
+
+def image_etag(url):
+    """ETag (o Last-Modified / tamaño) de la foto, sin bajarla. None si no está."""
+    from rate_control import request_with_retry
+    from upload_batch import LIMITER, session
+
+    try:
+        r = request_with_retry('HEAD', url, limiter=LIMITER, session=session())
+    except Exception as e:
+        print(f"❌ HEAD {url}: {e}")
+        return None
+    if r.status_code != 200:
+        print(f"⚠️ {url}: HTTP {r.status_code}")
+        return None
+    return r.headers.get('ETag') or r.headers.get('Last-Modified') or r.headers.get('Content-Length') or ''
+
+
+def download(url):
+    from rate_control import request_with_retry
+    from upload_batch import LIMITER, session
+
+    r = request_with_retry('GET', url, limiter=LIMITER, session=session())
+    r.raise_for_status()
+    return r.content
+
+
+def render_all(stale, workers=None):
+    """Baja las fotos (hilos) y renderiza (procesos). Devuelve {slug: archivo} de las que salieron bien."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from rate_control import run_concurrent
+    from upload_batch import LIMITER
+
+    def fetch(item):
+        try:
+            return download(item[0]['image_url'])
+        except Exception as e:
+            print(f"❌ {item[0]['slug']}: no se pudo bajar {item[0]['image_url']}: {e}")
+            return None
+
+    images = run_concurrent(stale, fetch, LIMITER)
+    os.makedirs(CARDS_DIR, exist_ok=True)
+    rendered = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for (product, key), image in zip(stale, images):
+            if image is None:
+                continue
+            filename = f"{product['slug']}.{key}.jpg"
+            futures[pool.submit(render_card, product, image, os.path.join(CARDS_DIR, filename))] = (product, filename)
+        for future in as_completed(futures):
+            product, filename = futures[future]
+            try:
+                future.result()
+                rendered[product['slug']] = filename
+                print(f"🎨 {product['slug']} -> {filename}")
+            except Exception as e:
+                print(f"❌ {product['slug']}: {e}")
+    return rendered
+
+
+def publish(slug, filename):
+    """Sube la card y apunta products.og_image_url a ella. Devuelve la URL o None."""
+    from image_release import rest
+    from upload_batch import public_url, upload_file
+
+    if not upload_file(filename, CARDS_DIR, CARD_PREFIX, content_type='image/jpeg'):
+        return None
+    url = public_url(CARD_PREFIX + filename)
+    try:
+        rows = rest('PATCH', 'products', params={'slug': f"eq.{slug}"}, json={'og_image_url': url})
+    except Exception as e:
+        print(f"❌ {slug}: og_image_url no actualizado: {e}")
+        return None
+    if not rows:
+        print(f"⚠️ Slug no encontrado en DB: {slug}")
+        return None
+    return url
+
+
+def main():
+    from rate_control import run_concurrent
+    from products_snapshot import open_snapshot
+    from supabase_config import credentials
+    from upload_batch import LIMITER
+
+    parser = argparse.ArgumentParser(description="Cards Open Graph 1200x630 por producto (solo las que cambiaron)")
+    parser.add_argument('--slug', action='append', help="Solo estos slugs (repetible)")
+    parser.add_argument('--force', action='store_true', help="Re-renderizar todo, ignorando el cache")
+    parser.add_argument('--dry-run', action='store_true', help="Listar qué cards cambiarían, sin renderizar")
+    parser.add_argument('--no-upload', action='store_true', help=f"Solo renderizar en {CARDS_DIR}/")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos de render (default: CPUs)")
+    args = parser.parse_args()
+
+    snapshot = open_snapshot(*credentials())
+    products = [p for p in snapshot.all(['slug', 'name', 'brand', 'price', 'image_url'])
+                if p['slug'] and p['name'] and p['image_url'] and (not args.slug or p['slug'] in args.slug)]
+    snapshot.close()
+
+    etags = run_concurrent(products, lambda p: image_etag(p['image_url']), LIMITER)
+    fonts = fonts_digest()
+    cache = load_cache()
+    stale = [(p, card_key(p, etag, fonts)) for p, etag in zip(products, etags) if etag is not None]
+    stale = [(p, key) for p, key in stale if args.force or cache.get(p['slug'], {}).get('key') != key]
+    print(f"🃏 {len(products)} productos, {len(stale)} card(s) para renderizar")
+    if args.dry_run or not stale:
+        for product, key in stale:
+            print(f"   {product['slug']} ({key})")
+        return 0
+
+    rendered = render_all(stale, args.workers)
+    keys = {p['slug']: key for p, key in stale}
+    if args.no_upload:
+        print(f"📂 {len(rendered)} card(s) en {os.path.abspath(CARDS_DIR)} (sin subir)")
+        return 0 if len(rendered) == len(stale) else 1
+
+    published = run_concurrent(list(rendered.items()), lambda item: publish(*item), LIMITER)
+    for (slug, filename), url in zip(rendered.items(), published):
+        if url:
+            previous = cache.get(slug)
+            if previous and previous['key'] != keys[slug]:
+                # La versión vieja sigue en el bucket (previews ya compartidos); la copia local sobra
+                stale_file = os.path.join(CARDS_DIR, f"{slug}.{previous['key']}.jpg")
+                if os.path.exists(stale_file):
+                    os.remove(stale_file)
+            cache[slug] = {'key': keys[slug], 'url': url}
+    save_cache(cache)
+    done = sum(1 for url in published if url)
+    print(f"\n✨ {done}/{len(stale)} card(s) publicadas")
+    return 0 if done == len(stale) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,102 +1,228 @@
 #!/usr/bin/env python3
 """
-Optimize hero images for mobile performance.
+Build the hero image set in public/hero from the masters in hero_masters/.
 
-Target:
-- Mobile: 720px width (9:16 aspect ratio = 1280px height)
-- Quality: 78 (balance between size and visual quality)
-- Format: WebP
+Every output is derived from the master (never from a previous output), so
+reruns don't compound generation loss. Each master is decoded once and all
+variants come from that decode:
 
-Expected savings: ~30-40% file size reduction
+- Desktop: {name}.webp at the master's framing (max 1920px wide)
+- Mobile:  {name}-mobile.webp, center crop 9:16 at 720x1280
+
+An output is never upscaled: if the master (or its 9:16 crop) is smaller
+than the output, that output is skipped and the file already in public/hero
+is left as it is. Intermediate widths ({name}-{w}w.webp,
+{name}-mobile-{w}w.webp) are only built for the widths listed in
+DESKTOP_WIDTHS / MOBILE_WIDTHS, which stay empty until HomePage gets a
+srcset that uses them.
+
+Outputs whose master hash and encode settings match hero_masters/manifest.json
+are skipped, so a rerun with nothing changed does no encoding at all. The
+manifest also records the WebP mode encode_mode.py picked for each output.
+
+If a master is missing, the current desktop {name}.webp is copied into
+hero_masters/ once to seed it (the best-quality file we have today). Such a
+master is already lossy: when it is a WebP at the desktop size, {name}.webp
+is copied through byte for byte instead of re-encoded (mode "copy" in the
+manifest), so only the resized variants pay one more generation. Dropping a
+lossless original (PNG/TIFF) next to it takes precedence and re-encodes all.
 """
 
-import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ImageOps
+
+from encode_mode import encode
+from filenames import output_name
 
 # Configuration
 HERO_DIR = Path("public/hero")
+MASTERS_DIR = Path("hero_masters")
+MANIFEST_PATH = MASTERS_DIR / "manifest.json"
+MASTER_EXTENSIONS = ('.png', '.tif', '.tiff', '.jpg', '.jpeg', '.webp')
+
+HERO_NAMES = ['silk', 'feather', 'glass', 'liquid', 'smoke']
+
+DESKTOP_MAX_WIDTH = 1920
+DESKTOP_WIDTHS = []  # p.ej. [640, 1024, 1280], junto con el srcset en HomePage
+DESKTOP_QUALITY = 80
+
 MOBILE_TARGET_WIDTH = 720
 MOBILE_TARGET_HEIGHT = 1280
-DESKTOP_TARGET_WIDTH = 1920
-DESKTOP_TARGET_HEIGHT = 1080
-QUALITY = 78
-
-def optimize_image(input_path, output_path, target_width, target_height, quality=QUALITY):
-    """Resize and compress image to target dimensions."""
-    print(f"\n📷 Processing: {input_path.name}")
-    
-    # Open image
-    img = Image.open(input_path)
-    original_size = input_path.stat().st_size / 1024  # KB
-    
-    print(f"   Original: {img.width}x{img.height} - {original_size:.2f} KB")
-    
-    # Resize if needed
-    if img.width != target_width or img.height != target_height:
-        img = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
-        print(f"   Resized to: {target_width}x{target_height}")
-    
-    # Save with WebP compression
-    img.save(output_path, 'WEBP', quality=quality, method=6)
-    
-    new_size = output_path.stat().st_size / 1024  # KB
-    savings = ((original_size - new_size) / original_size) * 100
-    
-    print(f"   New size: {new_size:.2f} KB")
-    print(f"   ✅ Saved: {original_size - new_size:.2f} KB ({savings:.1f}% reduction)")
-    
-    return original_size, new_size
+MOBILE_WIDTHS = []   # p.ej. [360, 540]
+MOBILE_QUALITY = 78
+
+# method=6 es el más lento y casi no mejora a method=4; con el skip incremental solo se paga al cambiar un master
+WEBP_METHOD = 4
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_manifest():
+    if MANIFEST_PATH.exists():
+        return json.loads(MANIFEST_PATH.read_text())
+    return {}
+
+
+def save_manifest(manifest):
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+
+
+def find_master(name):
+    for ext in MASTER_EXTENSIONS:
+        candidate = MASTERS_DIR / f"{name}{ext}"
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def seed_master(name):
+    """Copia el desktop actual como master si todavía no hay uno (solo la primera vez)."""
+    current = HERO_DIR / f"{name}.webp"
+    if not current.exists():
+        return None
+    MASTERS_DIR.mkdir(parents=True, exist_ok=True)
+    master = MASTERS_DIR / f"{name}.webp"
+    shutil.copy2(current, master)
+    print(f"   🌱 Master seeded from {current}")
+    return master
+
+
+def center_crop_size(size, ratio):
+    """(ancho, alto) del recorte central de `size` con relación ancho/alto `ratio`."""
+    width, height = size
+    if width / height > ratio:
+        return int(height * ratio), height
+    return width, int(width / ratio)
+
+
+def center_crop(img, ratio):
+    """Recorta al centro para llegar a la relación ancho/alto `ratio`."""
+    width, height = img.size
+    new_width, new_height = center_crop_size(img.size, ratio)
+    left, top = (width - new_width) // 2, (height - new_height) // 2
+    return img.crop((left, top, left + new_width, top + new_height))
+
+
+def plan_outputs(name, size):
+    """
+    (salidas, salteadas) para un master de tamaño `size`: listas de (archivo, variante, ancho, alto,
+    calidad). Se saltean las que necesitarían agrandar el master o su recorte 9:16.
+    """
+    width, height = size
+    desktop_width = min(width, DESKTOP_MAX_WIDTH)
+    outputs = [(output_name(name), 'desktop', desktop_width, round(height * desktop_width / width), DESKTOP_QUALITY)]
+    for w in DESKTOP_WIDTHS:
+        if w < desktop_width:
+            outputs.append((output_name(name, width=w), 'desktop', w, round(height * w / width), DESKTOP_QUALITY))
+
+    outputs.append((output_name(name, mobile=True), 'mobile', MOBILE_TARGET_WIDTH, MOBILE_TARGET_HEIGHT, MOBILE_QUALITY))
+    for w in MOBILE_WIDTHS:
+        outputs.append((output_name(name, mobile=True, width=w), 'mobile', w,
+                        round(w * MOBILE_TARGET_HEIGHT / MOBILE_TARGET_WIDTH), MOBILE_QUALITY))
+
+    crop_width, crop_height = center_crop_size(size, MOBILE_TARGET_WIDTH / MOBILE_TARGET_HEIGHT)
+    fits = [o for o in outputs if o[1] == 'desktop' or (o[2] <= crop_width and o[3] <= crop_height)]
+    return fits, [o for o in outputs if o not in fits]
+
+
+def settings_key(variant, width, height, quality):
+    return f"{variant}:{width}x{height}:q{quality}:m{WEBP_METHOD}"
+
+
+def build_hero(name, manifest, force=False):
+    master = find_master(name) or seed_master(name)
+    if not master:
+        print(f"⚠️ Skipping {name}: no master in {MASTERS_DIR} and no {name}.webp to seed from.")
+        return 0, 0
+
+    master_hash = file_hash(master)
+    entries = manifest.setdefault(name, {})
+
+    with Image.open(master) as probe:
+        outputs, skipped = plan_outputs(name, ImageOps.exif_transpose(probe).size)
+    for filename, _, width, height, _ in skipped:
+        # Sin master más grande, el archivo publicado se queda como está
+        print(f"   ⏭️ {name}: {filename} ({width}x{height}) agrandaría el master, se conserva el actual")
+        entries.pop(filename, None)
+
+    pending = [
+        o for o in outputs
+        if force
+        or not (HERO_DIR / o[0]).exists()
+        or {k: entries.get(o[0], {}).get(k) for k in ("master", "settings")}
+        != {"master": master_hash, "settings": settings_key(*o[1:])}
+    ]
+    if not pending:
+        print(f"✅ {name}: up to date ({len(outputs)} outputs)")
+        return 0, len(outputs)
+
+    print(f"\n📷 {name}: {master.name} -> {len(pending)}/{len(outputs)} outputs")
+
+    # Un único decode por master; todas las variantes salen de acá
+    with Image.open(master) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.load()
+        mobile_source = center_crop(img, MOBILE_TARGET_WIDTH / MOBILE_TARGET_HEIGHT)
+
+        for filename, variant, width, height, quality in pending:
+            source = img if variant == 'desktop' else mobile_source
+            out = source if source.size == (width, height) else source.resize((width, height), Image.Resampling.LANCZOS)
+            out_path = HERO_DIR / filename
+            if master.suffix == '.webp' and variant == 'desktop' and out.size == img.size:
+                # El master ya es un WebP con pérdida de este tamaño: re-encodearlo solo suma pérdida
+                data, mode = master.read_bytes(), 'copy'
+            else:
+                data, mode = encode(out, quality, WEBP_METHOD)
+            out_path.write_bytes(data)
+            entries[filename] = {"master": master_hash, "settings": settings_key(variant, width, height, quality),
+                                 "mode": mode}
+            print(f"   ✅ {filename} ({width}x{height}, {mode}) {len(data) / 1024:.2f} KB")
+
+    # Salidas que ya no forman parte del plan (p.ej. se quitó un ancho) dejan de figurar en el manifest
+    for stale in set(entries) - {o[0] for o in outputs}:
+        del entries[stale]
+
+    return len(pending), len(outputs) - len(pending)
+
 
 def main():
-    print("🚀 Hero Image Optimization Script")
-    print("=" * 50)
-    
-    # Check if Pillow is installed
-    try:
-        from PIL import Image
-    except ImportError:
-        print("❌ Error: Pillow not installed")
-        print("   Run: pip install Pillow")
-        return
-    
-    # Get all hero images
-    mobile_images = list(HERO_DIR.glob("*-mobile.webp"))
-    desktop_images = [img for img in HERO_DIR.glob("*.webp") if "-mobile" not in img.name]
-    
-    print(f"\n📊 Found {len(mobile_images)} mobile + {len(desktop_images)} desktop images")
-    
-    total_original = 0
-    total_optimized = 0
-    
-    # Optimize mobile images
-    print("\n" + "=" * 50)
-    print("MOBILE IMAGES (720x1280)")
+    parser = argparse.ArgumentParser(description="Build public/hero from hero_masters/")
+    parser.add_argument('names', nargs='*', default=HERO_NAMES, help="Heroes a construir (default: todos)")
+    parser.add_argument('--force', action='store_true', help="Re-encodear aunque esté al día")
+    args = parser.parse_args()
+
+    print("🚀 Hero Image Build")
     print("=" * 50)
-    
-    for img_path in sorted(mobile_images):
-        backup_path = img_path.with_suffix('.webp.backup')
-        
-        # Create backup if it doesn't exist
-        if not backup_path.exists():
-            import shutil
-            shutil.copy2(img_path, backup_path)
-            print(f"   💾 Backup created: {backup_path.name}")
-        
-        orig, new = optimize_image(img_path, img_path, MOBILE_TARGET_WIDTH, MOBILE_TARGET_HEIGHT)
-        total_original += orig
-        total_optimized += new
-    
-    # Summary
+
+    HERO_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest()
+
+    built = skipped = 0
+    for name in args.names:
+        b, s = build_hero(name, manifest, force=args.force)
+        built += b
+        skipped += s
+
+    if MASTERS_DIR.exists():
+        save_manifest(manifest)
+
     print("\n" + "=" * 50)
-    print("📊 OPTIMIZATION SUMMARY")
-    print("=" * 50)
-    print(f"Total original size: {total_original:.2f} KB")
-    print(f"Total optimized size: {total_optimized:.2f} KB")
-    print(f"Total savings: {total_original - total_optimized:.2f} KB ({((total_original - total_optimized) / total_original) * 100:.1f}%)")
-    print(f"\n✅ Optimization complete!")
-    print(f"   Backups saved with .backup extension")
-    print(f"   To rollback: rename .webp.backup files back to .webp")
+    print(f"✨ Built {built} outputs, {skipped} already up to date.")
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Image byte budgets per rendition and per page template, from the real files.
+
+PERFORMANCE.md has LCP/FCP targets but nothing stopped a bad re-encode from
+doubling a page. This adds up what each template downloads, with the sizes
+of the files the pipeline actually produced:
+
+    home    LCP hero (HERO_NAMES[0]-mobile.webp, the static shell) + the
+            desktop carousel ({name}.webp for every hero), public/hero/
+    grid    grid_size slot-1 thumbnails (slug-min.webp, the only one
+            ProductCard renders), the heaviest ones: the worst category
+            page that can be built from the catalog
+    detail  per product: main image + the -min of every slot when the
+            gallery shows (2+ images); the heaviest product is reported
+
+and checks every rendition (main, thumb, hero, hero-mobile) and every page
+against scripts/page_budgets.json (KB). Files that were already published
+above their rendition budget are listed under "exceptions" with their own
+cap, so they can't grow while new files are held to the budget. image_release publish and run_jobs
+upload call it before uploading anything and stop when something is over
+budget (--skip-budget to ship anyway).
+
+Usage:
+    python scripts/page_budget.py [optimized_batch] [--hero-dir public/hero] [--grid 12]
+"""
+
+import os
+import sys
+import json
+import argparse
+
+from filenames import output_name, parse_output
+
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'page_budgets.json')
+HERO_DIR = 'public/hero'
+KB = 1024
+
+
+def load_budgets(path=BUDGETS_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def rendition_kind(filename, hero=False):
+    parsed = parse_output(filename)
+    if parsed is None:
+        return None
+    if hero:
+        return 'hero-mobile' if parsed.mobile else 'hero'
+    return 'thumb' if parsed.thumb else 'main'
+
+
+def over_budget(paths, budgets=None, hero=False):
+    """[(archivo, bytes, límite)] de los archivos que pasan el budget de su rendition (o su excepción)."""
+    budgets = budgets or load_budgets()
+    limits, exceptions = budgets['renditions'], budgets.get('exceptions', {})
+    problems = []
+    for path in paths:
+        name = os.path.basename(path)
+        kind = rendition_kind(name, hero)
+        limit = exceptions.get(name, limits.get(kind))
+        if limit is not None and os.path.getsize(path) > limit * KB:
+            problems.append((name, os.path.getsize(path), limit * KB))
+    return problems
+
+
+def page_weights(directory, hero_dir=HERO_DIR, grid_size=12):
+    """{página: (bytes, detalle)} para home, grid y detail."""
+    from optimize_hero_images import HERO_NAMES
+
+    pages = {}
+    if os.path.isdir(hero_dir):
+        files = [output_name(HERO_NAMES[0], mobile=True)] + [output_name(name) for name in HERO_NAMES]
+        present = [f for f in files if os.path.exists(os.path.join(hero_dir, f))]
+        pages['home'] = (sum(os.path.getsize(os.path.join(hero_dir, f)) for f in present),
+                         f"{len(present)} heroes")
+
+    sizes = {}   # slug -> {índice: {'main': bytes, 'thumb': bytes}}
+    thumbs = []
+    for filename in os.listdir(directory) if os.path.isdir(directory) else []:
+        parsed = parse_output(filename)
+        if parsed is None or parsed.mobile or parsed.width:
+            continue
+        size = os.path.getsize(os.path.join(directory, filename))
+        sizes.setdefault(parsed.slug, {}).setdefault(parsed.index, {})['thumb' if parsed.thumb else 'main'] = size
+        if parsed.thumb and parsed.index == 1:  # ProductCard solo muestra el slot 1
+            thumbs.append(size)
+
+    if thumbs:
+        heaviest = sorted(thumbs, reverse=True)[:grid_size]
+        pages['grid'] = (sum(heaviest), f"{len(heaviest)} thumbnails de slot 1 más pesados")
+
+    worst = None
+    for slug, slots in sizes.items():
+        total = slots.get(1, {}).get('main', 0)
+        if len(slots) > 1:
+            total += sum(slot.get('thumb', 0) for slot in slots.values())
+        if worst is None or total > worst[0]:
+            worst = (total, slug)
+    if worst:
+        pages['detail'] = (worst[0], f"peor producto: {worst[1]}")
+    return pages
+
+
+def check(directory, hero_dir=HERO_DIR, budgets=None, grid_size=None, verbose=True):
+    """Renditions + páginas contra el budget. True si todo entra."""
+    budgets = budgets or load_budgets()
+    grid_size = grid_size or budgets.get('grid_size', 12)
+
+    files = [os.path.join(directory, f) for f in sorted(os.listdir(directory))] if os.path.isdir(directory) else []
+    problems = over_budget(files, budgets)
+    if os.path.isdir(hero_dir):
+        problems += over_budget([os.path.join(hero_dir, f) for f in sorted(os.listdir(hero_dir))], budgets, hero=True)
+    pages = page_weights(directory, hero_dir, grid_size)
+    over_pages = [(page, size, budgets['pages'][page] * KB) for page, (size, _) in pages.items()
+                  if page in budgets['pages'] and size > budgets['pages'][page] * KB]
+
+    if verbose:
+        print(f"⚖️  Budget de imágenes ({directory}, {hero_dir})")
+        for page, (size, detail) in pages.items():
+            limit = budgets['pages'].get(page)
+            mark = '❌' if limit and size > limit * KB else '✅'
+            print(f"   {mark} {page:<7} {size / KB:8.1f} KB / {limit or '-'} KB  ({detail})")
+        for name, size, limit in problems:
+            print(f"   ❌ {name}: {size / KB:.1f} KB > {limit / KB:.0f} KB")
+        if problems or over_pages:
+            print(f"🛑 {len(problems)} rendition(s) y {len(over_pages)} página(s) fuera de budget "
+                  f"(budgets: {os.path.relpath(BUDGETS_PATH)})")
+    return not problems and not over_pages
+
+
+def main():
+    from upload_batch import OPTIMIZED_DIR
+
+    parser = argparse.ArgumentParser(description="Budget de bytes de imágenes por rendition y por página")
+    parser.add_argument('directory', nargs='?', default=OPTIMIZED_DIR)
+    parser.add_argument('--hero-dir', default=HERO_DIR)
+    parser.add_argument('--budgets', default=BUDGETS_PATH, help="JSON de budgets (KB)")
+    parser.add_argument('--grid', type=int, default=None, help="Thumbnails por página de grilla (default: el del JSON)")
+    args = parser.parse_args()
+
+    ok = check(args.directory, args.hero_dir, load_budgets(args.budgets), args.grid)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the catalog scripts.
+
+    python scripts/perla.py <command> [args...]
+    python scripts/perla.py bench [--runs 10] [command ...]
+
+Each command maps to a module:function that is imported only when that
+command runs, so `verify` never pays for Pillow and `rename` never pays for
+requests. Config (.env, credentials, the shared requests.Session) comes from
+supabase_config, which is stdlib-only until a request is actually made.
+
+`bench` measures startup per command: it spawns the interpreter with
+--import-only (import + resolve the entry point, no work) and reports the
+median wall time and which heavy modules got pulled in.
+"""
+
+import sys
+import time
+
+# comando -> (módulo, función, descripción)
+COMMANDS = {
+    'process': ('process_batch', 'main', "raw_batch -> optimized_batch (normaliza, recorta, WebP)"),
+    'upload': ('upload_batch', 'main', "publica optimized_batch como release y lo activa (sin downtime)"),
+    'release': ('image_release', 'main', "releases blue/green: publish, verify, activate, rollback, gc"),
+    'relink': ('image_release', 'relink_main', "re-linkea products a un release verificado (= release activate <id>)"),
+    'verify': ('verify_integrity', 'main', "slugs de la DB vs imágenes en optimized_batch"),
+    'diagnose': ('diagnose_images', 'main', "estado de las imágenes de uno o más slugs"),
+    'sizes': ('update_sizes', 'main', "actualiza size_ml / size_fl_oz"),
+    'rename': ('fix_filenames', 'main', "normaliza nombres de archivo en raw_batch"),
+    'watch': ('watch_raw', 'main', "procesa, sube y re-linkea lo que cae en raw_images"),
+    'jobs': ('run_jobs', 'main', "ejecuta un job spec de scripts/jobs (hotfixes)"),
+    'snapshot': ('products_snapshot', 'main', "refresca el snapshot SQLite de products"),
+    'hero': ('optimize_hero_images', 'main', "build de public/hero desde hero_masters"),
+    'fonts': ('subset_fonts', 'main', "subsetting WOFF2 según el catálogo"),
+    'lighthouse': ('lighthouse_history', 'main', "historial de Lighthouse y regresiones"),
+    'reconcile': ('reconcile_renditions', 'main', "regenera y sube los thumbnails que faltan en el bucket"),
+    'serve': ('image_server', 'main', "renditions a pedido /{slug}?w=&q=&fmt= con cache LRU (dev / QA)"),
+    'budget': ('page_budget', 'main', "bytes de imágenes por rendition y por página vs page_budgets.json"),
+    'sitemap': ('sitemap', 'main', "public/sitemap.xml con imágenes desde products (incremental)"),
+    'og': ('og_cards', 'main', "cards Open Graph 1200x630 por producto (solo las que cambiaron)"),
+    'hot': ('access_log', 'main', "ranking de imágenes por tráfico desde logs de acceso"),
+}
+
+HEAVY_MODULES = ('requests', 'PIL', 'numpy', 'fontTools', 'brotli')
+BENCH_RUNS = 10
+
+
+def usage():
+    lines = ["Uso: python scripts/perla.py <comando> [args...]", "", "Comandos:"]
+    lines += [f"  {name:<12} {desc}" for name, (_, _, desc) in COMMANDS.items()]
+    lines += [f"  {'bench':<12} mide el arranque de cada comando (--runs N, comandos opcionales)"]
+    print("\n".join(lines))
+
+
+def resolve(command):
+    import importlib
+
+    module_name, func_name, _ = COMMANDS[command]
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def bench(args):
+    import json
+    import subprocess
+    from statistics import median
+
+    runs = BENCH_RUNS
+    if args[:1] == ['--runs']:
+        runs, args = int(args[1]), args[2:]
+    commands = args or list(COMMANDS)
+
+    def measure(argv):
+        times = []
+        output = ''
+        for _ in range(runs):
+            started = time.perf_counter()
+            output = subprocess.run(argv, capture_output=True, text=True, check=True).stdout
+            times.append((time.perf_counter() - started) * 1000)
+        return median(times), output
+
+    interpreter, _ = measure([sys.executable, '-c', 'pass'])
+    print(f"⏱️  Arranque (mediana de {runs}); intérprete vacío: {interpreter:.0f} ms\n")
+    print(f"   {'Comando':<12} {'Total':>8} {'Propio':>8}  Módulos pesados")
+    for command in commands:
+        total, output = measure([sys.executable, __file__, '--import-only', command])
+        heavy = json.loads(output or '[]')
+        print(f"   {command:<12} {total:>6.0f}ms {total - interpreter:>6.0f}ms  {', '.join(heavy) or '-'}")
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help', 'help'):
+        usage()
+        return 0
+
+    if argv[0] == 'bench':
+        return bench(argv[1:])
+
+    if argv[0] == '--import-only':
+        # Usado por bench: importar y resolver el entry point, sin ejecutarlo
+        resolve(argv[1])
+        import json
+        print(json.dumps([m for m in HEAVY_MODULES if m in sys.modules]))
+        return 0
+
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"❌ Comando desconocido: {command}\n")
+        usage()
+        return 2
+
+    entry = resolve(command)
+    # Los scripts parsean sys.argv por su cuenta
+    sys.argv = [f"perla.py {command}"] + rest
+    return entry() or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
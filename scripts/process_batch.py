@@ -1,8 +1,20 @@
+import io
 import os
-import re
-from PIL import Image
+import argparse
+from PIL import Image, ImageCms, ImageOps
 from pathlib import Path
 
+import profiling
+from encode_mode import encode
+from filenames import output_name, parse_source
+from image_scheduler import MemoryScheduler, plan_decode, open_planned
+from profiling import stage
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # Configuración
 SOURCE_DIR = r'C:/Users/Facu elias/Desktop/Program/perlaNegra/raw_batch'
 OUTPUT_DIR = 'optimized_batch'
@@ -10,74 +22,232 @@ OUTPUT_DIR = 'optimized_batch'
 # Filtros
 TARGET_WIDTH_MAIN = 1080  # Full HD width (aprox)
 TARGET_WIDTH_THUMB = 400  # Thumbnail width
-QUALITY = 85
+QUALITY = 85  # lossy; gráficos planos salen en palette / lossless si pesan menos (encode_mode.py)
+
+# Decode: nunca por debajo de esto por lado (margen para el trim antes de bajar a TARGET_WIDTH_MAIN)
+DECODE_TARGET = TARGET_WIDTH_MAIN * 2
+
+# Auto-trim de bordes uniformes + lienzo consistente para la grilla (las cards son aspect-square)
+TRIM_ENABLED = True
+TRIM_TOLERANCE = 18        # diferencia máx. por canal (0-255) para considerar un pixel "fondo"
+TRIM_MIN_COVERAGE = 0.01   # fracción de pixeles no-fondo para que una fila/columna cuente como producto
+TRIM_PADDING = 0.06        # margen alrededor del producto, relativo al lado mayor
+TRIM_ANALYSIS_SIZE = 256   # el análisis se hace sobre una miniatura, no sobre el original
+CANVAS_ASPECT = 1.0        # ancho / alto del lienzo final
+
+SRGB_PROFILE = ImageCms.createProfile('sRGB')
+METADATA_KEYS = ('exif', 'icc_profile', 'xmp', 'XML:com.adobe.xmp', 'photoshop', 'comment', 'dpi')
 
 def ensure_dir(path):
     if not os.path.exists(path):
         os.makedirs(path)
 
-def process_image(file_path, output_dir):
-    filename = os.path.basename(file_path)
+def normalize_image(img):
+    """
+    Deja la imagen lista para el resize sobre el mismo decode:
+    orientación EXIF aplicada, colores en sRGB, modo RGB y sin EXIF/XMP/ICC.
+    """
+    # 1. Orientación EXIF (fotos de celular / proveedor que salían rotadas)
+    img = ImageOps.exif_transpose(img)
 
-    # Security: Prevent ReDoS on long filenames
-    if len(filename) > 255:
-        print(f"⚠️ SKIPPED (Filename too long): {filename}")
-        return
+    # 2. ICC embebido (CMYK, Adobe RGB, Display P3...) -> sRGB
+    icc = img.info.get('icc_profile')
+    if icc:
+        try:
+            src_profile = ImageCms.ImageCmsProfile(io.BytesIO(icc))
+            mode = 'RGBA' if img.mode in ('RGBA', 'LA', 'PA') else 'RGB'
+            if img.mode not in ('RGB', 'RGBA', 'CMYK', 'L'):
+                img = img.convert(mode)
+            img = ImageCms.profileToProfile(img, src_profile, SRGB_PROFILE,
+                                            renderingIntent=ImageCms.Intent.PERCEPTUAL, outputMode=mode)
+        except (ImageCms.PyCMSError, OSError) as e:
+            print(f"   ⚠️ ICC inválido, se ignora: {e}")
 
-    # Regex para capturar slug e indice: "nombre-producto" + "1" + ".jpg"
-    # Soporta jpg, jpeg, png, etc.
-    match = re.match(r'^(.+?)-?(\d+)\.(jpg|jpeg|png|webp)$', filename, re.IGNORECASE)
-    
-    if not match:
+    # 3. Transparencias sobre blanco (convert('RGB') directo deja el fondo negro)
+    if img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info):
+        rgba = img.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        img = background
+    elif img.mode != 'RGB':
+        # CMYK sin perfil, P, L, I;16...
+        img = img.convert('RGB')
+
+    # 4. Metadatos fuera: no viajan a la salida WebP
+    for key in METADATA_KEYS:
+        img.info.pop(key, None)
+    return img
+
+def trim_box(img):
+    """
+    (left, top, right, bottom, color de fondo) del producto en coordenadas de img, o None si no hay
+    nada que recortar. El análisis es vectorizado sobre una miniatura.
+    """
+    if np is None:
+        return None
+
+    small = img.copy()
+    small.thumbnail((TRIM_ANALYSIS_SIZE, TRIM_ANALYSIS_SIZE), Image.Resampling.BILINEAR)
+    arr = np.asarray(small, dtype=np.int16)
+    h, w = arr.shape[:2]
+    if h < 8 or w < 8:
+        return None
+
+    # Color de fondo = mediana del borde de 2px
+    border = np.concatenate([arr[:2].reshape(-1, 3), arr[-2:].reshape(-1, 3),
+                             arr[:, :2].reshape(-1, 3), arr[:, -2:].reshape(-1, 3)])
+    background = np.median(border, axis=0)
+    # Si el borde no es uniforme (foto con fondo real), no hay nada que recortar
+    if np.mean(np.abs(border - background).max(axis=1) > TRIM_TOLERANCE) > 0.05:
+        return None
+
+    foreground = np.abs(arr - background).max(axis=2) > TRIM_TOLERANCE
+    rows = np.flatnonzero(foreground.mean(axis=1) > TRIM_MIN_COVERAGE)
+    cols = np.flatnonzero(foreground.mean(axis=0) > TRIM_MIN_COVERAGE)
+    if rows.size == 0 or cols.size == 0:
+        return None
+
+    # Bounding box en coordenadas del original (redondeando hacia afuera)
+    sx, sy = img.width / w, img.height / h
+    left = max(0, int(cols[0] * sx))
+    top = max(0, int(rows[0] * sy))
+    right = min(img.width, int(np.ceil((cols[-1] + 1) * sx)))
+    bottom = min(img.height, int(np.ceil((rows[-1] + 1) * sy)))
+    return left, top, right, bottom, background
+
+
+def trim_coverage(img):
+    """Fracción del cuadro que ocupa el producto (lado más ocupado); 1.0 si no hay recorte."""
+    box = trim_box(img)
+    if box is None:
+        return 1.0
+    left, top, right, bottom, _ = box
+    return max((right - left) / img.width, (bottom - top) / img.height)
+
+
+def trim_and_frame(img):
+    """
+    Recorta márgenes de fondo casi uniforme y centra el producto en un lienzo CANVAS_ASPECT
+    del color de fondo detectado.
+    """
+    box = trim_box(img)
+    if box is None:
+        return img
+    left, top, right, bottom, background = box
+    product = img.crop((left, top, right, bottom))
+
+    # Lienzo con la relación de aspecto de la grilla + padding
+    pad = int(max(product.size) * TRIM_PADDING)
+    canvas_w = product.width + 2 * pad
+    canvas_h = product.height + 2 * pad
+    if canvas_w / canvas_h < CANVAS_ASPECT:
+        canvas_w = int(round(canvas_h * CANVAS_ASPECT))
+    else:
+        canvas_h = int(round(canvas_w / CANVAS_ASPECT))
+
+    fill = tuple(int(c) for c in background)
+    canvas = Image.new('RGB', (canvas_w, canvas_h), fill)
+    canvas.paste(product, ((canvas_w - product.width) // 2, (canvas_h - product.height) // 2))
+    return canvas
+
+def save_webp(img, path):
+    # Encode y escritura por separado para que --profile distinga CPU de I/O
+    with stage('encode'):
+        data, _ = encode(img, QUALITY)
+    with stage('write'):
+        with open(path, 'wb') as f:
+            f.write(data)
+
+def process_image(file_path, output_dir, strategy='full'):
+    """Devuelve (slug, índice, archivo principal, thumbnail) o None si se saltó / falló."""
+    filename = os.path.basename(file_path)
+
+    # "nombre-producto" + "1" + ".jpg" (o "nombre-producto-1.jpg"); el parser es lineal, sin guard de longitud
+    parsed = parse_source(filename)
+    if not parsed:
         print(f"⚠️ SKIPPED (No format slug-N): {filename}")
         return
 
-    slug = match.group(1)
-    index = match.group(2)
-    
-    # Manejo de guiones extra al final del slug si el usuario puso "slug-1" en vez de "slug1"
-    # Si el regex capturó "mi-producto-" como slug y "1" como index.
-    if slug.endswith('-'):
-        slug = slug[:-1]
-
-    # Definir nombres de salida
-    if index == '1':
-        out_name_main = f"{slug}.webp"
-        out_name_thumb = f"{slug}-min.webp"
-    else:
-        out_name_main = f"{slug}-{index}.webp"
-        out_name_thumb = f"{slug}-{index}-min.webp"
+    slug, index = parsed.slug, parsed.index
+    out_name_main = output_name(slug, index)
+    out_name_thumb = output_name(slug, index, thumb=True)
 
     try:
-        with Image.open(file_path) as img:
-            # Convertir a RGB si es necesario (para PNGs transparentes o CMYK)
-            if img.mode in ('RGBA', 'P'):
-                img = img.convert('RGB')
-            
-            # 1. Main Image
-            img_main = img.copy()
-            # Resize si es muy grande
-            if img_main.width > TARGET_WIDTH_MAIN:
-                ratio = TARGET_WIDTH_MAIN / img_main.width
-                new_height = int(img_main.height * ratio)
-                img_main = img_main.resize((TARGET_WIDTH_MAIN, new_height), Image.Resampling.LANCZOS)
-            
-            img_main.save(os.path.join(output_dir, out_name_main), 'WEBP', quality=QUALITY)
-
-            # 2. Thumbnail
-            img_thumb = img.copy()
-            ratio_thumb = TARGET_WIDTH_THUMB / img_thumb.width
-            new_height_thumb = int(img_thumb.height * ratio_thumb)
-            img_thumb = img_thumb.resize((TARGET_WIDTH_THUMB, new_height_thumb), Image.Resampling.LANCZOS)
-            
-            img_thumb.save(os.path.join(output_dir, out_name_thumb), 'WEBP', quality=QUALITY)
-
-            print(f"✅ Processed: {filename} -> {out_name_main} & {out_name_thumb}")
-            
+        render(file_path, output_dir, out_name_main, out_name_thumb, strategy)
+        print(f"✅ Processed: {filename} -> {out_name_main} & {out_name_thumb}")
+        return slug, index, out_name_main, out_name_thumb
     except Exception as e:
         print(f"❌ ERROR processing {filename}: {e}")
+    finally:
+        profiling.flush()  # no-op sin --profile; en workers del pool vuelca los parciales
+
+def plan_source(path, budget):
+    """plan_decode con el target medido después del trim (lo que ocupa el producto en el cuadro)."""
+    return plan_decode(path, budget, DECODE_TARGET, coverage=trim_coverage if TRIM_ENABLED else None)
+
+def prepare(file_path, strategy='full', trim=TRIM_ENABLED):
+    """Decode + normalize (+ trim): la imagen de la que salen todas las renditions de una fuente."""
+    # strategy viene de plan_source: draft/reduce/vips para fuentes enormes, con el mismo target que el plan
+    with open_planned(file_path, strategy, DECODE_TARGET, coverage=trim_coverage if trim else None) as source:
+        with stage('decode'):
+            source.load()
+        # EXIF transpose + ICC a sRGB + RGB + sin metadatos, todo sobre este único decode
+        with stage('normalize'):
+            img = normalize_image(source)
+        if trim:
+            with stage('trim'):
+                img = trim_and_frame(img)
+        # Que sobreviva al close() del archivo
+        return img.copy() if img is source else img
+
+def resize_to_width(img, width):
+    """Copia de img con ese ancho (mantiene la proporción)."""
+    if img.width == width:
+        return img.copy()
+    with stage('resize'):
+        return img.resize((width, int(img.height * width / img.width)), Image.Resampling.LANCZOS)
+
+def render(file_path, output_dir, out_name_main, out_name_thumb=None, strategy='full', trim=TRIM_ENABLED):
+    """Pipeline de una fuente a WebP principal (+ thumbnail si out_name_thumb). Propaga los errores."""
+    img = prepare(file_path, strategy, trim)
+
+    # 1. Main Image (solo se achica si es muy grande)
+    img_main = resize_to_width(img, min(img.width, TARGET_WIDTH_MAIN))
+    save_webp(img_main, os.path.join(output_dir, out_name_main))
+
+    # 2. Thumbnail
+    if out_name_thumb:
+        img_thumb = resize_to_width(img, TARGET_WIDTH_THUMB)
+        save_webp(img_thumb, os.path.join(output_dir, out_name_thumb))
+    return out_name_main, out_name_thumb
+
+def hot_ranks(path):
+    """{(slug, índice): posición} del ranking de access_log.py; {} si no hay ranking."""
+    import json
+
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        objects = json.load(f).get('objects', [])
+    ranks = {}
+    for row in objects:
+        if row.get('slug'):
+            ranks.setdefault((row['slug'], row['index']), len(ranks))
+    return ranks
 
 def main():
+    parser = argparse.ArgumentParser(description="raw_batch -> optimized_batch")
+    parser.add_argument('--memory-budget', type=int, default=None,
+                        help="MB de RAM para decodes en paralelo (default: 60%% de la memoria disponible)")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos (default: CPUs)")
+    parser.add_argument('--profile', nargs='?', const='profile', default=None, metavar='DIR',
+                        help="cProfile + tracemalloc por stage; reportes en DIR (default: profile/)")
+    parser.add_argument('--hot', default='hot_images.json', metavar='FILE',
+                        help="Ranking de access_log.py: procesar primero las imágenes más calientes (si existe)")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable(args.profile)
+
     ensure_dir(OUTPUT_DIR)
     
     # Verificar Source
@@ -88,8 +258,35 @@ def main():
     files = [f for f in os.listdir(SOURCE_DIR) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
     print(f"Found {len(files)} images to process...")
 
+    scheduler = MemoryScheduler(args.memory_budget * 1024 * 1024 if args.memory_budget else None, args.workers)
+
+    # Solo headers: tamaño, formato y estrategia de decode de cada job antes de lanzar nada
+    jobs = []
     for file in files:
-        process_image(os.path.join(SOURCE_DIR, file), OUTPUT_DIR)
+        try:
+            jobs.append(plan_source(os.path.join(SOURCE_DIR, file), scheduler.budget))
+        except Exception as e:
+            print(f"❌ ERROR reading header {file}: {e}")
+    ranks = hot_ranks(args.hot)
+    if ranks:
+        for job in jobs:
+            parsed = parse_source(os.path.basename(job['path']))
+            job['priority'] = ranks.get((parsed.slug, parsed.index), len(ranks)) if parsed else len(ranks)
+        print(f"🔥 {sum(1 for job in jobs if job['priority'] < len(ranks))} fuentes calientes primero ({args.hot})")
+    strategies = {}
+    for job in jobs:
+        strategies[job['strategy']] = strategies.get(job['strategy'], 0) + 1
+    print(f"🧠 Budget {scheduler.budget / 2**20:.0f} MB, {scheduler.max_workers} workers; decode: "
+          + ', '.join(f"{n} {s}" for s, n in sorted(strategies.items())))
+
+    for job, _, error in scheduler.run(jobs, process_image, OUTPUT_DIR):
+        if error:
+            print(f"❌ ERROR processing {os.path.basename(job['path'])}: {error}")
+
+    print(f"📈 Pico reservado: {scheduler.stats['peak_reserved'] / 2**20:.0f} MB, "
+          f"{scheduler.stats['peak_in_flight']} en paralelo")
+    if args.profile:
+        profiling.report()
 
     print("\n✨ Batch processing complete!")
     print(f"📂 Output folder: {os.path.abspath(OUTPUT_DIR)}")
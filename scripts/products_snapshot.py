@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Local SQLite snapshot of the products table for the read-only scripts.
+
+refresh() pulls /rest/v1/products page by page with a Range header (so
+PostgREST's row cap never truncates the result) and only the columns in
+COLUMNS. After the first run it is incremental:
+
+- with products.updated_at (src/migrations/20261019_products_updated_at.sql)
+  it asks only for rows with updated_at >= the newest one already stored,
+  plus an id-only listing to drop rows deleted upstream;
+- without that column it falls back to a full pull guarded by ETag /
+  If-None-Match per page, so unchanged pages cost a 304 when the server (or
+  a proxy in front of it) sends ETags.
+
+Scripts then query the snapshot locally:
+
+    from products_snapshot import ProductsSnapshot
+    snapshot = ProductsSnapshot(SUPABASE_URL, SUPABASE_KEY)
+    snapshot.refresh()
+    slugs = snapshot.slugs()
+
+CLI: python scripts/products_snapshot.py [--full] [--max-age 300]
+"""
+
+import sys
+import json
+import time
+import sqlite3
+import argparse
+
+from rate_control import request_with_retry
+from supabase_config import credentials, get_session
+
+SNAPSHOT_PATH = '.products_snapshot.sqlite'
+PAGE_SIZE = 500
+# Proyección: solo lo que leen los scripts (sin description/ingredients/tips, que son lo pesado)
+COLUMNS = ['id', 'slug', 'name', 'brand', 'category', 'price', 'stock', 'active', 'image_url', 'image2_url',
+           'image3_url', 'size_ml', 'size_fl_oz', 'updated_at']
+
+
+class ProductsSnapshot:
+    def __init__(self, supabase_url, supabase_key, path=SNAPSHOT_PATH, columns=COLUMNS, session=None):
+        self.url = f"{supabase_url}/rest/v1/products"
+        self.headers = {"apikey": supabase_key, "Authorization": f"Bearer {supabase_key}"}
+        self.columns = list(columns)
+        self._session = session
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self._init_schema()
+
+    @property
+    def session(self):
+        # Sin red hasta el primer refresh real: un snapshot fresco (max_age) no importa requests
+        if self._session is None:
+            self._session = get_session()
+        return self._session
+
+    def _init_schema(self):
+        cols = ', '.join(f'"{c}"' for c in self.columns if c != 'id')
+        self.db.executescript(f"""
+            CREATE TABLE IF NOT EXISTS products (id PRIMARY KEY, {cols});
+            CREATE INDEX IF NOT EXISTS idx_products_slug ON products (slug);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        existing = {row[1] for row in self.db.execute("PRAGMA table_info(products)")}
+        added = [column for column in self.columns if column not in existing]
+        for column in added:
+            self.db.execute(f'ALTER TABLE products ADD COLUMN "{column}"')
+        if added:
+            # Las filas ya guardadas no traen la columna nueva: el próximo refresh es completo
+            self.db.execute("DELETE FROM meta WHERE key IN ('max_updated_at', 'page_etags')")
+        self.db.commit()
+
+    # --- meta ---
+
+    def _get_meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self.db.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    # --- fetch ---
+
+    def _pages(self, params, columns, etags=None):
+        """
+        Genera (start, response, filas) página por página usando Range; se detiene en la primera
+        página incompleta. Con etags={start: (etag, n_filas)} manda If-None-Match y una página sin
+        cambios llega como 304 con filas=None.
+        """
+        start = 0
+        while True:
+            headers = dict(self.headers, **{"Range-Unit": "items", "Range": f"{start}-{start + PAGE_SIZE - 1}"})
+            known = (etags or {}).get(str(start))
+            if known:
+                headers["If-None-Match"] = known[0]
+            r = request_with_retry("GET", self.url, session=self.session, headers=headers,
+                                   params=dict(params, select=','.join(columns)))
+            if r.status_code == 304:
+                yield start, r, None
+                if known[1] < PAGE_SIZE:
+                    return
+                start += PAGE_SIZE
+                continue
+            r.raise_for_status()
+            rows = r.json()
+            yield start, r, rows
+            if len(rows) < PAGE_SIZE:
+                return
+            start += PAGE_SIZE
+
+    def _upsert(self, rows):
+        if not rows:
+            return
+        cols = [c for c in self.columns if c in rows[0]]
+        placeholders = ', '.join('?' for _ in cols)
+        updates = ', '.join(f'"{c}" = excluded."{c}"' for c in cols if c != 'id')
+        values = [tuple(json.dumps(row.get(c)) if isinstance(row.get(c), (dict, list)) else row.get(c)
+                        for c in cols) for row in rows]
+        quoted = ', '.join(f'"{c}"' for c in cols)
+        self.db.executemany(
+            f'INSERT INTO products ({quoted}) VALUES ({placeholders}) ON CONFLICT(id) DO UPDATE SET {updates}', values)
+
+    def refresh(self, full=False, max_age=0):
+        """
+        Sincroniza con PostgREST. max_age > 0: no hace nada si el último refresh es más reciente.
+        Devuelve la cantidad de filas que cambiaron (0 si no hubo cambios).
+        """
+        last_refresh = float(self._get_meta('last_refresh', 0))
+        if max_age and not full and time.time() - last_refresh < max_age:
+            return 0
+
+        import requests  # recién acá: un snapshot fresco no paga el import
+
+        has_updated_at = self._get_meta('has_updated_at') != 'false' and 'updated_at' in self.columns
+        since = None if full else self._get_meta('max_updated_at')
+
+        if has_updated_at:
+            try:
+                received = self._refresh_incremental(since)
+            except requests.HTTPError as e:
+                # 42703: la columna updated_at no existe todavía (migración sin aplicar)
+                if e.response is not None and e.response.status_code == 400 and '42703' in e.response.text:
+                    self._set_meta('has_updated_at', 'false')
+                    self.db.commit()
+                    self.columns.remove('updated_at')
+                    received = self._refresh_full(use_etags=not full)
+                else:
+                    raise
+        else:
+            if 'updated_at' in self.columns:
+                self.columns.remove('updated_at')
+            received = self._refresh_full(use_etags=not full)
+
+        self._set_meta('last_refresh', str(time.time()))
+        self.db.commit()
+        return received
+
+    def _refresh_incremental(self, since):
+        params = {"order": "updated_at.asc,id.asc"}
+        if since:
+            # gte + upsert: filas con el mismo timestamp que la última vista no se pierden
+            params["updated_at"] = f"gte.{since}"
+        received = 0
+        newest = since
+        for _, _, rows in self._pages(params, self.columns):
+            # gte vuelve a traer las filas de `since` que ya están guardadas: esas no cuentan como cambio
+            stored = dict(self.db.execute(
+                f"SELECT id, updated_at FROM products WHERE id IN ({', '.join('?' for _ in rows)})",
+                [r['id'] for r in rows])) if rows else {}
+            self._upsert(rows)
+            received += sum(1 for r in rows if r['id'] not in stored or stored[r['id']] != r.get('updated_at'))
+            stamps = [r['updated_at'] for r in rows if r.get('updated_at')]
+            if stamps:
+                newest = max([newest] + stamps) if newest else max(stamps)
+        if newest:
+            self._set_meta('max_updated_at', newest)
+
+        # Borrados upstream: listado liviano de ids
+        if since:
+            remote_ids = set()
+            for _, _, rows in self._pages({"order": "id.asc"}, ['id']):
+                remote_ids.update(r['id'] for r in rows)
+            local_ids = {row[0] for row in self.db.execute("SELECT id FROM products")}
+            stale = local_ids - remote_ids
+            if stale:
+                self.db.executemany("DELETE FROM products WHERE id = ?", [(i,) for i in stale])
+                received += len(stale)
+        return received
+
+    def _refresh_full(self, use_etags=True):
+        # ETag por página: {start: [etag, ids]}; una página 304 conserva sus filas locales
+        pages = json.loads(self._get_meta('page_etags', '{}')) if use_etags else {}
+        etags = {start: (entry[0], len(entry[1])) for start, entry in pages.items()}
+        received = 0
+        seen = set()
+        new_pages = {}
+        for start, response, rows in self._pages({"order": "id.asc"}, self.columns, etags=etags):
+            if rows is None:
+                ids = pages[str(start)][1]
+            else:
+                self._upsert(rows)
+                received += len(rows)
+                ids = [r['id'] for r in rows]
+            seen.update(ids)
+            if response.headers.get('ETag'):
+                new_pages[str(start)] = [response.headers['ETag'], ids]
+        self._set_meta('page_etags', json.dumps(new_pages))
+        self.db.executemany("DELETE FROM products WHERE id = ?",
+                            [(row[0],) for row in self.db.execute("SELECT id FROM products") if row[0] not in seen])
+        return received
+
+    # --- queries locales ---
+
+    def all(self, columns=None):
+        return list(self.rows(columns))
+
+    def rows(self, columns=None):
+        """Como all(), pero de a una fila desde el cursor (para catálogos grandes)."""
+        cols = ', '.join(f'"{c}"' for c in (columns or self.columns))
+        for row in self.db.execute(f"SELECT {cols} FROM products ORDER BY id"):
+            yield dict(row)
+
+    def slugs(self):
+        return {row[0] for row in self.db.execute("SELECT slug FROM products WHERE slug IS NOT NULL")}
+
+    def get(self, slug):
+        row = self.db.execute("SELECT * FROM products WHERE slug = ?", (slug,)).fetchone()
+        return dict(row) if row else None
+
+    def close(self):
+        self.db.close()
+
+
+def open_snapshot(supabase_url, supabase_key, max_age=0, full=False):
+    """Atajo para scripts: abre el snapshot y lo refresca (incremental) si hace falta."""
+    snapshot = ProductsSnapshot(supabase_url, supabase_key)
+    received = snapshot.refresh(full=full, max_age=max_age)
+    if received:
+        print(f"🔄 Snapshot de products: {received} fila(s) actualizada(s)")
+    return snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot local (SQLite) de la tabla products")
+    parser.add_argument('--full', action='store_true', help="Ignorar updated_at/ETag y traer todo")
+    parser.add_argument('--max-age', type=float, default=0, help="Segundos durante los que el snapshot se considera fresco")
+    args = parser.parse_args()
+
+    url, key = credentials()
+    started = time.perf_counter()
+    snapshot = ProductsSnapshot(url, key)
+    received = snapshot.refresh(full=args.full, max_age=args.max_age)
+    total = snapshot.db.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+    print(f"✅ {SNAPSHOT_PATH}: {total} productos ({received} con cambios) en {time.perf_counter() - started:.2f}s")
+    snapshot.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""
+Opt-in per-stage profiling for the image/upload pipeline.
+
+    from profiling import stage
+    with stage('resize'):
+        img = img.resize(...)
+
+Disabled (the default) stage() returns a shared nullcontext: no profiler, no
+tracemalloc, nothing allocated. Enabled with --profile (or PERLA_PROFILE=dir,
+which is how process-pool workers inherit it), every stage gets:
+
+- its own cProfile.Profile per thread (nested stages pause the outer one, so
+  time is attributed to the innermost stage)
+- the traced peak on every call, plus a tracemalloc snapshot diff (top
+  allocating lines) on one call in ALLOCATION_EVERY: a diff walks every live
+  trace and would otherwise dominate the run
+- wall time and call count
+- a sampling thread that records the Python stack of every thread inside a
+  stage, tagged with the stage name, for flamegraph.pl / speedscope
+
+Each process writes its partial results with flush(); report() merges them
+into {stage}.pstats, {stage}.txt, allocations.txt and stacks.collapsed.
+Note: Pillow's pixel buffers are allocated in C and don't show in tracemalloc.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import contextlib
+
+ENV_VAR = 'PERLA_PROFILE'
+SAMPLE_INTERVAL = 0.005   # 200 Hz
+TOP_ALLOCATIONS = 15
+TOP_FUNCTIONS = 30
+ALLOCATION_EVERY = 8      # snapshot diff en 1 de cada N llamadas por stage (compare_to es O(trazas))
+
+_directory = os.environ.get(ENV_VAR) or None
+_NULL = contextlib.nullcontext()
+_process = None
+
+
+def enable(directory='profile'):
+    """Activa el profiling en este proceso y en los workers que lance después."""
+    global _directory
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.startswith('partial-'):
+            os.remove(os.path.join(directory, name))
+    os.environ[ENV_VAR] = directory
+    _directory = directory
+
+
+def enabled():
+    return _directory is not None
+
+
+def stage(name):
+    if _directory is None:
+        return _NULL
+    return _Stage(name)
+
+
+class _ProcessState:
+    """Estado por proceso (se recrea tras un fork: el thread de muestreo no sobrevive)."""
+
+    def __init__(self):
+        import tracemalloc
+
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.profiles = {}      # (stage, thread) -> cProfile.Profile
+        self.running = set()    # perfiles habilitados ahora mismo (no se pueden volcar)
+        self.wall = {}
+        self.calls = {}
+        self.peaks = {}
+        self.allocations = {}   # stage -> {línea: [bytes, bloques]}
+        self.samples = {}
+        self.active = {}        # thread ident -> pila de stages
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        threading.Thread(target=self._sample, name='profiling-sampler', daemon=True).start()
+
+    def _sample(self):
+        me = threading.get_ident()
+        while True:
+            time.sleep(SAMPLE_INTERVAL)
+            frames = sys._current_frames()
+            with self.lock:
+                active = [(ident, stack[-1]) for ident, stack in self.active.items() if stack and ident != me]
+            for ident, name in active:
+                frame = frames.get(ident)
+                calls = []
+                while frame is not None:
+                    code = frame.f_code
+                    calls.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                key = ';'.join([name] + calls[::-1])
+                with self.lock:
+                    self.samples[key] = self.samples.get(key, 0) + 1
+
+
+def _state():
+    global _process
+    if _process is None or _process.pid != os.getpid():
+        _process = _ProcessState()
+    return _process
+
+
+class _Stage:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        import cProfile
+        import tracemalloc
+
+        state = _state()
+        ident = threading.get_ident()
+        stack = getattr(state.local, 'stack', None)
+        if stack is None:
+            stack = state.local.stack = []
+        if stack:
+            self._pause(state, stack[-1][1])
+
+        with state.lock:
+            profile = state.profiles.setdefault((self.name, ident), cProfile.Profile())
+            state.active.setdefault(ident, []).append(self.name)
+            sampled = state.calls.get(self.name, 0) % ALLOCATION_EVERY == 0
+        # Snapshot antes de habilitar el perfil: su costo no se atribuye al stage
+        self.before = tracemalloc.take_snapshot() if sampled else None
+        tracemalloc.reset_peak()
+        self.profile = self._resume(state, profile)
+        stack.append((self.name, self.profile))
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        import tracemalloc
+
+        elapsed = time.perf_counter() - self.started
+        state = _state()
+        self._pause(state, self.profile)
+        peak = tracemalloc.get_traced_memory()[1]
+        diff = tracemalloc.take_snapshot().compare_to(self.before, 'lineno') if self.before else []
+        # Sin las asignaciones del propio profiling (snapshots, este módulo)
+        own = (tracemalloc.__file__, __file__)
+        diff = [stat for stat in diff if stat.traceback[0].filename not in own]
+
+        with state.lock:
+            state.wall[self.name] = state.wall.get(self.name, 0.0) + elapsed
+            state.calls[self.name] = state.calls.get(self.name, 0) + 1
+            state.peaks[self.name] = max(state.peaks.get(self.name, 0), peak)
+            lines = state.allocations.setdefault(self.name, {})
+            for stat in diff[:TOP_ALLOCATIONS]:
+                if stat.size_diff <= 0:
+                    continue
+                where = f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}"
+                entry = lines.setdefault(where, [0, 0])
+                entry[0] += stat.size_diff
+                entry[1] += stat.count_diff
+            state.active[threading.get_ident()].pop()
+
+        stack = state.local.stack
+        stack.pop()
+        if stack:
+            stack[-1] = (stack[-1][0], self._resume(state, stack[-1][1]))
+        return False
+
+    @staticmethod
+    def _pause(state, profile):
+        if profile is not None:
+            profile.disable()
+            state.running.discard(profile)
+
+    @staticmethod
+    def _resume(state, profile):
+        if profile is None:
+            return None
+        try:
+            profile.enable()
+        except ValueError:
+            # Otro profiler activo (p.ej. cProfile global): el stage queda solo con tiempo y memoria
+            return None
+        state.running.add(profile)
+        return profile
+
+
+def flush():
+    """Vuelca los resultados parciales de este proceso (se puede llamar muchas veces)."""
+    if _directory is None or _process is None or _process.pid != os.getpid():
+        return
+    import pstats
+
+    state = _process
+    with state.lock:
+        by_stage = {}
+        for (name, _), profile in state.profiles.items():
+            if profile in state.running:
+                continue
+            by_stage.setdefault(name, []).append(profile)
+        data = {'wall': state.wall, 'calls': state.calls, 'peaks': state.peaks,
+                'allocations': state.allocations, 'samples': state.samples}
+        payload = json.dumps(data)
+    for name, profiles in by_stage.items():
+        try:
+            stats = pstats.Stats(profiles[0])
+        except TypeError:
+            continue  # perfil vacío: nunca se habilitó
+        for profile in profiles[1:]:
+            try:
+                stats.add(profile)
+            except TypeError:
+                pass
+        stats.dump_stats(os.path.join(_directory, f"partial-{state.pid}-{name}.pstats"))
+    with open(os.path.join(_directory, f"partial-{state.pid}.json"), 'w') as f:
+        f.write(payload)
+
+
+def report(directory=None):
+    """Combina los parciales de todos los procesos y escribe los reportes finales."""
+    import io
+    import pstats
+
+    directory = directory or _directory
+    if directory is None:
+        return
+    flush()
+
+    wall, calls, peaks, allocations, samples = {}, {}, {}, {}, {}
+    stage_files = {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not name.startswith('partial-'):
+            continue
+        if name.endswith('.json'):
+            with open(path) as f:
+                data = json.load(f)
+            for key, value in data['wall'].items():
+                wall[key] = wall.get(key, 0.0) + value
+            for key, value in data['calls'].items():
+                calls[key] = calls.get(key, 0) + value
+            for key, value in data['peaks'].items():
+                peaks[key] = max(peaks.get(key, 0), value)
+            for key, lines in data['allocations'].items():
+                merged = allocations.setdefault(key, {})
+                for where, (size, count) in lines.items():
+                    entry = merged.setdefault(where, [0, 0])
+                    entry[0] += size
+                    entry[1] += count
+            for key, count in data['samples'].items():
+                samples[key] = samples.get(key, 0) + count
+        elif name.endswith('.pstats'):
+            stage_name = name.split('-', 2)[2][:-len('.pstats')]
+            stage_files.setdefault(stage_name, []).append(path)
+
+    for stage_name, paths in stage_files.items():
+        stats = pstats.Stats(*paths)
+        stats.dump_stats(os.path.join(directory, f"{stage_name}.pstats"))
+        out = io.StringIO()
+        pstats.Stats(*paths, stream=out).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        with open(os.path.join(directory, f"{stage_name}.txt"), 'w') as f:
+            f.write(out.getvalue())
+
+    with open(os.path.join(directory, 'allocations.txt'), 'w') as f:
+        for stage_name, lines in sorted(allocations.items()):
+            f.write(f"== {stage_name} (pico traced {peaks.get(stage_name, 0) / 1024:.0f} KB)\n")
+            for where, (size, count) in sorted(lines.items(), key=lambda kv: -kv[1][0])[:TOP_ALLOCATIONS]:
+                f.write(f"{size / 1024:>10.1f} KB {count:>8} bloques  {where}\n")
+            f.write("\n")
+
+    with open(os.path.join(directory, 'stacks.collapsed'), 'w') as f:
+        for key, count in sorted(samples.items()):
+            f.write(f"{key} {count}\n")
+
+    for name in os.listdir(directory):
+        if name.startswith('partial-'):
+            os.remove(os.path.join(directory, name))
+
+    total = sum(wall.values()) or 1.0
+    print(f"\n🔬 Profile por stage ({directory}/)")
+    print(f"   {'Stage':<12} {'Llamadas':>9} {'Total':>9} {'%':>6} {'Pico py':>9}")
+    for stage_name, seconds in sorted(wall.items(), key=lambda kv: -kv[1]):
+        print(f"   {stage_name:<12} {calls[stage_name]:>9} {seconds:>8.2f}s {100 * seconds / total:>5.1f}% "
+              f"{peaks.get(stage_name, 0) / 2**20:>7.1f}MB")
+    print(f"   pstats: {directory}/<stage>.pstats · flamegraph: {directory}/stacks.collapsed")
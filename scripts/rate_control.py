@@ -0,0 +1,212 @@
+"""
+Adaptive concurrency (AIMD) and 429-aware retries for Supabase Storage/REST calls.
+
+- AdaptiveLimiter: bounds in-flight requests. Each fast success adds ~1 slot per
+  window (additive increase); a 429/5xx or a latency spike halves the limit
+  (multiplicative decrease). Latency is compared against a baseline per payload
+  size class (SIZE_CLASSES), so a 300 KB upload after a run of thumbnails is
+  not a spike. Retry-After pauses every worker, not just one.
+- request_with_retry(): requests wrapper with full-jitter exponential backoff that
+  honours Retry-After. Only idempotent calls (x-upsert uploads, PATCH by slug,
+  merge-duplicates upserts, GET/HEAD) are retried after a 5xx.
+- run_concurrent(): fixed thread pool of limiter.maximum workers; the limiter,
+  inside request_with_retry, decides how many of them are on the wire at once.
+"""
+
+import os
+import time
+import random
+import bisect
+import threading
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE', 'PATCH', 'OPTIONS'}
+# Límites (bytes enviados + recibidos) de las clases de tamaño con latencia base propia:
+# REST/HEAD y thumbnails, imágenes principales, archivos grandes / chunks TUS
+SIZE_CLASSES = (16 * 1024, 128 * 1024, 1024 * 1024)
+
+
+def parse_retry_after(value):
+    """Retry-After en segundos o como fecha HTTP. Devuelve segundos o None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    def __init__(self, initial=4, minimum=1, maximum=32, backoff=0.5, latency_tolerance=3.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance  # latencia > base * tolerancia = congestión
+
+        self.inflight = 0
+        self.paused_until = 0.0
+        # Por clase de tamaño: latencia base (mínima observada, decae lentamente hacia arriba) y suavizada
+        self.base_latency = {}
+        self.smoothed_latency = {}
+        self.last_decrease = 0.0
+        self.stats = {"ok": 0, "throttled": 0, "errors": 0, "decreases": 0, "peak_limit": int(initial)}
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                if self.inflight < int(self.limit):
+                    self.inflight += 1
+                    return
+                self._cond.wait()
+
+    def release(self, outcome, latency=None, retry_after=None, nbytes=0):
+        """outcome: 'ok' | 'throttled' (429) | 'error' (5xx / conexión). nbytes: payload del request."""
+        with self._cond:
+            self.inflight -= 1
+            now = time.monotonic()
+            size_class = bisect.bisect_left(SIZE_CLASSES, nbytes)
+
+            if outcome == 'ok':
+                self.stats["ok"] += 1
+                congested = False
+                if latency is not None:
+                    smoothed = self.smoothed_latency.get(size_class)
+                    smoothed = latency if smoothed is None else 0.8 * smoothed + 0.2 * latency
+                    self.smoothed_latency[size_class] = smoothed
+                    base = self.base_latency.get(size_class)
+                    # La base se adapta despacio hacia arriba por si la red cambia
+                    base = latency if base is None or latency < base else base * 1.01
+                    self.base_latency[size_class] = base
+                    congested = smoothed > base * self.latency_tolerance
+                if congested:
+                    self._decrease(now, size_class)
+                else:
+                    self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            else:
+                self.stats["throttled" if outcome == 'throttled' else "errors"] += 1
+                self._decrease(now, size_class)
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + retry_after)
+
+            self.stats["peak_limit"] = max(self.stats["peak_limit"], int(self.limit))
+            self._cond.notify_all()
+
+    def _decrease(self, now, size_class=0):
+        # Como mucho una reducción por "ventana" para no colapsar por una ráfaga de errores
+        window = self.smoothed_latency.get(size_class) or 0.1
+        if now - self.last_decrease < window:
+            return
+        self.limit = max(self.minimum, self.limit * self.backoff)
+        self.last_decrease = now
+        self.stats["decreases"] += 1
+
+
+def is_idempotent(method, headers):
+    method = method.upper()
+    if method in IDEMPOTENT_METHODS:
+        return True
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    # Storage upload con x-upsert o upsert PostgREST con merge-duplicates: repetirlos no cambia el resultado
+    return headers.get('x-upsert') == 'true' or 'merge-duplicates' in headers.get('prefer', '')
+
+
+def body_size(body, start_pos=None):
+    """Bytes que manda `data` (bytes, str o archivo abierto desde start_pos); 0 si no se sabe."""
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode())
+    try:
+        return max(0, os.fstat(body.fileno()).st_size - (start_pos or 0))
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+def request_with_retry(method, url, limiter=None, session=None, max_retries=5,
+                       base_delay=0.5, max_delay=30.0, **kwargs):
+    """
+    Igual que requests.request() pero con reintentos para 429/5xx y errores de conexión.
+    Si `data` es un archivo abierto se rebobina antes de cada intento.
+    Devuelve la última respuesta (el llamador sigue haciendo raise_for_status()).
+    """
+    import requests  # diferido: importar rate_control no debe costar el import de requests
+
+    http = session or requests
+    retry_5xx = is_idempotent(method, kwargs.get('headers'))
+    body = kwargs.get('data')
+    start_pos = body.tell() if hasattr(body, 'seek') else None
+    sent = body_size(body, start_pos)
+
+    attempt = 0
+    while True:
+        if start_pos is not None:
+            body.seek(start_pos)
+        if limiter:
+            limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = http.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if limiter:
+                limiter.release('error')
+            if not retry_5xx or attempt >= max_retries:
+                raise
+            response = None
+        except BaseException:
+            # InvalidURL, ChunkedEncodingError, TooManyRedirects, Ctrl+C...: sin reintento, pero el slot vuelve
+            if limiter:
+                limiter.release('error')
+            raise
+        else:
+            latency = time.monotonic() - started
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if limiter:
+                # La latencia se compara con la de requests de tamaño parecido (subida + respuesta)
+                nbytes = sent + int(response.headers.get('Content-Length') or 0)
+                if response.status_code == 429:
+                    limiter.release('throttled', latency, retry_after, nbytes)
+                elif response.status_code >= 500:
+                    limiter.release('error', latency, retry_after, nbytes)
+                else:
+                    limiter.release('ok', latency, nbytes=nbytes)
+
+            retryable = response.status_code == 429 or (retry_5xx and response.status_code in RETRY_STATUSES)
+            if not retryable or attempt >= max_retries:
+                return response
+
+        # Full jitter; Retry-After manda si el servidor lo indica
+        delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+        attempt += 1
+        time.sleep(delay)
+
+
+def run_concurrent(items, fn, limiter, max_workers=None):
+    """
+    Ejecuta fn(item) para cada item en un pool fijo de limiter.maximum hilos (o max_workers).
+    El ancho del pool no cambia: el limiter (vía request_with_retry) decide cuántos de esos
+    hilos tienen un request en vuelo; el resto espera en acquire().
+    Devuelve los resultados en el mismo orden que items.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    workers = max_workers or limiter.maximum
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, items))
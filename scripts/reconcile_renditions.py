@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Backfill missing renditions from what is already in the bucket.
+
+A product whose -min.webp thumbnail is missing made ProductCard and
+ProductDetailPage pay a 404 and fall back in onError, and fixing it meant
+finding the raw originals and re-running a batch. The main images in the
+bucket are enough:
+
+1. the products (local snapshot) give the expected renditions: every
+   image_url / image2_url / image3_url and its thumbnail (filenames.thumb_of,
+   the same derivation as imageUtils in the frontend)
+2. every folder those URLs live in (root, releases/<id>/) is listed once
+3. mains with a missing thumbnail are downloaded concurrently into
+   CACHE_DIR (kept between runs, re-downloaded only if the size changed)
+4. the thumbnails are regenerated in a process pool with the same width and
+   encoder as process_batch (a 400px resize of the main, which is the same
+   trimmed frame) and only those are uploaded, next to their main
+
+Only renditions of images that are already linked are backfilled: an empty
+image2_url / image3_url is left alone (loose objects at the bucket root are
+pre-release leftovers, linking them would bring stale images back; new
+slots go through image_release). A missing main cannot be rebuilt from
+anything in the bucket: those are reported, for process_batch / run_jobs.
+
+Usage:
+    python scripts/reconcile_renditions.py [--slug s ...] [--dry-run] [--workers N] [--skip-budget]
+"""
+
+import os
+import sys
+import argparse
+
+from filenames import thumb_of
+
+CACHE_DIR = '.rendition_cache'
+OUTPUT_DIR = 'reconciled'
+SLOT_COLUMNS = {1: 'image_url', 2: 'image2_url', 3: 'image3_url'}
+
+
+def make_thumb(main_path, thumb_path):
+    """Thumbnail de process_batch a partir de la imagen principal ya optimizada (corre en el pool)."""
+    from PIL import Image
+    from process_batch import TARGET_WIDTH_THUMB, resize_to_width, save_webp
+
+    with Image.open(main_path) as img:
+        save_webp(resize_to_width(img.convert('RGB'), TARGET_WIDTH_THUMB), thumb_path)
+    return thumb_path
+
+
+def object_of(url, base):
+    """Nombre del objeto en el bucket, o None si la URL no es del bucket."""
+    if not url or not url.startswith(base):
+        return None
+    return url[len(base):].split('?', 1)[0]
+
+
+def folder_of(name):
+    return name.rpartition('/')[0] + '/' if '/' in name else ''
+
+
+def plan(products, listing, base):
+    """(thumbs a regenerar {main: thumb}, mains faltantes [(slug, índice, main)]) de los slots linkeados."""
+    thumbs, missing = {}, []
+    for product in products:
+        for index, column in SLOT_COLUMNS.items():
+            name = object_of(product.get(column), base)
+            if name is None or not name.endswith('.webp'):
+                continue
+            if name not in listing:
+                missing.append((product['slug'], index, name))
+            elif thumb_of(name) not in listing:
+                thumbs[name] = thumb_of(name)
+    return thumbs, missing
+
+
+def download(name, size):
+    """Baja un objeto a CACHE_DIR (si no está ya con el mismo tamaño). Devuelve la ruta o None."""
+    from rate_control import request_with_retry
+    from upload_batch import LIMITER, public_url, session
+
+    path = os.path.join(CACHE_DIR, name)
+    if size and os.path.exists(path) and os.path.getsize(path) == size:
+        return path
+    try:
+        r = request_with_retry('GET', public_url(name), limiter=LIMITER, session=session())
+        r.raise_for_status()
+    except Exception as e:
+        print(f"❌ {name}: {e}")
+        return None
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(r.content)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def regenerate(thumbs, sources, workers=None):
+    """{main: ruta local del thumbnail} de los que salieron bien (pool de procesos)."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    made = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for main, thumb in thumbs.items():
+            if not sources.get(main):
+                continue
+            out_path = os.path.join(OUTPUT_DIR, thumb)
+            os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+            futures[pool.submit(make_thumb, sources[main], out_path)] = main
+        for future in as_completed(futures):
+            main = futures[future]
+            try:
+                made[main] = future.result()
+                print(f"🖼️ {thumbs[main]} ({os.path.getsize(made[main]) / 1024:.1f} KB)")
+            except Exception as e:
+                print(f"❌ {thumbs[main]}: {e}")
+    return made
+
+
+def main():
+    from image_release import list_objects
+    from page_budget import over_budget
+    from products_snapshot import open_snapshot
+    from rate_control import run_concurrent
+    from supabase_config import credentials
+    from upload_batch import LIMITER, public_url, upload_file
+
+    parser = argparse.ArgumentParser(description="Regenera y sube solo los thumbnails que faltan en el bucket")
+    parser.add_argument('--slug', action='append', help="Solo estos slugs (repetible)")
+    parser.add_argument('--dry-run', action='store_true', help="Listar lo que falta, sin bajar ni subir nada")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos para regenerar (default: CPUs)")
+    parser.add_argument('--skip-budget', action='store_true', help="Subir aunque page_budget.py marque excesos")
+    parser.add_argument('--max-age', type=float, default=0,
+                        help="Usar el snapshot local sin consultar Supabase si tiene menos de N segundos")
+    args = parser.parse_args()
+
+    snapshot = open_snapshot(*credentials(), max_age=args.max_age)
+    products = [p for p in snapshot.all(['slug', *SLOT_COLUMNS.values()])
+                if p['slug'] and (not args.slug or p['slug'] in args.slug)]
+    snapshot.close()
+
+    base = public_url('')
+    names = [object_of(p.get(column), base) for p in products for column in SLOT_COLUMNS.values()]
+    folders = {folder_of(name) for name in names if name}
+    listing = {}
+    for found in run_concurrent(sorted(folders), lambda folder: list_objects(folder, metadata=True), LIMITER):
+        # Solo objetos de esa carpeta: las subcarpetas vienen sin metadata
+        listing.update((name, meta) for name, meta in found.items() if meta is not None)
+    print(f"🔎 {len(products)} productos, {len(listing)} objetos en {len(folders)} carpeta(s)")
+
+    thumbs, missing = plan(products, listing, base)
+    for slug, index, name in missing:
+        print(f"❌ {slug} slot {index}: {name} no está en el bucket (hace falta la fuente: process_batch / run_jobs)")
+    print(f"🧩 {len(thumbs)} thumbnail(s) para regenerar, {len(missing)} principal(es) perdidas")
+    if args.dry_run:
+        for main_name, thumb in sorted(thumbs.items()):
+            print(f"   🖼️ {thumb}")
+        return 0 if not missing else 1
+
+    mains = sorted(thumbs)
+    paths = run_concurrent(mains, lambda name: download(name, (listing[name] or {}).get('size')), LIMITER)
+    made = regenerate(thumbs, dict(zip(mains, paths)), args.workers)
+
+    if not args.skip_budget:
+        for main_name, path in list(made.items()):
+            for filename, size, limit in over_budget([path]):
+                print(f"🛑 {filename}: {size / 1024:.0f} KB > {limit / 1024:.0f} KB (page_budgets.json), no se sube")
+                del made[main_name]
+
+    def upload(item):
+        main_name, path = item
+        return upload_file(os.path.basename(path), os.path.dirname(path), folder_of(main_name))
+
+    uploaded = run_concurrent(list(made.items()), upload, LIMITER)
+    done = sum(1 for ok in uploaded if ok)
+
+    print(f"\n✨ {done}/{len(thumbs)} thumbnail(s) subidos"
+          + (f", {len(missing)} principal(es) sin fuente" if missing else ""))
+    return 0 if done == len(thumbs) and not missing else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Run a declarative job spec: find -> optimize -> upload -> relink per item.
+
+A hotfix used to be a new script with its own hard-coded list (tasks,
+targets, FILES_TO_UPLOAD...). Now it is a JSON spec in scripts/jobs/:
+
+    {
+      "defaults": {"search_dir": "raw_images", "output_dir": "optimized_jobs"},
+      "items": [
+        {"slug": "mini-poker", "find": "mini-poker1.jp*g"},
+        {"slug": "mini-poker", "index": 2, "find": "mini-poker2.jp*g"},
+        {"id": "bustina", "steps": ["upload"], "file": "optimized_batch/hi-sex-bustina.webp"},
+        {"slug": "desire-coconut", "steps": ["relink"], "object": "desire-coconut.webp"}
+      ]
+    }
+
+Item keys (any of them can go in "defaults"):
+    id            unique name (default: slug, or slug-index for index > 1)
+    steps         subset of find/optimize/upload/relink, in that order (default: all)
+    slug, index   product and image slot (1 -> image_url, 2 -> image2_url, 3 -> image3_url)
+    fallback_slugs  slugs to try if the PATCH matches no product
+    find, search_dir  glob (case-insensitive, first match in name order) or
+    source        an explicit path
+    output        main WebP name (default: slug.webp / slug-N.webp, like process_batch)
+    output_dir, thumbnail (true), trim (process_batch.TRIM_ENABLED)
+    file, object  upload-only: local file and object name (default: its basename)
+    versioned     upload relinked images as {stem}.{hash}.webp (default true: objects
+                  are served `immutable`, overwriting the same name stays cached)
+    after         ids of items that must finish first
+
+The runner expands every item into step nodes, adds the edges (step order,
+`after`, and items that write the same output or object run one after the
+other) and executes the DAG: optimize nodes go to one shared process pool,
+admitted against the image_scheduler memory budget; find/upload/relink go to
+one shared thread pool paced by upload_batch.LIMITER. Directory listings are
+cached per run and .jobs_cache.json remembers what was already optimized and
+uploaded (by content hash), so re-running a spec after a failure only redoes
+what is missing. A failed node skips its descendants, not the other items.
+An upload node fails before sending anything when one of its files is over
+its rendition budget (page_budget.py; --skip-budget to upload anyway).
+
+Usage:
+    python scripts/run_jobs.py scripts/jobs/poker.json [--dry-run] [--no-cache] [--skip-budget]
+"""
+
+import os
+import sys
+import json
+import time
+import fnmatch
+import hashlib
+import argparse
+import threading
+
+from filenames import output_name, thumb_of
+
+STEPS = ('find', 'optimize', 'upload', 'relink')
+DEFAULTS = {
+    'search_dir': 'raw_images',
+    'output_dir': 'optimized_jobs',
+    'index': 1,
+    'thumbnail': True,
+    'versioned': True,
+    'fallback_slugs': [],
+    'after': [],
+}
+CACHE_PATH = '.jobs_cache.json'
+SLOT_COLUMNS = {1: 'image_url', 2: 'image2_url', 3: 'image3_url'}
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+# --- spec ---
+
+def load_spec(path):
+    """Lee el spec y devuelve los items completos (defaults aplicados). ValueError si es inválido."""
+    with open(path) as f:
+        spec = json.load(f)
+    defaults = dict(DEFAULTS, **spec.get('defaults', {}))
+    items = []
+    for position, raw in enumerate(spec.get('items', []), 1):
+        item = dict(defaults, **raw)
+        steps = item.setdefault('steps', list(STEPS))
+        unknown = set(steps) - set(STEPS)
+        if unknown or not steps:
+            raise ValueError(f"item {position}: steps inválidos {sorted(unknown) or steps}")
+        item['steps'] = [s for s in STEPS if s in steps]
+        index = int(item['index'])
+        item['index'] = index
+        if 'id' not in item:
+            if 'slug' not in item:
+                raise ValueError(f"item {position}: falta 'id' o 'slug'")
+            item['id'] = item['slug'] if index == 1 else f"{item['slug']}-{index}"
+
+        where = f"item '{item['id']}'"
+        if 'relink' in item['steps'] and 'slug' not in item:
+            raise ValueError(f"{where}: relink necesita 'slug'")
+        if 'relink' in item['steps'] and index not in SLOT_COLUMNS:
+            raise ValueError(f"{where}: index {index} no tiene columna en products (1-3)")
+        if 'find' in item['steps'] and not (item.get('find') or item.get('source')):
+            raise ValueError(f"{where}: find necesita 'find' (glob) o 'source'")
+        if 'optimize' in item['steps']:
+            if 'find' not in item['steps']:
+                raise ValueError(f"{where}: optimize necesita find")
+            if 'output' not in item:
+                if 'slug' not in item:
+                    raise ValueError(f"{where}: falta 'output' o 'slug'")
+                item['output'] = output_name(item['slug'], index)
+            if not item['output'].endswith('.webp'):
+                raise ValueError(f"{where}: output debe ser .webp")
+        elif 'upload' in item['steps'] and 'file' not in item:
+            raise ValueError(f"{where}: upload sin optimize necesita 'file'")
+        elif 'relink' in item['steps'] and 'upload' not in item['steps'] and 'object' not in item:
+            raise ValueError(f"{where}: relink sin upload necesita 'object'")
+        items.append(item)
+
+    ids = [item['id'] for item in items]
+    duplicated = {i for i in ids if ids.count(i) > 1}
+    if duplicated:
+        raise ValueError(f"ids duplicados: {sorted(duplicated)} (usar 'id' explícito)")
+    for item in items:
+        missing = set(item['after']) - set(ids)
+        if missing:
+            raise ValueError(f"item '{item['id']}': after apunta a ids inexistentes {sorted(missing)}")
+    return items
+
+
+def build_dag(items):
+    """
+    Nodos '{id}:{step}' -> set de nodos de los que depende. ValueError si hay un ciclo.
+    Devuelve (deps, orden topológico).
+    """
+    deps = {}
+    first, last = {}, {}
+    for item in items:
+        previous = None
+        for step in item['steps']:
+            node = f"{item['id']}:{step}"
+            deps[node] = {previous} if previous else set()
+            previous = node
+        first[item['id']] = f"{item['id']}:{item['steps'][0]}"
+        last[item['id']] = previous
+
+    # Mismo archivo de salida u objeto remoto: en orden de aparición, nunca a la vez
+    claimed = {}
+    for item in items:
+        targets = set()
+        if 'optimize' in item['steps']:
+            targets.add(('output', os.path.join(item['output_dir'], item['output'])))
+        if 'upload' in item['steps'] and not (item['versioned'] and 'relink' in item['steps']):
+            targets.add(('object', item.get('object') or os.path.basename(item.get('file') or item['output'])))
+        for target in targets:
+            if target in claimed:
+                deps[first[item['id']]].add(last[claimed[target]])
+            claimed[target] = item['id']
+        for other in item['after']:
+            deps[first[item['id']]].add(last[other])
+
+    # Kahn: orden topológico (y detección de ciclos por `after`)
+    remaining = {node: set(d) for node, d in deps.items()}
+    order = []
+    ready = [node for node, d in remaining.items() if not d]
+    while ready:
+        node = ready.pop(0)
+        order.append(node)
+        for other, d in remaining.items():
+            if node in d:
+                d.discard(node)
+                if not d:
+                    ready.append(other)
+    if len(order) != len(deps):
+        cycle = sorted(node for node in deps if node not in order)
+        raise ValueError(f"ciclo en el spec: {', '.join(cycle)}")
+    return deps, order
+
+
+# --- cache ---
+
+class JobCache:
+    """Qué salidas ya se generaron y qué objetos ya se subieron, por hash de contenido."""
+
+    def __init__(self, path=CACHE_PATH, enabled=True):
+        self.path = path
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.data = {'optimized': {}, 'uploaded': {}}
+        if enabled and os.path.exists(path):
+            with open(path) as f:
+                self.data.update(json.load(f))
+
+    def optimized(self, out_path, key):
+        entry = self.data['optimized'].get(out_path)
+        return self.enabled and entry == key and os.path.exists(out_path)
+
+    def uploaded(self, object_name, digest):
+        return self.enabled and self.data['uploaded'].get(object_name) == digest
+
+    def record(self, section, name, value):
+        with self.lock:
+            self.data[section][name] = value
+
+    def save(self):
+        if not self.enabled:
+            return
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.data, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+# --- steps ---
+
+class Runner:
+    def __init__(self, items, budget=None, workers=None, cache=None, skip_budget=False):
+        from image_scheduler import default_budget
+
+        self.items = {item['id']: item for item in items}
+        self.budget = budget or default_budget()
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = cache or JobCache(enabled=False)
+        self.skip_budget = skip_budget
+        self.results = {item['id']: {} for item in items}
+        self._listings = {}
+        self._listing_lock = threading.Lock()
+
+    def listing(self, directory):
+        """os.listdir cacheado: varios items buscan en la misma carpeta."""
+        with self._listing_lock:
+            if directory not in self._listings:
+                self._listings[directory] = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+            return self._listings[directory]
+
+    def find(self, item):
+        from process_batch import plan_source
+
+        if item.get('source'):
+            path = item['source']
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"source no encontrado: {path}")
+        else:
+            pattern = item['find'].lower()
+            matches = [name for name in self.listing(item['search_dir']) if fnmatch.fnmatch(name.lower(), pattern)]
+            if not matches:
+                raise FileNotFoundError(f"nada coincide con {item['find']} en {item['search_dir']}")
+            path = os.path.join(item['search_dir'], matches[0])
+        plan = plan_source(path, self.budget)
+        print(f"🔎 {item['id']}: {path} ({plan['megapixels']:.1f} MP, {plan['strategy']})")
+        return {'source': path, 'source_hash': file_hash(path), 'plan': plan}
+
+    def optimize_args(self, item):
+        from process_batch import TRIM_ENABLED
+
+        found = self.results[item['id']]
+        thumb = thumb_of(item['output']) if item['thumbnail'] else None
+        trim = item.get('trim', TRIM_ENABLED)
+        out_path = os.path.join(item['output_dir'], item['output'])
+        key = f"{found['source_hash']}:{thumb is not None}:{trim}"
+        return out_path, key, (found['source'], item['output_dir'], item['output'], thumb,
+                               found['plan']['strategy'], trim)
+
+    def upload(self, item):
+        from upload_batch import BUCKET_NAME, LIMITER, session, versioned_names, public_url
+        from supabase_config import credentials, rest_headers
+        from tus_upload import upload_object
+
+        if 'optimize' in item['steps']:
+            main_name, thumb_name = self.results[item['id']]['outputs']
+            main_path = os.path.join(item['output_dir'], main_name)
+            files = [(main_path, main_name)]
+            if thumb_name:
+                files.insert(0, (os.path.join(item['output_dir'], thumb_name), thumb_name))
+        else:
+            main_path = item['file']
+            main_name = item.get('object') or os.path.basename(main_path)
+            files = [(main_path, main_name)]
+
+        if not self.skip_budget:
+            from page_budget import over_budget
+
+            problems = over_budget([path for path, _ in files])
+            if problems:
+                raise RuntimeError("fuera de budget (--skip-budget para subir igual): " + ', '.join(
+                    f"{name} {size / 1024:.0f} KB > {limit / 1024:.0f} KB" for name, size, limit in problems))
+
+        digest = file_hash(main_path)
+        remote = {name: name for _, name in files}
+        if item['versioned'] and 'relink' in item['steps']:
+            remote_main, remote_thumb = versioned_names(main_name, digest[:10])
+            remote = {main_name: remote_main}
+            if len(files) > 1:
+                remote[files[0][1]] = remote_thumb
+
+        supabase_url, _ = credentials(warn_anon=True)
+        # Thumbnail primero: la DB nunca apunta a un -min inexistente
+        for path, name in files:
+            object_name = remote[name]
+            content_digest = digest if path == main_path else file_hash(path)
+            if self.cache.uploaded(object_name, content_digest):
+                print(f"♻️  {item['id']}: {object_name} ya subido")
+                continue
+            upload_object(supabase_url, rest_headers(), BUCKET_NAME, object_name, path,
+                          session=session(), limiter=LIMITER)
+            self.cache.record('uploaded', object_name, content_digest)
+            print(f"🚀 {item['id']}: {object_name}")
+        return {'url': public_url(remote[main_name])}
+
+    def relink(self, item):
+        from upload_batch import update_product_db, public_url
+
+        url = self.results[item['id']].get('url') or public_url(item['object'])
+        for slug in [item['slug']] + list(item['fallback_slugs']):
+            if update_product_db(slug, {item['index']: url}):
+                return {'relinked': slug}
+        raise LookupError(f"ningún slug coincide: {[item['slug']] + list(item['fallback_slugs'])}")
+
+    def run(self, deps, order):
+        """Ejecuta el DAG. Devuelve {nodo: 'ok' | 'cached' | 'failed' | 'skipped'}."""
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+        from process_batch import render
+        from upload_batch import LIMITER
+
+        status = {}
+        waiting = {node: set(d) for node, d in deps.items()}
+        ready = [node for node in order if not waiting[node]]
+        in_flight = {}
+        reserved = 0
+        cpu_in_flight = 0
+
+        def finish(node, outcome):
+            status[node] = outcome
+            for other, d in waiting.items():
+                if node in d:
+                    d.discard(node)
+                    if outcome in ('failed', 'skipped'):
+                        skip(other)
+                    elif not d and other not in status:
+                        ready.append(other)
+
+        def skip(node):
+            if node not in status:
+                finish(node, 'skipped')
+
+        with ProcessPoolExecutor(max_workers=self.workers) as cpu, \
+                ThreadPoolExecutor(max_workers=LIMITER.maximum) as io:
+            while ready or in_flight:
+                # Orden topológico estable; optimize solo entra si cabe en el budget de memoria
+                for node in sorted(ready, key=order.index):
+                    item_id, step = node.rsplit(':', 1)
+                    item = self.items[item_id]
+                    if step == 'optimize':
+                        out_path, key, args = self.optimize_args(item)
+                        thumb_path = os.path.join(item['output_dir'], args[3]) if args[3] else None
+                        if self.cache.optimized(out_path, key) and (not thumb_path or os.path.exists(thumb_path)):
+                            print(f"♻️  {item_id}: {item['output']} sin cambios")
+                            self.results[item_id]['outputs'] = (args[2], args[3])
+                            ready.remove(node)
+                            finish(node, 'cached')
+                            continue
+                        cost = self.results[item_id]['plan']['cost']
+                        if cpu_in_flight and (cpu_in_flight >= self.workers or reserved + cost > self.budget):
+                            continue
+                        os.makedirs(item['output_dir'], exist_ok=True)
+                        future = cpu.submit(render, *args)
+                        reserved += cost
+                        cpu_in_flight += 1
+                        in_flight[future] = (node, cost, out_path, key)
+                    else:
+                        in_flight[io.submit(getattr(self, step), item)] = (node, 0, None, None)
+                    ready.remove(node)
+
+                if not in_flight:
+                    continue  # solo hubo optimize cacheados: sus dependientes ya están en ready
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node, cost, out_path, key = in_flight.pop(future)
+                    item_id, step = node.rsplit(':', 1)
+                    if step == 'optimize':
+                        reserved -= cost
+                        cpu_in_flight -= 1
+                    error = future.exception()
+                    if error:
+                        print(f"❌ {node}: {error}")
+                        finish(node, 'failed')
+                        continue
+                    result = future.result()
+                    if step == 'optimize':
+                        self.results[item_id]['outputs'] = result
+                        self.cache.record('optimized', out_path, key)
+                        print(f"✅ {item_id}: {' + '.join(name for name in result if name)}")
+                    else:
+                        self.results[item_id].update(result)
+                    finish(node, 'ok')
+        self.cache.save()
+        return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta un job spec (find -> optimize -> upload -> relink)")
+    parser.add_argument('spec', help="JSON en scripts/jobs/")
+    parser.add_argument('--dry-run', action='store_true', help="Validar y mostrar el DAG sin ejecutar")
+    parser.add_argument('--no-cache', action='store_true', help=f"Ignorar {CACHE_PATH} (re-optimizar y re-subir todo)")
+    parser.add_argument('--memory-budget', type=int, default=None, help="MB de RAM para optimize en paralelo")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos para optimize (default: CPUs)")
+    parser.add_argument('--skip-budget', action='store_true', help="Subir aunque page_budget.py marque excesos")
+    args = parser.parse_args()
+
+    try:
+        items = load_spec(args.spec)
+        deps, order = build_dag(items)
+    except (OSError, ValueError) as e:
+        print(f"❌ Spec inválido ({args.spec}): {e}")
+        return 1
+
+    print(f"📋 {args.spec}: {len(items)} item(s), {len(order)} paso(s)")
+    if args.dry_run:
+        for node in order:
+            after = ', '.join(sorted(deps[node]))
+            print(f"   {node}" + (f"  ← {after}" if after else ""))
+        return 0
+
+    if any(step in ('upload', 'relink') for item in items for step in item['steps']):
+        from supabase_config import credentials
+        credentials(warn_anon=True)  # falla antes de optimizar nada si faltan credenciales
+
+    started = time.monotonic()
+    runner = Runner(items, args.memory_budget * 1024 * 1024 if args.memory_budget else None,
+                    args.workers, JobCache(enabled=not args.no_cache), args.skip_budget)
+    status = runner.run(deps, order)
+
+    failed = [node for node, outcome in status.items() if outcome == 'failed']
+    skipped = [node for node, outcome in status.items() if outcome == 'skipped']
+    done = [item_id for item_id in runner.items
+            if all(status.get(f"{item_id}:{step}") in ('ok', 'cached') for step in runner.items[item_id]['steps'])]
+    print(f"\n✨ {len(done)}/{len(items)} item(s) completos en {time.monotonic() - started:.1f}s")
+    if failed:
+        print(f"❌ Fallaron: {', '.join(failed)}")
+    if skipped:
+        print(f"⏭️  Saltados por dependencia: {', '.join(skipped)}")
+    return 1 if failed or skipped else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Sitemap (with product images) generated from the products table.
+
+`npm run build` regenerates public/sitemap.xml and public/sitemap-gsc.xml with
+the Node generator (src/scripts/generate-sitemap.js: CI and Vercel only set up
+Node), which lists the active products and their images with a date-only
+lastmod. This is the incremental version for local runs and catalogs past
+one file: it streams the active products from the local snapshot
+(products_snapshot.py, incremental) in id order and writes one <url> per
+product with an <image:image> for each of image_url / image2_url / image3_url,
+after the static routes.
+
+lastmod comes from content, not from the clock: every URL has a hash of what
+the page shows (the snapshot row minus updated_at), and its lastmod only
+moves when that hash changes (.sitemap_state.json). Files are written through
+a temp file and only replaced when their bytes change, so crawlers and git
+only see the shards that actually changed.
+
+Up to MAX_URLS URLs it is a single urlset. Past that, sitemap.xml becomes a
+sitemap index over sitemap-1.xml ... sitemap-N.xml (id order: a new product
+only touches the last shard), each with the newest lastmod of its URLs.
+
+Without Supabase credentials (neither in .env nor in the environment) it
+keeps the committed public/sitemap*.xml and exits 0.
+
+Usage:
+    python scripts/sitemap.py [--site-url https://...] [--max-age 300] [--dry-run]
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from xml.sax.saxutils import escape
+
+OUTPUT_DIR = 'public'
+OUTPUT_NAMES = ('sitemap.xml', 'sitemap-gsc.xml')  # sitemap-gsc.xml: la que está dada de alta en Search Console
+SHARD_NAME = 'sitemap-{}.xml'
+STATE_PATH = '.sitemap_state.json'
+SITE_URL = 'https://perla-negra.vercel.app'
+MAX_URLS = 50_000
+IMAGE_COLUMNS = ('image_url', 'image2_url', 'image3_url')
+
+# (ruta, prioridad): las mismas páginas que el router
+STATIC_ROUTES = [
+    ('', '1.0'),
+    ('/chi-sono', '0.8'),
+    ('/contatti', '0.8'),
+    ('/prodotti', '0.8'),
+    ('/termini-e-condizioni', '0.8'),
+    ('/privacy-policy', '0.8'),
+    ('/uso-responsabile', '0.8'),
+    ('/rivenditori', '0.8'),
+]
+
+URLSET_OPEN = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+               'xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">\n')
+INDEX_OPEN = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+              '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+
+
+def entry_hash(row):
+    content = {k: v for k, v in row.items() if k != 'updated_at'}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def url_xml(loc, priority, lastmod=None, images=()):
+    lines = ["    <url>", f"        <loc>{escape(loc)}</loc>"]
+    if lastmod:
+        lines.append(f"        <lastmod>{lastmod}</lastmod>")
+    lines += ["        <changefreq>weekly</changefreq>", f"        <priority>{priority}</priority>"]
+    for image in images:
+        lines += ["        <image:image>", f"            <image:loc>{escape(image)}</image:loc>", "        </image:image>"]
+    lines.append("    </url>\n")
+    return '\n'.join(lines)
+
+
+class SitemapWriter:
+    """Escribe un archivo vía temp + hash; solo lo reemplaza si el contenido cambió."""
+
+    def __init__(self, path, dry_run=False):
+        self.path = path
+        self.dry_run = dry_run
+        self.tmp = path + '.tmp'
+        self.file = open(self.tmp, 'w', encoding='utf-8')
+        self.digest = hashlib.sha256()
+
+    def write(self, text):
+        self.file.write(text)
+        self.digest.update(text.encode('utf-8'))
+
+    def close(self):
+        """True si el archivo cambió (y fue reemplazado, salvo en dry-run)."""
+        self.file.close()
+        current = None
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                current = hashlib.sha256(f.read()).hexdigest()
+        changed = current != self.digest.hexdigest()
+        if changed and not self.dry_run:
+            os.replace(self.tmp, self.path)
+        else:
+            os.remove(self.tmp)
+        return changed
+
+
+def product_entries(snapshot, site_url, state, new_state, today):
+    """(xml, lastmod) por producto activo, en orden de id. Anota hash y lastmod de cada URL en new_state."""
+    columns = ['slug', 'active', 'updated_at', 'name', 'brand', 'category', 'price', 'stock', *IMAGE_COLUMNS]
+    for row in snapshot.rows(['id'] + columns):
+        # Igual que el generador del build (active=eq.true): active NULL no entra
+        if not row['slug'] or not row['active']:
+            continue
+        loc = f"{site_url}/prodotti/{row['slug']}"
+        digest = entry_hash(row)
+        previous = state.get(loc)
+        if previous and previous[0] == digest:
+            lastmod = previous[1]
+        else:
+            # Primera vez: updated_at (si la DB lo tiene); después, el día en que cambió el contenido
+            lastmod = row['updated_at'][:10] if not previous and row['updated_at'] else today
+        new_state[loc] = [digest, lastmod]
+        images = [row[c] for c in IMAGE_COLUMNS if row[c]]
+        yield url_xml(loc, '0.9', lastmod, images), lastmod
+
+
+def generate(snapshot, site_url=SITE_URL, output_dir=OUTPUT_DIR, dry_run=False):
+    """Escribe los sitemaps. Devuelve (urls, archivos escritos, archivos sin cambios)."""
+    state = {}
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH, encoding='utf-8') as f:
+            state = json.load(f)
+    new_state = {}
+    today = time.strftime('%Y-%m-%d')
+
+    entries = ((url_xml(f"{site_url}{route}", priority), None) for route, priority in STATIC_ROUTES)
+    products = product_entries(snapshot, site_url, state, new_state, today)
+
+    # Shards de MAX_URLS; si hay uno solo, es directamente el sitemap.xml
+    shards = []  # (writer, lastmod más nuevo)
+    count = 0
+    writer, newest = None, None
+    for xml, lastmod in (e for source in (entries, products) for e in source):
+        if writer is None or count % MAX_URLS == 0:
+            if writer:
+                writer.write('</urlset>\n')
+                shards.append((writer, newest))
+            writer = SitemapWriter(os.path.join(output_dir, SHARD_NAME.format(len(shards) + 1)), dry_run)
+            writer.write(URLSET_OPEN)
+            newest = None
+        writer.write(xml)
+        count += 1
+        if lastmod and (newest is None or lastmod > newest):
+            newest = lastmod
+    writer.write('</urlset>\n')
+    shards.append((writer, newest))
+
+    written, unchanged = [], []
+
+    def close(w):
+        (written if w.close() else unchanged).append(os.path.basename(w.path))
+
+    if len(shards) == 1:
+        # Un solo urlset: va con los nombres públicos, sin índice
+        shard = shards[0][0]
+        shard.file.close()
+        with open(shard.tmp, encoding='utf-8') as f:
+            body = f.read()
+        os.remove(shard.tmp)
+        for name in OUTPUT_NAMES:
+            w = SitemapWriter(os.path.join(output_dir, name), dry_run)
+            w.write(body)
+            close(w)
+    else:
+        for shard, _ in shards:
+            close(shard)
+        for name in OUTPUT_NAMES:
+            w = SitemapWriter(os.path.join(output_dir, name), dry_run)
+            w.write(INDEX_OPEN)
+            for shard, lastmod in shards:
+                w.write(f"    <sitemap>\n        <loc>{escape(site_url)}/{os.path.basename(shard.path)}</loc>\n")
+                if lastmod:
+                    w.write(f"        <lastmod>{lastmod}</lastmod>\n")
+                w.write("    </sitemap>\n")
+            w.write('</sitemapindex>\n')
+            close(w)
+
+    # Shards que sobran (el catálogo se achicó o volvió a entrar en un solo archivo)
+    n = len(shards) if len(shards) > 1 else 0
+    while os.path.exists(os.path.join(output_dir, SHARD_NAME.format(n + 1))):
+        n += 1
+        if not dry_run:
+            os.remove(os.path.join(output_dir, SHARD_NAME.format(n)))
+        written.append(f"-{SHARD_NAME.format(n)}")
+
+    if not dry_run:
+        with open(STATE_PATH + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(new_state, f, sort_keys=True)
+        os.replace(STATE_PATH + '.tmp', STATE_PATH)
+    return count, written, unchanged
+
+
+def main():
+    from products_snapshot import open_snapshot
+    from supabase_config import credentials, load_env
+
+    parser = argparse.ArgumentParser(description="Sitemap con imágenes desde la tabla products (solo reescribe lo que cambió)")
+    parser.add_argument('--site-url', default=None, help=f"Default: VITE_SITE_URL del .env o {SITE_URL}")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--max-age', type=float, default=0,
+                        help="Usar el snapshot local sin consultar Supabase si tiene menos de N segundos")
+    parser.add_argument('--dry-run', action='store_true', help="Mostrar qué archivos cambiarían, sin escribir")
+    args = parser.parse_args()
+
+    site_url = (args.site_url or load_env().get('VITE_SITE_URL') or SITE_URL).rstrip('/')
+    supabase_url, supabase_key = credentials(required=False)
+    if not supabase_url or not supabase_key:
+        print(f"⚠️ Sin credenciales de Supabase: se mantienen los sitemaps commiteados en {args.output_dir}/")
+        return 0
+    snapshot = open_snapshot(supabase_url, supabase_key, max_age=args.max_age)
+    try:
+        count, written, unchanged = generate(snapshot, site_url, args.output_dir, args.dry_run)
+    finally:
+        snapshot.close()
+
+    verb = "cambiarían" if args.dry_run else "escritos"
+    print(f"🗺️ {count} URLs -> {args.output_dir}/: {len(written)} archivo(s) {verb}, {len(unchanged)} sin cambios")
+    for name in written:
+        print(f"   {'🗑️ ' + name[1:] if name.startswith('-') else '✏️ ' + name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Catalog-aware WOFF2 subsetting for public/fonts.
+
+Collects the characters the site can actually render from:
+- the products table (name, brand, category) through the local snapshot
+  (products_snapshot.py); skipped with a warning without credentials
+- nuevos_productos.csv (catalog import, with the long texts)
+- UI strings under src/ and index.html
+plus printable ASCII and a few typographic marks, then writes for every
+full font in public/fonts:
+
+- {font}.subset.woff2     only the glyphs in that set
+- index.html              the inline @font-face block between the
+                          fonts-subset markers: per family, the subset with a
+                          unicode-range of the collected set, and the full
+                          font with the remaining range as a fallback that
+                          only downloads when a page uses a missing glyph;
+                          the font preloads point at the subsets
+
+Results are cached by glyph-set hash + source font hash in
+.font_subset_cache.json, so reruns with the same text are instant.
+
+Requires fontTools and brotli (pip install fonttools brotli).
+"""
+
+import re
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+
+try:
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+except ImportError:
+    subset = None
+
+FONTS_DIR = Path("public/fonts")
+INDEX_HTML = Path("index.html")
+CACHE_PATH = Path(".font_subset_cache.json")
+
+TEXT_SOURCES = ['nuevos_productos.csv', 'index.html']
+SNAPSHOT_COLUMNS = ['name', 'brand', 'category']
+# El bloque <style> de @font-face en index.html que este script reescribe
+FACES_BLOCK = re.compile(r'(<!-- fonts-subset:start[^>]*-->\n)(.*?)(\n\s*<!-- fonts-subset:end -->)', re.S)
+SRC_DIR = Path("src")
+SRC_EXTENSIONS = ('.ts', '.tsx', '.js', '.jsx', '.html', '.css', '.json', '.md')
+
+# Siempre incluidos: ASCII imprimible + marcas tipográficas que el CMS puede meter
+ALWAYS = set(range(0x20, 0x7F)) | {0xA0, 0x2013, 0x2014, 0x2018, 0x2019, 0x201C, 0x201D,
+                                    0x2022, 0x2026, 0x20AC, 0x2122, 0xFFFD}
+
+
+def add_text(codepoints, text):
+    codepoints.update(ord(c) for c in text if c.isprintable() or c == ' ')
+    # Mayúsculas/minúsculas: los textos se transforman con CSS (uppercase en títulos, etc.)
+    codepoints.update(ord(c) for c in text.upper() + text.lower() if len(c) == 1 and c.isprintable())
+
+
+def catalog_text():
+    """Nombres, marcas y categorías de products desde el snapshot local ('' sin credenciales)."""
+    from supabase_config import credentials
+
+    supabase_url, supabase_key = credentials(required=False)
+    if not supabase_url or not supabase_key:
+        print("   ⚠️ Sin credenciales de Supabase: el catálogo sale solo de nuevos_productos.csv")
+        return ''
+    from products_snapshot import open_snapshot
+
+    snapshot = open_snapshot(supabase_url, supabase_key)
+    try:
+        return '\n'.join(str(value) for row in snapshot.rows(SNAPSHOT_COLUMNS)
+                         for value in row.values() if value)
+    finally:
+        snapshot.close()
+
+
+def collect_codepoints(extra_paths=()):
+    codepoints = set(ALWAYS)
+    add_text(codepoints, catalog_text())
+    paths = [Path(p) for p in TEXT_SOURCES] + [Path(p) for p in extra_paths]
+    if SRC_DIR.exists():
+        paths += [p for p in SRC_DIR.rglob('*') if p.suffix in SRC_EXTENSIONS and p.is_file()]
+    for path in paths:
+        if not path.exists():
+            print(f"   ⚠️ Fuente de texto no encontrada: {path}")
+            continue
+        add_text(codepoints, path.read_text(encoding='utf-8', errors='ignore'))
+    return codepoints
+
+
+def unicode_range(codepoints):
+    """[0x41, 0x42, 0x43, 0x61] -> 'U+41-43, U+61'"""
+    ranges = []
+    for cp in sorted(codepoints):
+        if ranges and cp == ranges[-1][1] + 1:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    return ', '.join(f"U+{a:X}" if a == b else f"U+{a:X}-{b:X}" for a, b in ranges)
+
+
+def file_hash(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def font_info(path):
+    font = TTFont(path)
+    family = font['name'].getBestFamilyName()
+    weight = font['OS/2'].usWeightClass if 'OS/2' in font else 400
+    italic = bool(font['OS/2'].fsSelection & 1) if 'OS/2' in font else False
+    cmap = set(font.getBestCmap() or {})
+    font.close()
+    return family, weight, italic, cmap
+
+
+def subset_font(source, output, codepoints):
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['kern', 'liga', 'calt', 'ccmp', 'locl', 'mark', 'mkmk']
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    options.desubroutinize = True
+    font = subset.load_font(str(source), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    subset.save_font(font, str(output), options)
+    font.close()
+
+
+def font_face(family, weight, italic, url, urange):
+    return (
+        "    @font-face {\n"
+        f"      font-family: '{family}';\n"
+        f"      font-style: {'italic' if italic else 'normal'};\n"
+        f"      font-weight: {weight};\n"
+        "      font-display: swap;\n"
+        f"      src: url('{url}') format('woff2');\n"
+        f"      unicode-range: {urange};\n"
+        "    }\n"
+    )
+
+
+def update_index_html(css, subsets, path=INDEX_HTML):
+    """Reemplaza el bloque de @font-face y apunta los preload a los subsets. True si cambió."""
+    html = path.read_text(encoding='utf-8')
+    if not FACES_BLOCK.search(html):
+        raise ValueError(f"{path} no tiene los marcadores <!-- fonts-subset:start --> / <!-- fonts-subset:end -->")
+    updated = FACES_BLOCK.sub(lambda m: m.group(1) + f"  <style>\n{css}  </style>" + m.group(3), html)
+    for full, subset_name in subsets.items():
+        updated = updated.replace(f'rel="preload" href="/fonts/{full}"', f'rel="preload" href="/fonts/{subset_name}"')
+    if updated == html:
+        return False
+    path.write_text(updated, encoding='utf-8')
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subsetting WOFF2 según el texto real del catálogo y la UI")
+    parser.add_argument('--extra-text', nargs='*', default=[], help="Archivos de texto adicionales (p.ej. export JSON de products)")
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+
+    if subset is None:
+        print("❌ Error: fontTools not installed")
+        print("   Run: pip install fonttools brotli")
+        return 1
+
+    print("🔤 Recolectando glifos...")
+    codepoints = collect_codepoints(args.extra_text)
+    glyph_hash = hashlib.sha256(','.join(map(str, sorted(codepoints))).encode()).hexdigest()[:16]
+    print(f"   {len(codepoints)} codepoints (set {glyph_hash})")
+
+    cache = json.loads(CACHE_PATH.read_text()) if CACHE_PATH.exists() and not args.force else {}
+    sources = sorted(p for p in FONTS_DIR.glob('*.woff2') if not p.name.endswith('.subset.woff2'))
+    if not sources:
+        print(f"❌ No hay fuentes en {FONTS_DIR}")
+        return 1
+
+    css = []
+    subsets = {}
+    total_full = total_subset = 0
+    for source in sources:
+        output = source.with_name(source.stem + '.subset.woff2')
+        family, weight, italic, cmap = font_info(source)
+        covered = codepoints & cmap
+        fallback = {cp for cp in cmap - covered if cp >= 0x20}
+
+        key = f"{glyph_hash}:{file_hash(source)}"
+        if cache.get(source.name) == key and output.exists():
+            status = "cache"
+        else:
+            subset_font(source, output, covered)
+            cache[source.name] = key
+            status = "nuevo"
+
+        full_size = source.stat().st_size
+        subset_size = output.stat().st_size
+        total_full += full_size
+        total_subset += subset_size
+        print(f"   ✅ {source.name} -> {output.name}: {full_size / 1024:.1f} KB -> {subset_size / 1024:.1f} KB "
+              f"({len(covered)} glifos, {status})")
+
+        subsets[source.name] = output.name
+        css.append(f"{chr(10) if css else ''}    /* {family} {weight}: subset + fallback con el resto del cmap */\n")
+        css.append(font_face(family, weight, italic, f"/fonts/{output.name}", unicode_range(covered)))
+        if fallback:
+            css.append(font_face(family, weight, italic, f"/fonts/{source.name}", unicode_range(fallback)))
+
+    try:
+        changed = update_index_html(''.join(css), subsets)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    CACHE_PATH.write_text(json.dumps(cache, indent=2, sort_keys=True) + "\n")
+
+    print(f"\n✨ Ruta crítica: {total_full / 1024:.1f} KB -> {total_subset / 1024:.1f} KB")
+    print(f"   {INDEX_HTML}: @font-face y preloads {'actualizados' if changed else 'sin cambios'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
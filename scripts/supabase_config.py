@@ -0,0 +1,66 @@
+"""
+Shared config/client layer for scripts/.
+
+Stdlib-only at import time: .env is parsed on first use and `requests` is
+imported only when a session is actually needed, so importing this module
+(or a script built on it) costs nothing for commands that never hit the
+network.
+
+    from supabase_config import credentials, rest_headers, get_session
+    url, key = credentials()
+    r = get_session().get(f"{url}/rest/v1/products", headers=rest_headers())
+"""
+
+import os
+import sys
+from functools import lru_cache
+
+DOTENV_PATH = '.env'
+
+
+@lru_cache(maxsize=None)
+def load_env(path=DOTENV_PATH):
+    """Simple .env parser (cacheado: se lee una sola vez por proceso). Lo que no está en .env sale del entorno (CI, Vercel)."""
+    env_vars = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'): continue
+                if '=' in line:
+                    key, val = line.split('=', 1)
+                    env_vars[key.strip()] = val.strip().strip('"').strip("'")
+    return {**os.environ, **env_vars}
+
+
+@lru_cache(maxsize=None)
+def credentials(warn_anon=False, required=True):
+    """(SUPABASE_URL, SUPABASE_KEY): service role si está, si no la anon key."""
+    env = load_env()
+    url = env.get("VITE_SUPABASE_URL")
+    key = env.get("SUPABASE_SERVICE_ROLE_KEY")
+    if not key:
+        key = env.get("VITE_SUPABASE_ANON_KEY")
+        if warn_anon and key:
+            print("⚠️ WARNING: Usando ANON KEY. Puede fallar si no hay políticas RLS permisivas.")
+    if required and (not url or not key):
+        print("❌ Error: Faltan credenciales en .env")
+        sys.exit(1)
+    return url, key
+
+
+def rest_headers(json_body=False, representation=False):
+    _, key = credentials()
+    headers = {"Authorization": f"Bearer {key}", "apikey": key}
+    if json_body:
+        headers["Content-Type"] = "application/json"
+    if representation:
+        headers["Prefer"] = "return=representation"
+    return headers
+
+
+@lru_cache(maxsize=None)
+def get_session():
+    """Una sola requests.Session por proceso (keep-alive compartido entre scripts)."""
+    import requests
+    return requests.Session()
@@ -1,33 +1,5 @@
 
-import os
-import requests
-
-# Config
-DOTENV_PATH = '.env'
-SUPABASE_URL = None
-SUPABASE_KEY = None
-
-def load_env():
-    global SUPABASE_URL, SUPABASE_KEY
-    if os.path.exists(DOTENV_PATH):
-        with open(DOTENV_PATH, 'r') as f:
-            for line in f:
-                if '=' in line:
-                    key, val = line.strip().split('=', 1)
-                    k = key.strip()
-                    v = val.strip().strip('"').strip("'")
-                    if k == 'VITE_SUPABASE_URL': SUPABASE_URL = v
-                    if k == 'SUPABASE_SERVICE_ROLE_KEY': SUPABASE_KEY = v
-                    if k == 'VITE_SUPABASE_ANON_KEY' and not SUPABASE_KEY: SUPABASE_KEY = v
-
-load_env()
-
-HEADERS = {
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "apikey": SUPABASE_KEY,
-    "Content-Type": "application/json",
-    "Prefer": "return=representation"
-}
+from supabase_config import credentials, rest_headers, get_session
 
 # Slug -> Size mapping
 UPDATES = {
@@ -84,7 +56,8 @@ def ml_to_floz(ml_str):
     return None
 
 def update_product(slug, size_val):
-    url = f"{SUPABASE_URL}/rest/v1/products"
+    supabase_url, _ = credentials()
+    url = f"{supabase_url}/rest/v1/products"
     params = {"slug": f"eq.{slug}"}
     
     # Calculate fl oz if possible
@@ -100,7 +73,7 @@ def update_product(slug, size_val):
 
     try:
         print(f"🔄 Updating {slug}: {data}...")
-        r = requests.patch(url, headers=HEADERS, params=params, json=data)
+        r = get_session().patch(url, headers=rest_headers(json_body=True, representation=True), params=params, json=data)
         r.raise_for_status()
         print("✅ OK")
     except Exception as e:
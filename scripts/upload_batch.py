@@ -1,87 +1,51 @@
 import os
-import requests
+import argparse
 import mimetypes
 
+import profiling
+from filenames import parse_output, thumb_of
+from profiling import stage
+from rate_control import AdaptiveLimiter, request_with_retry
+from supabase_config import credentials, rest_headers, get_session
+
 # Configuración
 OPTIMIZED_DIR = 'optimized_batch'
 BUCKET_NAME = 'images'
-DOTENV_PATH = '.env'
-
-def load_env():
-    """Simple .env parser"""
-    env_vars = {}
-    if os.path.exists(DOTENV_PATH):
-        with open(DOTENV_PATH, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'): continue
-                if '=' in line:
-                    key, val = line.split('=', 1)
-                    env_vars[key.strip()] = val.strip().strip('"').strip("'")
-    return env_vars
-
-env = load_env()
-SUPABASE_URL = env.get("VITE_SUPABASE_URL")
-SUPABASE_KEY = env.get("SUPABASE_SERVICE_ROLE_KEY")
-
-if not SUPABASE_KEY:
-    SUPABASE_KEY = env.get("VITE_SUPABASE_ANON_KEY")
-    print("⚠️ WARNING: Usando ANON KEY. Puede fallar si no hay políticas RLS permisivas.")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Faltan credenciales en .env")
-    exit(1)
-
-HEADERS = {
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "apikey": SUPABASE_KEY
-}
-
-def empty_bucket():
-    print("🧹 Limpiando bucket...")
-    list_url = f"{SUPABASE_URL}/storage/v1/object/list/{BUCKET_NAME}"
-    
-    # 1. Listar
-    try:
-        r = requests.post(list_url, headers=HEADERS, json={"prefix": "", "limit": 1000}) 
-        # Note: 'list' endpoint is actually a POST with prefix/limit often, or GET. 
-        # Supabase API v1 storage list is POST /object/list/{bucket}
-        r.raise_for_status()
-        objects = r.json()
-    except Exception as e:
-        print(f"⚠️ Error listando bucket (o vacío): {e}")
-        return
 
-    if not objects:
-        print("Bucket ya estaba vacío.")
-        return
+# Concurrencia adaptativa: arranca prudente y sube mientras Supabase responda rápido y sin 429
+LIMITER = AdaptiveLimiter(initial=4, maximum=16)
 
-    # 2. Borrar
-    files_to_remove = [obj['name'] for obj in objects]
-    delete_url = f"{SUPABASE_URL}/storage/v1/object/{BUCKET_NAME}"
-    try:
-        r = requests.delete(delete_url, headers=HEADERS, json={"prefixes": files_to_remove})
-        r.raise_for_status()
-        print(f"🗑️ Eliminados {len(files_to_remove)} archivos antiguos.")
-    except Exception as e:
-        print(f"❌ Error borrando archivos: {e}")
+def session():
+    """Session compartida con un pool del tamaño del límite máximo de concurrencia."""
+    http = get_session()
+    if not getattr(http, '_pool_sized', False):
+        import requests
+        http.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=LIMITER.maximum))
+        http._pool_sized = True
+    return http
 
-def upload_file(filename):
-    file_path = os.path.join(OPTIMIZED_DIR, filename)
-    upload_url = f"{SUPABASE_URL}/storage/v1/object/{BUCKET_NAME}/{filename}"
-    
-    upload_headers = HEADERS.copy()
-    upload_headers["Content-Type"] = "image/webp"
-    upload_headers["Cache-Control"] = "public, max-age=31536000, immutable"
-    
-    # x-upsert header to overwrite if exists (redundant if we cleared, but safe)
-    upload_headers["x-upsert"] = "true"
+def versioned_names(main_name, version):
+    """{stem}.{version}.webp y su thumbnail {stem}.{version}-min.webp (el frontend deriva el -min del principal)."""
+    versioned = f"{main_name[:-len('.webp')]}.{version}.webp"
+    return versioned, thumb_of(versioned)
 
+def public_url(object_name):
+    supabase_url, _ = credentials()
+    return f"{supabase_url}/storage/v1/object/public/{BUCKET_NAME}/{object_name}"
+
+def upload_file(filename, directory=OPTIMIZED_DIR, prefix='', content_type="image/webp"):
+    from tus_upload import upload_object
+
+    file_path = os.path.join(directory, filename)
+    object_name = f"{prefix}{filename}"
+    supabase_url, _ = credentials(warn_anon=True)
+
+    # upload_object usa x-upsert (re-subir un release a medias es seguro) y pasa a TUS reanudable si el archivo es grande
     try:
-        with open(file_path, 'rb') as f:
-            r = requests.post(upload_url, headers=upload_headers, data=f)
-            r.raise_for_status()
-        print(f"✅ Uploaded: {filename}")
+        with stage('upload'):
+            upload_object(supabase_url, rest_headers(), BUCKET_NAME, object_name, file_path, content_type=content_type,
+                          session=session(), limiter=LIMITER)
+        print(f"✅ Uploaded: {object_name}")
         return True
     except Exception as e:
         print(f"❌ Error uploading {filename}: {e}")
@@ -89,7 +53,8 @@ def upload_file(filename):
 
 def update_product_db(slug, images):
     # images = {1: url, 2: url, 3: url}
-    patch_url = f"{SUPABASE_URL}/rest/v1/products"
+    supabase_url, _ = credentials(warn_anon=True)
+    patch_url = f"{supabase_url}/rest/v1/products"
     
     # Build payload
     data = {}
@@ -99,15 +64,15 @@ def update_product_db(slug, images):
     
     if not data: return False
 
-    update_headers = HEADERS.copy()
-    update_headers["Content-Type"] = "application/json"
-    update_headers["Prefer"] = "return=representation"
+    update_headers = rest_headers(json_body=True, representation=True)
 
     # Query param for filtering
     params = {"slug": f"eq.{slug}"}
 
     try:
-        r = requests.patch(patch_url, headers=update_headers, params=params, json=data)
+        with stage('relink'):
+            r = request_with_retry("PATCH", patch_url, limiter=LIMITER, session=session(),
+                                   headers=update_headers, params=params, json=data)
         r.raise_for_status()
         response = r.json()
         if response:
@@ -120,66 +85,45 @@ def update_product_db(slug, images):
         print(f"❌ Error DB update {slug}: {e}")
         return False
 
+def parse_args(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--profile', nargs='?', const='profile', default=None, metavar='DIR',
+                        help="cProfile + tracemalloc por stage (upload/relink); reportes en DIR")
+    parser.add_argument('--skip-budget', action='store_true', help="Subir aunque page_budget.py marque excesos")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable(args.profile)
+    return args
+
 def main():
-    print("🚀 Iniciando Upload Batch (Requests Version)...")
-    
+    """
+    Catálogo completo sin downtime: sube optimized_batch como un release nuevo (releases/<id>/),
+    lo verifica y lo activa con un solo switch atómico. Ya no se vacía el bucket en vivo:
+    el release anterior queda para rollback (image_release.py rollback / gc).
+    """
+    from image_release import release
+
+    args = parse_args("Publica optimized_batch como release de imágenes y lo activa (blue/green)")
+    print("🚀 Iniciando Upload Batch (release blue/green)...")
+    credentials(warn_anon=True)  # falla acá, antes de subir nada, si faltan credenciales
+
     if not os.path.exists(OPTIMIZED_DIR):
         print(f"❌ Directorio no encontrado: {OPTIMIZED_DIR}")
         return
 
-    # User Confirmation
-    print("⚠️  ATENCIÓN: Se BORRARÁN todos los archivos del bucket 'images'.")
-    confirm = input("Escribe 's' para continuar: ")
-    if confirm.lower() != 's':
-        print("Cancelado.")
-        return
-
-    # 1. Empty Bucket
-    empty_bucket()
+    release(OPTIMIZED_DIR, skip_budget=args.skip_budget)
+    if args.profile:
+        profiling.report()
 
-    # 2. Upload Files
-    files = [f for f in os.listdir(OPTIMIZED_DIR) if f.endswith('.webp')]
-    uploaded_files = []
-    
-    for f in files:
-        if upload_file(f):
-            uploaded_files.append(f)
-
-    # 3. Update DB
-    print("\n🔄 Actualizando base de datos...")
-    
-    # Group logic
+def group_by_slot(filenames):
+    """{slug: {índice: filename}} para los archivos principales (slug.webp, slug-2.webp, slug-3.webp)."""
     product_updates = {}
-    for filename in uploaded_files:
-        is_thumb = 'min' in filename or 'thumb' in filename
-        if is_thumb: continue
-
-        # Parse slug/index
-        # slug.webp, slug-2.webp, slug-3.webp
-        name_no_ext = filename.replace('.webp', '')
-        
-        idx = 1
-        slug = name_no_ext
-        
-        if name_no_ext.endswith('-3'):
-            idx = 3
-            slug = name_no_ext[:-2]
-        elif name_no_ext.endswith('-2'):
-            idx = 2
-            slug = name_no_ext[:-2]
-            
-        if slug not in product_updates:
-            product_updates[slug] = {}
-        
-        public_url = f"{SUPABASE_URL}/storage/v1/object/public/{BUCKET_NAME}/{filename}"
-        product_updates[slug][idx] = public_url
-
-    count = 0
-    for slug, imgs in product_updates.items():
-        if update_product_db(slug, imgs):
-            count += 1
-            
-    print(f"\n✨ Proceso completado. Productos actualizados: {count}")
+    for filename in filenames:
+        # Sufijo, no substring: 'minipoker.webp' no es un thumbnail; -mobile / -{W}w son variantes, no slots
+        parsed = parse_output(filename)
+        if parsed is None or parsed.thumb or parsed.mobile or parsed.width: continue
+        product_updates.setdefault(parsed.slug, {})[parsed.index] = filename
+    return product_updates
 
 if __name__ == '__main__':
     main()
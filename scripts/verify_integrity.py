@@ -1,35 +1,18 @@
 import os
-import requests
+import argparse
 
-# Configuración Manual de ENV (Sin dependencias externas)
-def load_env():
-    env_vars = {}
-    dotenv_path = '.env'
-    if os.path.exists(dotenv_path):
-        with open(dotenv_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'): continue
-                if '=' in line:
-                    key, val = line.split('=', 1)
-                    env_vars[key.strip()] = val.strip().strip('"').strip("'")
-    return env_vars
-
-env = load_env()
-SUPABASE_URL = env.get("VITE_SUPABASE_URL")
-SUPABASE_KEY = env.get("SUPABASE_SERVICE_ROLE_KEY") or env.get("VITE_SUPABASE_ANON_KEY")
+from filenames import parse_output
+from products_snapshot import open_snapshot
+from supabase_config import credentials
 
 OPTIMIZED_DIR = 'optimized_batch'
 
-def get_db_slugs():
-    url = f"{SUPABASE_URL}/rest/v1/products?select=slug"
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}"
-    }
-    r = requests.get(url, headers=headers)
-    r.raise_for_status()
-    return {item['slug'] for item in r.json()}
+def get_db_slugs(max_age=0):
+    # Snapshot local paginado (sin el tope de filas de PostgREST) y refrescado incremental
+    snapshot = open_snapshot(*credentials(), max_age=max_age)
+    slugs = snapshot.slugs()
+    snapshot.close()
+    return slugs
 
 def get_file_slugs():
     if not os.path.exists(OPTIMIZED_DIR):
@@ -40,32 +23,23 @@ def get_file_slugs():
     files = [f for f in os.listdir(OPTIMIZED_DIR) if f.endswith('.webp')]
     
     for f in files:
+        parsed = parse_output(f)
         # Ignorar thumbs
-        if '-min' in f: continue
-        
-        name = f.replace('.webp', '')
-        
-        # Eliminar sufijos numéricos del nombre de archivo para obtener el slug base
-        # Ej: "mi-producto-1" -> "mi-producto"
-        # Ej: "mi-producto-2" -> "mi-producto"
-        
-        base_slug = name
-        if name.endswith('-1'):
-            base_slug = name[:-2]
-        elif name.endswith('-2'):
-            base_slug = name[:-2]
-        elif name.endswith('-3'):
-            base_slug = name[:-2]
-            
-        slugs.add(base_slug)
+        if parsed is None or parsed.thumb: continue
+        slugs.add(parsed.slug)
     
     return slugs
 
 def main():
+    parser = argparse.ArgumentParser(description="Cruza slugs de la DB con las imágenes de optimized_batch")
+    parser.add_argument('--max-age', type=float, default=0,
+                        help="Usar el snapshot local sin consultar Supabase si tiene menos de N segundos")
+    args = parser.parse_args()
+
     print("🔍 Iniciando Verificación de Integridad...")
     
     try:
-        db_slugs = get_db_slugs()
+        db_slugs = get_db_slugs(args.max_age)
         print(f"📚 Productos en DB: {len(db_slugs)}")
     except Exception as e:
         print(f"❌ Error fetching DB: {e}")
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Watch raw_images/ and publish new or changed product photos as they land.
+
+For the common case (a new photo for a slot) this replaces writing a hotfix:
+drop `slug1.jpg` / `slug-2.png` into the folder and, a couple of seconds
+later, the product page shows it. Anything irregular (other source folder,
+odd file name, upload-only, relink-only) is a job spec for run_jobs.py.
+
+For every source that settles (no new events for DEBOUNCE_SECONDS):
+1. process_batch.process_image -> optimized_batch/ (same normalize, trim,
+   resize and WebP settings as the batch), via the memory-aware scheduler
+2. upload main + thumbnail under a content-versioned name
+   ({slug}-{n}.{hash}.webp / ...-min.webp): objects are served with
+   `immutable`, so overwriting the old name would stay cached for a year
+3. PATCH image_url / image2_url / image3_url of that slug
+
+Events come from inotify on Linux (ctypes, no extra dependency) and from
+polling elsewhere. .watch_state.json remembers the hash of every published
+source, so a restart catches up on what changed while it was down and skips
+the rest.
+
+Usage:
+    python scripts/watch_raw.py [directory] [--once] [--baseline] [--debounce 1.5]
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+
+RAW_DIR = 'raw_images'
+STATE_PATH = '.watch_state.json'
+DEBOUNCE_SECONDS = 1.5
+POLL_INTERVAL = 1.0
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+IGNORED_SUFFIXES = ('.tmp', '.part', '.crdownload', '~')
+
+
+def is_source(name):
+    lower = name.lower()
+    return (not name.startswith('.') and lower.endswith(SOURCE_EXTENSIONS)
+            and not lower.endswith(IGNORED_SUFFIXES))
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+# --- watchers ---
+
+class InotifyWatcher:
+    """inotify vía ctypes: eventos de cierre de escritura / renombres / borrados en un directorio."""
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    def __init__(self, directory):
+        import ctypes
+        import ctypes.util
+        import struct
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.header = struct.Struct('iIII')
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = (self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO
+                | self.IN_CREATE | self.IN_DELETE)
+        if self.libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def events(self, timeout):
+        """Nombres de archivo con actividad en los próximos `timeout` segundos."""
+        import select
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        names = set()
+        offset = 0
+        while offset + self.header.size <= len(buffer):
+            _, _, _, length = self.header.unpack_from(buffer, offset)
+            offset += self.header.size
+            name = buffer[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback portable (Windows/macOS): compara (mtime, tamaño) cada POLL_INTERVAL."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.seen = self._scan()
+
+    def _scan(self):
+        with os.scandir(self.directory) as entries:
+            return {e.name: (e.stat().st_mtime_ns, e.stat().st_size) for e in entries if e.is_file()}
+
+    def events(self, timeout):
+        time.sleep(min(timeout, POLL_INTERVAL))
+        current = self._scan()
+        changed = {name for name, sig in current.items() if self.seen.get(name) != sig}
+        changed |= set(self.seen) - set(current)
+        self.seen = current
+        return changed
+
+    def close(self):
+        pass
+
+
+def make_watcher(directory):
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directory)
+        except OSError as e:
+            print(f"⚠️ inotify no disponible ({e}), usando polling")
+    return PollingWatcher(directory)
+
+
+# --- publicación ---
+
+class Publisher:
+    def __init__(self, directory, output_dir, state_path=STATE_PATH):
+        self.directory = directory
+        self.output_dir = output_dir
+        self.state_path = state_path
+        self.state = json.loads(open(state_path).read()) if os.path.exists(state_path) else {}
+
+    def _save_state(self):
+        tmp = self.state_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    def pending(self, names):
+        """Fuentes que existen y cuyo contenido no coincide con lo último publicado."""
+        todo = []
+        for name in sorted(names):
+            path = os.path.join(self.directory, name)
+            if not is_source(name) or not os.path.isfile(path):
+                continue
+            digest = file_hash(path)
+            if self.state.get(name, {}).get('source') != digest:
+                todo.append((name, path, digest))
+        return todo
+
+    def publish(self, names):
+        from process_batch import process_image, plan_source, ensure_dir
+        from image_scheduler import MemoryScheduler
+        from upload_batch import BUCKET_NAME, LIMITER, session, update_product_db, versioned_names, public_url
+        from page_budget import over_budget
+        from rate_control import run_concurrent
+        from supabase_config import credentials, rest_headers
+        from tus_upload import upload_object
+
+        todo = self.pending(names)
+        if not todo:
+            return 0
+        started = time.monotonic()
+        ensure_dir(self.output_dir)
+        print(f"\n📥 {len(todo)} fuente(s): {', '.join(name for name, _, _ in todo)}")
+
+        # 1. Proceso (mismo pipeline que process_batch, con budget de memoria)
+        scheduler = MemoryScheduler()
+        jobs, digests = [], {}
+        for name, path, digest in todo:
+            try:
+                jobs.append(plan_source(path, scheduler.budget))
+                digests[path] = (name, digest)
+            except Exception as e:
+                print(f"❌ ERROR reading header {name}: {e}")
+        processed = []
+        for job, result, error in scheduler.run(jobs, process_image, self.output_dir):
+            if error or not result:
+                continue
+            processed.append((*digests[job['path']], *result))
+
+        # 2. Upload con nombre versionado por contenido (thumbnail primero: la DB nunca apunta a un -min inexistente)
+        supabase_url, _ = credentials(warn_anon=True)
+        headers = rest_headers()
+
+        def upload(item):
+            name, digest, slug, index, main_name, thumb_name = item
+            main_path = os.path.join(self.output_dir, main_name)
+            problems = over_budget([main_path, os.path.join(self.output_dir, thumb_name)])
+            if problems:
+                for filename, size, limit in problems:
+                    print(f"🛑 {filename}: {size / 1024:.0f} KB > {limit / 1024:.0f} KB (page_budgets.json), no se sube")
+                return None
+            remote_main, remote_thumb = versioned_names(main_name, file_hash(main_path)[:10])
+            try:
+                upload_object(supabase_url, headers, BUCKET_NAME, remote_thumb,
+                              os.path.join(self.output_dir, thumb_name), session=session(), limiter=LIMITER)
+                upload_object(supabase_url, headers, BUCKET_NAME, remote_main, main_path,
+                              session=session(), limiter=LIMITER)
+            except Exception as e:
+                print(f"❌ Error uploading {main_name}: {e}")
+                return None
+            print(f"🚀 Uploaded: {remote_main} (+ thumb)")
+            return name, digest, slug, index, public_url(remote_main)
+
+        uploaded = [u for u in run_concurrent(processed, upload, LIMITER) if u]
+
+        # 3. Relink del slot (image_url / image2_url / image3_url)
+        def relink(item):
+            name, digest, slug, index, url = item
+            if index > 3:
+                print(f"⚠️ {name}: índice {index} sin columna en products, subido sin re-link")
+                return item
+            return item if update_product_db(slug, {index: url}) else None
+
+        published = [r for r in run_concurrent(uploaded, relink, LIMITER) if r]
+        for name, digest, slug, index, url in published:
+            self.state[name] = {'source': digest, 'slug': slug, 'index': index, 'url': url,
+                                'published_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        self._save_state()
+        print(f"✨ {len(published)}/{len(todo)} publicada(s) en {time.monotonic() - started:.1f}s")
+        return len(published)
+
+
+def watch(directory, publisher, debounce):
+    watcher = make_watcher(directory)
+    print(f"👀 Observando {directory} ({type(watcher).__name__}, debounce {debounce}s). Ctrl+C para salir.")
+    last_event = {}
+    try:
+        while True:
+            now = time.monotonic()
+            # Esperar como mucho hasta que venza el debounce más próximo
+            deadline = min((t + debounce for t in last_event.values()), default=now + 60)
+            for name in watcher.events(max(0.05, deadline - now)):
+                if is_source(name):
+                    last_event[name] = time.monotonic()
+            now = time.monotonic()
+            settled = {name for name, t in last_event.items() if now - t >= debounce}
+            if settled:
+                for name in settled:
+                    del last_event[name]
+                publisher.publish(settled)
+    except KeyboardInterrupt:
+        print("\n👋 Watch detenido.")
+    finally:
+        watcher.close()
+
+
+def main():
+    from process_batch import OUTPUT_DIR
+
+    parser = argparse.ArgumentParser(description="Procesa, sube y re-linkea fotos nuevas de raw_images en vivo")
+    parser.add_argument('directory', nargs='?', default=RAW_DIR)
+    parser.add_argument('--once', action='store_true', help="Solo ponerse al día con lo que cambió y salir")
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE_SECONDS)
+    parser.add_argument('--baseline', action='store_true',
+                        help="Marcar lo que ya está en la carpeta como publicado (primer uso) sin subir nada")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(f"❌ Directorio no encontrado: {args.directory}")
+        return 1
+
+    publisher = Publisher(args.directory, OUTPUT_DIR)
+    if args.baseline:
+        for name, _, digest in publisher.pending(set(os.listdir(args.directory))):
+            publisher.state[name] = {'source': digest, 'baseline': True}
+        publisher._save_state()
+        print(f"📌 {len(publisher.state)} fuente(s) marcadas como publicadas")
+    # Catch-up: lo que cambió mientras el watcher no corría
+    publisher.publish(set(os.listdir(args.directory)))
+    if not args.once:
+        watch(args.directory, publisher, args.debounce)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,6 +5,8 @@ interface SEOProps {
     title?: string;
     description: string;
     image?: string;
+    imageWidth?: number;
+    imageHeight?: number;
     url?: string;
     type?: string;
     structuredData?: Record<string, any>;
@@ -12,7 +14,7 @@ interface SEOProps {
     statusCode?: number;
 }
 
-const SEO = ({ title, description, image, url, type = 'website', structuredData, noIndex = false, statusCode }: SEOProps) => {
+const SEO = ({ title, description, image, imageWidth = 500, imageHeight = 500, url, type = 'website', structuredData, noIndex = false, statusCode }: SEOProps) => {
     const siteTitle = 'Perla Negra';
     const fullTitle = title ? `${title} | ${siteTitle}` : siteTitle;
     const currentUrl = url || typeof window !== 'undefined' ? window.location.href : '';
@@ -52,8 +54,8 @@ const SEO = ({ title, description, image, url, type = 'website', structuredData,
 
             {/* WhatsApp/Social optimizations */}
             {image && <meta property="og:image:type" content="image/jpeg" />}
-            {image && <meta property="og:image:width" content="500" />}
-            {image && <meta property="og:image:height" content="500" />}
+            {image && <meta property="og:image:width" content={imageWidth.toString()} />}
+            {image && <meta property="og:image:height" content={imageHeight.toString()} />}
             {image && <meta property="og:image:alt" content={title || siteTitle} />}
 
             {/* Twitter */}
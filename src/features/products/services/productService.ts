@@ -60,6 +60,7 @@ export const mapProductDBToProduct = (db: ProductDB): Product => {
         sizeFlOz: db.size_fl_oz,
         image2: getOptimizedImageUrl(db.image2_url),
         image3: getOptimizedImageUrl(db.image3_url),
+        ogImage: db.og_image_url || undefined, // Card 1200x630 pre-renderizada (scripts/og_cards.py)
         subtitle: db.subtitle,
         code: db.code,
         usage: db.usage,
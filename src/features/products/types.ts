@@ -20,6 +20,7 @@ export interface ProductDB {
     size?: string;
     image2_url?: string;
     image3_url?: string;
+    og_image_url?: string;
     subtitle?: string;
     code?: string;
     usage?: string;
@@ -54,6 +55,7 @@ export interface Product {
     sizeFlOz?: number;
     image2?: string;
     image3?: string;
+    ogImage?: string;
     subtitle?: string;
     code?: string;
     usage?: string;
@@ -0,0 +1,126 @@
+-- ==============================================================================
+-- 🔁 Releases de imágenes blue/green (switch atómico + rollback)
+-- ==============================================================================
+-- Fecha: 2026-10-19
+-- Objetivo: scripts/image_release.py sube cada catálogo de imágenes bajo
+-- releases/<id>/ sin tocar lo que está en vivo, lo verifica completo y recién
+-- entonces lo activa con UNA llamada RPC: todos los image_url/image2_url/
+-- image3_url cambian en la misma transacción. El release anterior queda en el
+-- bucket para un rollback instantáneo hasta que el GC lo borre.
+-- ==============================================================================
+
+CREATE TABLE IF NOT EXISTS public.image_releases (
+    id text PRIMARY KEY,
+    status text NOT NULL DEFAULT 'uploaded'
+        CHECK (status IN ('uploaded', 'verified', 'active', 'retired', 'deleted')),
+    manifest jsonb NOT NULL,            -- {"slug": {"1": url, "2": url, "3": url}}
+    previous jsonb,                     -- URLs que reemplazó al activarse (para rollback)
+    replaced_release text,              -- release que estaba activo antes
+    created_at timestamp with time zone DEFAULT now(),
+    verified_at timestamp with time zone,
+    activated_at timestamp with time zone
+);
+
+-- Solo service role (los scripts); el frontend sigue leyendo products
+ALTER TABLE public.image_releases ENABLE ROW LEVEL SECURITY;
+
+-- Activa un release verificado: reemplaza los slots de cada slug que están en el
+-- manifest (optimized_batch suele ser un batch parcial: un slot ausente no se toca)
+CREATE OR REPLACE FUNCTION public.activate_image_release(p_release text)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+DECLARE
+    v_release public.image_releases%ROWTYPE;
+    v_current text;
+    v_previous jsonb;
+    v_count integer;
+BEGIN
+    -- Un switch a la vez
+    PERFORM pg_advisory_xact_lock(hashtext('image_releases'));
+
+    SELECT * INTO v_release FROM public.image_releases WHERE id = p_release FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'release % no existe', p_release;
+    END IF;
+    IF v_release.status NOT IN ('verified', 'retired') THEN
+        RAISE EXCEPTION 'release % está en estado %, se necesita verified', p_release, v_release.status;
+    END IF;
+
+    SELECT id INTO v_current FROM public.image_releases WHERE status = 'active';
+
+    SELECT coalesce(jsonb_object_agg(p.slug, jsonb_build_object(
+               '1', p.image_url, '2', p.image2_url, '3', p.image3_url)), '{}'::jsonb)
+    INTO v_previous
+    FROM public.products p
+    WHERE v_release.manifest ? p.slug;
+
+    UPDATE public.products p
+    SET image_url = coalesce(m.value->>'1', p.image_url),
+        image2_url = coalesce(m.value->>'2', p.image2_url),
+        image3_url = coalesce(m.value->>'3', p.image3_url)
+    FROM jsonb_each(v_release.manifest) AS m
+    WHERE p.slug = m.key;
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+
+    UPDATE public.image_releases SET status = 'retired' WHERE status = 'active';
+    UPDATE public.image_releases
+    SET status = 'active', activated_at = now(), previous = v_previous, replaced_release = v_current
+    WHERE id = p_release;
+
+    RETURN v_count;
+END;
+$$;
+
+-- Vuelve a las URLs exactas que había antes del release activo, solo en los slots que
+-- siguen apuntando al release: lo que watch_raw / run_jobs publicaron después se respeta
+CREATE OR REPLACE FUNCTION public.rollback_image_release()
+RETURNS text
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+DECLARE
+    v_release public.image_releases%ROWTYPE;
+    v_target_status text;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('image_releases'));
+
+    SELECT * INTO v_release FROM public.image_releases WHERE status = 'active' FOR UPDATE;
+    IF NOT FOUND OR v_release.previous IS NULL THEN
+        RAISE EXCEPTION 'no hay release activo para revertir';
+    END IF;
+
+    -- El gc pudo haber borrado los objetos del release anterior: no apuntar products a la nada
+    IF v_release.replaced_release IS NOT NULL THEN
+        SELECT status INTO v_target_status FROM public.image_releases WHERE id = v_release.replaced_release;
+        IF v_target_status IS NULL OR v_target_status = 'deleted' THEN
+            RAISE EXCEPTION 'release % ya fue borrado por el gc, no se puede volver a él', v_release.replaced_release;
+        END IF;
+    END IF;
+
+    UPDATE public.products p
+    SET image_url = CASE WHEN p.image_url = v_release.manifest->m.key->>'1'
+                         THEN m.value->>'1' ELSE p.image_url END,
+        image2_url = CASE WHEN p.image2_url = v_release.manifest->m.key->>'2'
+                          THEN m.value->>'2' ELSE p.image2_url END,
+        image3_url = CASE WHEN p.image3_url = v_release.manifest->m.key->>'3'
+                          THEN m.value->>'3' ELSE p.image3_url END
+    FROM jsonb_each(v_release.previous) AS m
+    WHERE p.slug = m.key;
+
+    UPDATE public.image_releases SET status = 'retired' WHERE id = v_release.id;
+    IF v_release.replaced_release IS NOT NULL THEN
+        UPDATE public.image_releases SET status = 'active' WHERE id = v_release.replaced_release;
+    END IF;
+
+    RETURN v_release.replaced_release;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.activate_image_release(text) FROM public, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.rollback_image_release() FROM public, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.activate_image_release(text) TO service_role;
+GRANT EXECUTE ON FUNCTION public.rollback_image_release() TO service_role;
@@ -0,0 +1,12 @@
+-- ==============================================================================
+-- 🃏 products.og_image_url: cards Open Graph pre-renderizadas
+-- ==============================================================================
+-- Fecha: 2026-10-19
+-- Objetivo: scripts/og_cards.py renderiza una card 1200x630 por producto
+-- (foto, marca, nombre y precio), la sube a images/og/ y guarda acá su URL.
+-- El frontend la usa como og:image / twitter:image; si es NULL sigue usando
+-- image_url como hasta ahora.
+-- ==============================================================================
+
+ALTER TABLE public.products
+ADD COLUMN IF NOT EXISTS og_image_url text;
@@ -0,0 +1,32 @@
+-- ==============================================================================
+-- ⚡ products.updated_at para snapshots incrementales
+-- ==============================================================================
+-- Fecha: 2026-10-19
+-- Objetivo: que scripts/products_snapshot.py pueda pedir solo las filas que
+-- cambiaron (updated_at=gte.<último visto>) en vez de toda la tabla.
+-- ==============================================================================
+
+ALTER TABLE public.products
+ADD COLUMN IF NOT EXISTS updated_at timestamp with time zone DEFAULT now();
+
+UPDATE public.products SET updated_at = now() WHERE updated_at IS NULL;
+
+-- Mantener updated_at al día en cada UPDATE (scripts, panel admin, SQL editor)
+CREATE OR REPLACE FUNCTION public.set_products_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+SET search_path = ''
+AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS products_set_updated_at ON public.products;
+CREATE TRIGGER products_set_updated_at
+BEFORE UPDATE ON public.products
+FOR EACH ROW EXECUTE FUNCTION public.set_products_updated_at();
+
+-- Orden + filtro del refresh incremental
+CREATE INDEX IF NOT EXISTS idx_products_updated_at ON public.products (updated_at, id);
@@ -298,7 +298,9 @@ const ProductDetailPage = (): React.ReactElement => {
             <SEO
                 title={product.name}
                 description={product.subtitle || `Compra ${product.name} al miglior prezzo su Perla Negra.`}
-                image={getOptimizedImageUrl(product.image, { width: 500, height: 500, format: 'jpeg' })}
+                image={product.ogImage || getOptimizedImageUrl(product.image, { width: 500, height: 500, format: 'jpeg' })}
+                imageWidth={product.ogImage ? 1200 : 500}
+                imageHeight={product.ogImage ? 630 : 500}
                 structuredData={structuredData}
             />
             <div className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 w-full flex-grow flex flex-col">
@@ -23,6 +23,13 @@ if (!SUPABASE_URL || !SUPABASE_KEY) {
 
 const supabase = createClient(SUPABASE_URL, SUPABASE_KEY);
 
+const escapeXml = (value) => String(value)
+    .replace(/&/g, '&amp;')
+    .replace(/</g, '&lt;')
+    .replace(/>/g, '&gt;')
+    .replace(/"/g, '&quot;')
+    .replace(/'/g, '&apos;');
+
 async function generateSitemap() {
     console.log('🗺️  Generando sitemap.xml...');
 
@@ -30,8 +37,9 @@ async function generateSitemap() {
         // 1. Obtener productos activos
         const { data: products, error } = await supabase
             .from('products')
-            .select('slug, created_at') // Simplified for debugging
-            .eq('active', true);
+            .select('slug, created_at, image_url, image2_url, image3_url')
+            .eq('active', true)
+            .order('id');
 
         if (error) throw error;
 
@@ -51,7 +59,7 @@ async function generateSitemap() {
 
         // 3. Construir XML
         let sitemap = `<?xml version="1.0" encoding="UTF-8"?>
-<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">`;
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">`;
 
         // Agregar páginas estáticas
         staticRoutes.forEach(route => {
@@ -72,12 +80,21 @@ async function generateSitemap() {
             // Priority: 1.0 for featured, 0.9 for others (Standard: 0.5-0.8, but 0.9 emphasizes products)
             const priority = product.featured ? '1.0' : '0.9';
 
+            // Imágenes del producto (Google Images): los slots que tenga cargados
+            const images = [product.image_url, product.image2_url, product.image3_url]
+                .filter(Boolean)
+                .map(url => `
+        <image:image>
+            <image:loc>${escapeXml(url)}</image:loc>
+        </image:image>`)
+                .join('');
+
             sitemap += `
     <url>
-        <loc>${SITE_URL}/prodotti/${product.slug}</loc>
+        <loc>${SITE_URL}/prodotti/${escapeXml(product.slug)}</loc>
         <lastmod>${lastMod}</lastmod>
         <changefreq>${product.featured ? 'daily' : 'weekly'}</changefreq>
-        <priority>${priority}</priority>
+        <priority>${priority}</priority>${images}
     </url>`;
         });
 